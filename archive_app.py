@@ -1,186 +1,456 @@
 import flet as ft
 import sqlite3
 import os
+import threading
+import time
+
+import db_worker
+import ui_profile
+from cold_archive import COLD_DIRECTORY, export_cold_archive
+from db_pool import writer
+from migrations import migrate
 
 # --- Configuration de la base de données (DOIT CORRESPONDRE À VOTRE DB FLET) ---
 DB_FILE = 'dossiers.db' # Assurez-vous que c'est le même fichier que votre app principale
 
-# Connexion à la base de données SQLite
+# Lignes d'historique archivées par transaction lors d'une reconstruction complète
+ARCHIVE_CHUNK_SIZE = 5000
+
+# Une seule tâche d'archivage à la fois (mise à jour, reconstruction, export froid),
+# toutes fenêtres confondues : deux tâches simultanées se disputeraient main_archive
+# et le point de reprise de la reconstruction
+ARCHIVE_LOCK = threading.Lock()
+
+# Connexion d'écriture à la base de données SQLite (partagée via db_pool)
 def get_db_connection():
-    conn = sqlite3.connect(DB_FILE, check_same_thread=False)
-    conn.row_factory = sqlite3.Row # Permet d'accéder aux colonnes par leur nom
-    return conn
+    # Usage : "with get_db_connection() as conn:" (commit en sortie, rollback en cas d'erreur)
+    return writer(DB_FILE)
 
 # --- Fonction pour initialiser les tables originales (pour les tests) ---
 def setup_initial_tables():
-    conn = get_db_connection()
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS vehicule (
+                id_vehicule INTEGER PRIMARY KEY,
+                immatriculation TEXT UNIQUE NOT NULL,
+                marque TEXT NOT NULL,
+                modele TEXT NOT NULL,
+                annee_fabrication INTEGER,
+                couleur TEXT
+            )
+        ''')
+
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS proprietaire (
+                id_proprietaire INTEGER PRIMARY KEY,
+                type_proprietaire TEXT NOT NULL CHECK (type_proprietaire IN ('PHYSIQUE', 'MORALE')),
+                adresse TEXT,
+                telephone TEXT,
+                email TEXT,
+                nom TEXT,
+                prenom TEXT,
+                date_naissance TEXT,
+                raison_sociale TEXT,
+                siret TEXT,
+                representant_legal TEXT
+            )
+        ''')
+
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS historique_proprietaires (
+                id_historique INTEGER PRIMARY KEY,
+                id_vehicule INTEGER REFERENCES vehicule(id_vehicule),
+                id_proprietaire INTEGER REFERENCES proprietaire(id_proprietaire),
+                date_debut TEXT NOT NULL,
+                date_fin TEXT,
+                CONSTRAINT check_dates CHECK (date_fin IS NULL OR date_fin > date_debut)
+            )
+        ''')
+        migrate(conn)
+
+        # Insérer des données d'exemple si les tables sont vides
+        cursor.execute("SELECT COUNT(*) FROM vehicule")
+        if cursor.fetchone()[0] == 0:
+            print("Inserting sample data...")
+            cursor.execute("INSERT INTO vehicule (id_vehicule, immatriculation, marque, modele, annee_fabrication, couleur) VALUES (1, 'AB-123-CD', 'Renault', 'Clio', 2020, 'Bleu')")
+            cursor.execute("INSERT INTO vehicule (id_vehicule, immatriculation, marque, modele, annee_fabrication, couleur) VALUES (2, 'EF-456-GH', 'Peugeot', '308', 2018, 'Gris')")
+        
+            cursor.execute("INSERT INTO proprietaire (id_proprietaire, type_proprietaire, nom, prenom, adresse) VALUES (101, 'PHYSIQUE', 'Dupont', 'Jean', '12 Rue de la Paix')")
+            cursor.execute("INSERT INTO proprietaire (id_proprietaire, type_proprietaire, raison_sociale, siret, adresse) VALUES (102, 'MORALE', 'ABC Corp', '12345678901234', 'Z.I. Sud')")
+
+            cursor.execute("INSERT INTO historique_proprietaires (id_historique, id_vehicule, id_proprietaire, date_debut, date_fin) VALUES (1001, 1, 101, '2020-05-10', '2023-01-15')")
+            cursor.execute("INSERT INTO historique_proprietaires (id_historique, id_vehicule, id_proprietaire, date_debut, date_fin) VALUES (1002, 1, 102, '2023-01-16', NULL)")
+            cursor.execute("INSERT INTO historique_proprietaires (id_historique, id_vehicule, id_proprietaire, date_debut, date_fin) VALUES (1003, 2, 101, '2019-03-20', NULL)")
+
+# --- Table d'archive dénormalisée ---
+ARCHIVE_TABLE_SQL = '''
+    CREATE TABLE IF NOT EXISTS main_archive (
+        id_historique INTEGER PRIMARY KEY,
+        id_vehicule_orig INTEGER NOT NULL,
+        id_proprietaire_orig INTEGER NOT NULL,
+        date_debut TEXT NOT NULL,
+        date_fin TEXT,
+    
+        immatriculation_veh TEXT NOT NULL,
+        marque_veh TEXT NOT NULL,
+        modele_veh TEXT NOT NULL,
+        annee_fabrication_veh INTEGER,
+        couleur_veh TEXT,
+    
+        type_proprietaire_prop TEXT NOT NULL,
+        adresse_prop TEXT,
+        telephone_prop TEXT,
+        email_prop TEXT,
+        nom_prop TEXT,
+        prenom_prop TEXT,
+        date_naissance_prop TEXT,
+        raison_sociale_prop TEXT,
+        siret_prop TEXT,
+        representant_legal_prop TEXT
+    );
+'''
+
+# Jointure des trois tables ; {where} restreint les lignes d'historique concernées
+ARCHIVE_INSERT_SQL = '''
+    INSERT INTO main_archive (
+        id_historique, id_vehicule_orig, id_proprietaire_orig, date_debut, date_fin,
+        immatriculation_veh, marque_veh, modele_veh, annee_fabrication_veh, couleur_veh,
+        type_proprietaire_prop, adresse_prop, telephone_prop, email_prop,
+        nom_prop, prenom_prop, date_naissance_prop,
+        raison_sociale_prop, siret_prop, representant_legal_prop
+    )
+    SELECT
+        hp.id_historique, hp.id_vehicule, hp.id_proprietaire, hp.date_debut, hp.date_fin,
+        v.immatriculation, v.marque, v.modele, v.annee_fabrication, v.couleur,
+        p.type_proprietaire, p.adresse, p.telephone, p.email,
+        p.nom, p.prenom, p.date_naissance,
+        p.raison_sociale, p.siret, p.representant_legal
+    FROM
+        historique_proprietaires hp
+    JOIN
+        vehicule v ON hp.id_vehicule = v.id_vehicule
+    JOIN
+        proprietaire p ON hp.id_proprietaire = p.id_proprietaire
+    {where};
+'''
+
+def setup_change_capture(conn):
+    # Capture des modifications : chaque ligne d'historique insérée, modifiée ou
+    # supprimée, ou dont le véhicule / le propriétaire a été modifié ou supprimé, est
+    # notée dans archive_changes. refresh_main_archive() ne retraite ensuite que ces lignes.
+    # Retourne True si la capture vient d'être mise en place.
     cursor = conn.cursor()
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'archive_changes'")
+    created = cursor.fetchone() is None
 
+    cursor.execute("CREATE TABLE IF NOT EXISTS archive_changes (id_historique INTEGER PRIMARY KEY)")
+    # Retrouver l'historique d'un véhicule / d'un propriétaire modifié sans parcourir
+    # toute la table : index idx_historique_*_date, créés par les migrations
+    migrate(conn)
     cursor.execute('''
-        CREATE TABLE IF NOT EXISTS vehicule (
-            id_vehicule INTEGER PRIMARY KEY,
-            immatriculation TEXT UNIQUE NOT NULL,
-            marque TEXT NOT NULL,
-            modele TEXT NOT NULL,
-            annee_fabrication INTEGER,
-            couleur TEXT
-        )
+        CREATE TRIGGER IF NOT EXISTS archive_historique_ai AFTER INSERT ON historique_proprietaires BEGIN
+            INSERT OR IGNORE INTO archive_changes VALUES (new.id_historique);
+        END
     ''')
-
     cursor.execute('''
-        CREATE TABLE IF NOT EXISTS proprietaire (
-            id_proprietaire INTEGER PRIMARY KEY,
-            type_proprietaire TEXT NOT NULL CHECK (type_proprietaire IN ('PHYSIQUE', 'MORALE')),
-            adresse TEXT,
-            telephone TEXT,
-            email TEXT,
-            nom TEXT,
-            prenom TEXT,
-            date_naissance TEXT,
-            raison_sociale TEXT,
-            siret TEXT,
-            representant_legal TEXT
-        )
+        CREATE TRIGGER IF NOT EXISTS archive_historique_au AFTER UPDATE ON historique_proprietaires BEGIN
+            INSERT OR IGNORE INTO archive_changes VALUES (old.id_historique);
+            INSERT OR IGNORE INTO archive_changes VALUES (new.id_historique);
+        END
     ''')
-
     cursor.execute('''
-        CREATE TABLE IF NOT EXISTS historique_proprietaires (
-            id_historique INTEGER PRIMARY KEY,
-            id_vehicule INTEGER REFERENCES vehicule(id_vehicule),
-            id_proprietaire INTEGER REFERENCES proprietaire(id_proprietaire),
-            date_debut TEXT NOT NULL,
-            date_fin TEXT,
-            CONSTRAINT check_dates CHECK (date_fin IS NULL OR date_fin > date_debut)
-        )
+        CREATE TRIGGER IF NOT EXISTS archive_historique_ad AFTER DELETE ON historique_proprietaires BEGIN
+            INSERT OR IGNORE INTO archive_changes VALUES (old.id_historique);
+        END
     ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS archive_vehicule_au AFTER UPDATE ON vehicule BEGIN
+            INSERT OR IGNORE INTO archive_changes
+            SELECT id_historique FROM historique_proprietaires WHERE id_vehicule = new.id_vehicule;
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS archive_proprietaire_au AFTER UPDATE ON proprietaire BEGIN
+            INSERT OR IGNORE INTO archive_changes
+            SELECT id_historique FROM historique_proprietaires WHERE id_proprietaire = new.id_proprietaire;
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS archive_vehicule_ad AFTER DELETE ON vehicule BEGIN
+            INSERT OR IGNORE INTO archive_changes
+            SELECT id_historique FROM historique_proprietaires WHERE id_vehicule = old.id_vehicule;
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS archive_proprietaire_ad AFTER DELETE ON proprietaire BEGIN
+            INSERT OR IGNORE INTO archive_changes
+            SELECT id_historique FROM historique_proprietaires WHERE id_proprietaire = old.id_proprietaire;
+        END
+    ''')
+    return created
 
-    # Insérer des données d'exemple si les tables sont vides
-    cursor.execute("SELECT COUNT(*) FROM vehicule")
-    if cursor.fetchone()[0] == 0:
-        print("Inserting sample data...")
-        cursor.execute("INSERT INTO vehicule (id_vehicule, immatriculation, marque, modele, annee_fabrication, couleur) VALUES (1, 'AB-123-CD', 'Renault', 'Clio', 2020, 'Bleu')")
-        cursor.execute("INSERT INTO vehicule (id_vehicule, immatriculation, marque, modele, annee_fabrication, couleur) VALUES (2, 'EF-456-GH', 'Peugeot', '308', 2018, 'Gris')")
-        
-        cursor.execute("INSERT INTO proprietaire (id_proprietaire, type_proprietaire, nom, prenom, adresse) VALUES (101, 'PHYSIQUE', 'Dupont', 'Jean', '12 Rue de la Paix')")
-        cursor.execute("INSERT INTO proprietaire (id_proprietaire, type_proprietaire, raison_sociale, siret, adresse) VALUES (102, 'MORALE', 'ABC Corp', '12345678901234', 'Z.I. Sud')")
+# Point de reprise d'une reconstruction complète en cours (une ligne par tâche)
+CHECKPOINT_TABLE_SQL = '''
+    CREATE TABLE IF NOT EXISTS archive_checkpoint (
+        job TEXT PRIMARY KEY,
+        last_id INTEGER NOT NULL,
+        done INTEGER NOT NULL,
+        total INTEGER NOT NULL
+    )
+'''
 
-        cursor.execute("INSERT INTO historique_proprietaires (id_historique, id_vehicule, id_proprietaire, date_debut, date_fin) VALUES (1001, 1, 101, '2020-05-10', '2023-01-15')")
-        cursor.execute("INSERT INTO historique_proprietaires (id_historique, id_vehicule, id_proprietaire, date_debut, date_fin) VALUES (1002, 1, 102, '2023-01-16', NULL)")
-        cursor.execute("INSERT INTO historique_proprietaires (id_historique, id_vehicule, id_proprietaire, date_debut, date_fin) VALUES (1003, 2, 101, '2019-03-20', NULL)")
-        conn.commit()
-    
-    conn.close()
+def rebuild_pending():
+    # True si une reconstruction complète a été interrompue et reste à reprendre
+    with get_db_connection() as conn:
+        conn.execute(CHECKPOINT_TABLE_SQL)
+        return conn.execute("SELECT 1 FROM archive_checkpoint WHERE job = 'rebuild'").fetchone() is not None
 
-# --- Fonction principale pour l'archivage ---
-def archive_data_to_single_table(page: ft.Page):
-    conn = None
-    try:
-        conn = get_db_connection()
+# --- Fonctions principales pour l'archivage ---
+def build_main_archive(progress=None):
+    # Reconstruction complète de main_archive (réparation) ; exécutée sur un thread du pool db_worker.
+    # Les lignes d'historique sont traitées par tranches d'id_historique, une transaction
+    # par tranche : la base n'est verrouillée que le temps d'une tranche, et le point de
+    # reprise (archive_checkpoint) est validé avec elle. Après une interruption,
+    # l'appel suivant reprend à la tranche suivante au lieu de tout recommencer.
+    # progress(lignes traitées, total, lignes/s) est appelé après chaque tranche.
+    with get_db_connection() as conn:
         cursor = conn.cursor()
+        setup_change_capture(conn)
+        cursor.execute(CHECKPOINT_TABLE_SQL)
+        checkpoint = cursor.execute(
+            "SELECT last_id, done, total FROM archive_checkpoint WHERE job = 'rebuild'"
+        ).fetchone()
 
-        # 1. Supprimer la table d'archive existante si elle existe (pour un nettoyage facile)
-        print("Dropping existing main_archive table...")
-        cursor.execute("DROP TABLE IF EXISTS main_archive;")
+        if checkpoint:
+            print("Resuming main_archive rebuild...")
+            last_id, done, total = checkpoint
+        else:
+            # 1. Supprimer la table d'archive existante si elle existe (pour un nettoyage facile)
+            print("Dropping existing main_archive table...")
+            cursor.execute("DROP TABLE IF EXISTS main_archive;")
 
-        # 2. Créer la nouvelle table main_archive
-        print("Creating main_archive table...")
-        cursor.execute('''
-            CREATE TABLE main_archive (
-                id_historique INTEGER PRIMARY KEY,
-                id_vehicule_orig INTEGER NOT NULL,
-                id_proprietaire_orig INTEGER NOT NULL,
-                date_debut TEXT NOT NULL,
-                date_fin TEXT,
-                
-                immatriculation_veh TEXT NOT NULL,
-                marque_veh TEXT NOT NULL,
-                modele_veh TEXT NOT NULL,
-                annee_fabrication_veh INTEGER,
-                couleur_veh TEXT,
-                
-                type_proprietaire_prop TEXT NOT NULL,
-                adresse_prop TEXT,
-                telephone_prop TEXT,
-                email_prop TEXT,
-                nom_prop TEXT,
-                prenom_prop TEXT,
-                date_naissance_prop TEXT,
-                raison_sociale_prop TEXT,
-                siret_prop TEXT,
-                representant_legal_prop TEXT
-            );
-        ''')
+            # 2. Créer la nouvelle table main_archive
+            print("Creating main_archive table...")
+            cursor.execute(ARCHIVE_TABLE_SQL)
 
-        # 3. Insérer les données en joignant les trois tables
-        print("Inserting data into main_archive...")
-        cursor.execute('''
-            INSERT INTO main_archive (
-                id_historique, id_vehicule_orig, id_proprietaire_orig, date_debut, date_fin,
-                immatriculation_veh, marque_veh, modele_veh, annee_fabrication_veh, couleur_veh,
-                type_proprietaire_prop, adresse_prop, telephone_prop, email_prop,
-                nom_prop, prenom_prop, date_naissance_prop,
-                raison_sociale_prop, siret_prop, representant_legal_prop
+            # Les modifications faites pendant la reconstruction seront notées à nouveau
+            # et reprises par la prochaine mise à jour incrémentale
+            cursor.execute("DELETE FROM archive_changes")
+            last_id, total = cursor.execute(
+                "SELECT COALESCE(MIN(id_historique) - 1, 0), COUNT(*) FROM historique_proprietaires"
+            ).fetchone()
+            done = 0
+            cursor.execute(
+                "INSERT INTO archive_checkpoint (job, last_id, done, total) VALUES ('rebuild', ?, 0, ?)",
+                (last_id, total)
             )
-            SELECT
-                hp.id_historique, hp.id_vehicule, hp.id_proprietaire, hp.date_debut, hp.date_fin,
-                v.immatriculation, v.marque, v.modele, v.annee_fabrication, v.couleur,
-                p.type_proprietaire, p.adresse, p.telephone, p.email,
-                p.nom, p.prenom, p.date_naissance,
-                p.raison_sociale, p.siret, p.representant_legal
-            FROM
-                historique_proprietaires hp
-            JOIN
-                vehicule v ON hp.id_vehicule = v.id_vehicule
-            JOIN
-                proprietaire p ON hp.id_proprietaire = p.id_proprietaire;
-        ''')
 
-        conn.commit()
-        print("Data archived successfully.")
+    # 3. Insérer les données en joignant les trois tables, tranche par tranche
+    print("Inserting data into main_archive...")
+    done_at_start = done
+    start = time.perf_counter()
+    while True:
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            # Borne haute de la tranche : ARCHIVE_CHUNK_SIZE lignes plus loin (parcours de la clé primaire)
+            row = cursor.execute('''
+                SELECT id_historique FROM historique_proprietaires
+                WHERE id_historique > ? ORDER BY id_historique LIMIT 1 OFFSET ?
+            ''', (last_id, ARCHIVE_CHUNK_SIZE - 1)).fetchone()
+            if row:
+                upper, processed = row[0], ARCHIVE_CHUNK_SIZE
+            else:
+                upper, processed = cursor.execute(
+                    "SELECT MAX(id_historique), COUNT(*) FROM historique_proprietaires WHERE id_historique > ?",
+                    (last_id,)
+                ).fetchone()
+            if not processed:
+                cursor.execute("DELETE FROM archive_checkpoint WHERE job = 'rebuild'")
+                break
+
+            cursor.execute(
+                ARCHIVE_INSERT_SQL.format(where="WHERE hp.id_historique > ? AND hp.id_historique <= ?"),
+                (last_id, upper)
+            )
+            last_id = upper
+            done += processed
+            total = max(total, done)
+            cursor.execute(
+                "UPDATE archive_checkpoint SET last_id = ?, done = ?, total = ? WHERE job = 'rebuild'",
+                (last_id, done, total)
+            )
+
+        if progress:
+            elapsed = time.perf_counter() - start
+            progress(done, total, (done - done_at_start) / elapsed if elapsed > 0 else 0)
+
+    print("Data archived successfully.")
+    return done
+
+def refresh_main_archive(progress=None):
+    # Mise à jour incrémentale : seules les lignes notées dans archive_changes sont
+    # retirées de main_archive puis réinsérées depuis les tables sources (upsert).
+    # Une ligne d'historique supprimée, ou dont le véhicule ou le propriétaire a été
+    # supprimé, ne passe plus la jointure : elle est retirée sans être réinsérée.
+    # Retourne le nombre de lignes d'historique retraitées.
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        capture_created = setup_change_capture(conn)
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'main_archive'")
+        archive_exists = cursor.fetchone() is not None
+
+    if capture_created or not archive_exists or rebuild_pending():
+        # Modifications antérieures à la capture inconnues, ou reconstruction interrompue :
+        # on (re)part d'une archive complète
+        return build_main_archive(progress)
+
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        changed = cursor.execute("SELECT COUNT(*) FROM archive_changes").fetchone()[0]
+        if changed:
+            print(f"Refreshing {changed} changed history rows...")
+            cursor.execute("DELETE FROM main_archive WHERE id_historique IN (SELECT id_historique FROM archive_changes)")
+            cursor.execute(ARCHIVE_INSERT_SQL.format(
+                where="WHERE hp.id_historique IN (SELECT id_historique FROM archive_changes)"
+            ))
+            cursor.execute("DELETE FROM archive_changes")
+    return changed
+
+def run_exclusive(work, *args):
+    # Exécute work(*args) sous ARCHIVE_LOCK ; refuse (RuntimeError) si une autre tâche d'archivage est en cours
+    if not ARCHIVE_LOCK.acquire(blocking=False):
+        raise RuntimeError("Une tâche d'archivage est déjà en cours, réessayez quand elle sera terminée.")
+    try:
+        return work(*args)
+    finally:
+        ARCHIVE_LOCK.release()
+
+def submit_archive_job(page, work, done, failed, loading=None, buttons=()):
+    # Lance work() en arrière-plan sous ARCHIVE_LOCK ; buttons sont désactivés jusqu'à la fin
+    def finish(callback):
+        def apply(result):
+            for button in buttons:
+                button.disabled = False
+            callback(result)
+        return apply
+
+    for button in buttons:
+        button.disabled = True
+    db_worker.submit(page, lambda: run_exclusive(work), finish(done), finish(failed), loading=loading, handler="archive")
+
+def archive_data_to_single_table(page: ft.Page, loading=None, full_rebuild=False, progress=None, buttons=()):
+    # full_rebuild : DROP + reconstruction complète (réparation) ; sinon mise à jour incrémentale.
+    # progress : voir build_main_archive ; buttons : voir submit_archive_job
+    def done(count):
+        if full_rebuild:
+            message = f"Archive reconstruite : {count} lignes d'historique traitées."
+        else:
+            message = f"Archive mise à jour : {count} lignes d'historique modifiées."
         page.snack_bar = ft.SnackBar(
-            ft.Text("Données archivées dans main_archive avec succès!", color=ft.colors.WHITE),
+            ft.Text(message, color=ft.colors.WHITE),
             bgcolor=ft.colors.GREEN_700
         )
         page.snack_bar.open = True
 
-    except sqlite3.Error as e:
-        print(f"Database error: {e}")
-        if conn:
-            conn.rollback() # Annuler les changements en cas d'erreur
+    def failed(e):
+        if isinstance(e, sqlite3.Error):
+            print(f"Database error: {e}") # Les changements ont été annulés (rollback) par le pool
+            message = f"Erreur d'archivage des données: {e}"
+        elif isinstance(e, RuntimeError):
+            message = str(e) # Tâche déjà en cours (run_exclusive)
+        else:
+            print(f"An unexpected error occurred: {e}")
+            message = f"Erreur inattendue: {e}"
         page.snack_bar = ft.SnackBar(
-            ft.Text(f"Erreur d'archivage des données: {e}", color=ft.colors.WHITE),
+            ft.Text(message, color=ft.colors.WHITE),
             bgcolor=ft.colors.RED_700
         )
         page.snack_bar.open = True
-    except Exception as e:
-        print(f"An unexpected error occurred: {e}")
+
+    # L'archivage tourne en arrière-plan : la fenêtre reste utilisable pendant ce temps
+    work = build_main_archive if full_rebuild else refresh_main_archive
+    submit_archive_job(page, lambda: work(progress), done, failed, loading, buttons)
+
+def export_to_cold_storage(page: ft.Page, loading=None, buttons=()):
+    # Copie main_archive en fichiers colonnes compressés, un par année (voir cold_archive.py)
+    def done(exported):
         page.snack_bar = ft.SnackBar(
-            ft.Text(f"Erreur inattendue: {e}", color=ft.colors.WHITE),
+            ft.Text(f"{sum(exported.values())} lignes exportées dans '{COLD_DIRECTORY}' ({len(exported)} années).",
+                    color=ft.colors.WHITE),
+            bgcolor=ft.colors.GREEN_700
+        )
+        page.snack_bar.open = True
+
+    def failed(e):
+        print(f"Cold storage export error: {e}")
+        page.snack_bar = ft.SnackBar(
+            ft.Text(f"Erreur d'export vers le stockage froid: {e}", color=ft.colors.WHITE),
             bgcolor=ft.colors.RED_700
         )
         page.snack_bar.open = True
-    finally:
-        if conn:
-            conn.close()
-    page.update()
+
+    submit_archive_job(page, lambda: export_cold_archive(DB_FILE), done, failed, loading, buttons)
 
 # --- Fonction Flet principale ---
 def main(page: ft.Page):
     page.title = "Application d'Archivage de Données"
+    ui_profile.attach(page)  # FLETAPP_UI_PROFILE=1 : coût du rendu par gestionnaire
     page.vertical_alignment = ft.MainAxisAlignment.CENTER
     page.horizontal_alignment = ft.CrossAxisAlignment.CENTER
 
     # Assurez-vous que les tables originales existent et ont des données pour le test
     setup_initial_tables()
 
-    page.add(
-        ft.Text("Cliquez sur le bouton pour archiver les données dans une seule table."),
+    loading_ring = ft.ProgressRing(visible=False)
+    progress_bar = ft.ProgressBar(value=0, width=400, visible=False)
+    progress_text = ft.Text("")
+
+    if rebuild_pending():
+        progress_text.value = "Reconstruction interrompue : cliquez sur un bouton pour la reprendre."
+
+    def update_progress(done, total, rate):
+        remaining = max(total - done, 0)
+        eta = remaining / rate if rate else 0
+        progress_bar.visible = True
+        progress_bar.value = done / total if total else 1
+        progress_text.value = f"{done} / {total} lignes - {rate:.0f} lignes/s - fin dans ~{eta:.0f} s"
+
+    def show_progress(done, total, rate):
+        # Appelé depuis le thread de l'archivage après chaque tranche validée :
+        # l'affichage est mis à jour sur la boucle de la page
+        db_worker.post(page, update_progress, done, total, rate)
+
+    # Les trois boutons sont désactivés pendant qu'une tâche tourne (pas de second clic)
+    buttons = [
         ft.ElevatedButton(
             "Archiver toutes les données",
             icon=ft.icons.ARCHIVE,
-            on_click=lambda e: archive_data_to_single_table(page)
+            on_click=lambda e: archive_data_to_single_table(page, loading_ring, progress=show_progress, buttons=buttons)
         ),
+        ft.TextButton(
+            "Reconstruire l'archive complète",
+            icon=ft.icons.BUILD,
+            tooltip="Supprime et recalcule main_archive (réparation)",
+            on_click=lambda e: archive_data_to_single_table(page, loading_ring, full_rebuild=True, progress=show_progress, buttons=buttons)
+        ),
+        ft.TextButton(
+            "Exporter vers le stockage froid",
+            icon=ft.icons.AC_UNIT,
+            tooltip=f"Fichiers colonnes compressés par année dans '{COLD_DIRECTORY}'",
+            on_click=lambda e: export_to_cold_storage(page, loading_ring, buttons=buttons)
+        ),
+    ]
+
+    page.add(
+        ft.Text("Cliquez sur le bouton pour archiver les données dans une seule table."),
+        *buttons,
+        loading_ring,
+        progress_bar,
+        progress_text,
         ft.Text("Vérifiez votre base de données 'dossiers.db' pour la table 'main_archive'.")
     )
 
-ft.app(target=main)
\ No newline at end of file
+if __name__ == "__main__":
+    ft.app(target=main)
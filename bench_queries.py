@@ -0,0 +1,266 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import sqlite3
+import statistics
+import sys
+import time
+from datetime import datetime
+
+import cars_queries
+import database
+import setup_initial_tables
+from archive_app import ARCHIVE_CHUNK_SIZE, ARCHIVE_INSERT_SQL, ARCHIVE_TABLE_SQL
+from current_owner import create_current_owner_table
+from db_pool import close_all, get_reader, get_writer, writer
+from generate_data import NOMS, PRENOMS, Generator, generate_dossiers, generate_vehicles
+from migrations import migrate
+
+# Banc d'essai des requêtes de production : chaque requête est exécutée par sa vraie
+# fonction (mêmes fonctions que check_query_plans.py) sur des bases générées par
+# generate_data.py, de 10 000 à 10 millions de dossiers / véhicules.
+# Paramètres tirés au hasard dans les données (graine fixe) : plaques, noms, pages...
+# Résultat par requête : latences p50 / p95 / p99 (ms) et lignes/s, enregistrés en JSON.
+# Avec --baseline, compare à un résultat précédent : code de sortie 1 si le p95 d'une
+# requête a augmenté de plus de --threshold (20 % par défaut).
+#
+# Les bases sont générées une fois dans --data-dir puis réutilisées (les supprimer
+# après une modification de generate_data.py ou du schéma).
+#
+# Usage : python bench_queries.py [--sizes 10k 1M 10M] [--repeat 200]
+#         [--output bench.json] [--baseline ancien.json] [--threshold 0.2]
+
+SIZES = {'10k': 10000, '1M': 1000000, '10M': 10000000}
+REPEAT = 200
+WARMUP = 5
+THRESHOLD = 0.2
+# Écart absolu sous lequel une hausse du p95 n'est pas une régression (bruit de mesure)
+NOISE_FLOOR_MS = 0.05
+# Répétitions de l'archivage (une tranche de ARCHIVE_CHUNK_SIZE lignes par exécution)
+ARCHIVE_REPEAT = 20
+
+
+def build_database(db_file, rows, seed):
+    # Schéma complet (dossiers, véhicules, propriétaires actuels, migrations) puis données
+    with writer(db_file) as conn:
+        database.create_schema(conn)
+        with contextlib.redirect_stdout(io.StringIO()):
+            setup_initial_tables.create_tables(conn.cursor())
+        create_current_owner_table(conn)
+        conn.execute(ARCHIVE_TABLE_SQL)
+        migrate(conn)
+    generator = Generator(seed)
+    generate_dossiers(db_file, generator, rows)
+    generate_vehicles(db_file, generator, rows, max(rows * 6 // 10, 1))
+
+
+def database_for(data_dir, label, seed):
+    db_file = os.path.join(data_dir, f"bench_{label}.db")
+    if not os.path.exists(db_file):
+        print(f"Génération de {db_file}...")
+        os.makedirs(data_dir, exist_ok=True)
+        build_database(db_file, SIZES[label], seed)
+    return db_file
+
+
+def row_count(result):
+    # Lignes retournées par un appel : liste, ligne unique ou (lignes, total)
+    if result is None:
+        return 0
+    if isinstance(result, sqlite3.Row):
+        return 1
+    if isinstance(result, tuple) and len(result) == 2 and isinstance(result[0], list):
+        return len(result[0])
+    if isinstance(result, (list, tuple)):
+        return len(result)
+    return 1
+
+
+class Samples:
+    # Paramètres tirés dans la base avant les mesures (hors chronométrage)
+    def __init__(self, conn, rng, count=64):
+        def ids(table, column):
+            high = conn.execute(f"SELECT MAX({column}) FROM {table}").fetchone()[0] or 1
+            return [rng.randint(1, high) for _ in range(count)]
+
+        self.rng = rng
+        self.vehicle_ids = ids('vehicule', 'id_vehicule')
+        self.owner_ids = ids('proprietaire', 'id_proprietaire')
+        self.history_ids = ids('historique_proprietaires', 'id_historique')
+        self.plates = [
+            row[0] for vehicle_id in self.vehicle_ids
+            for row in conn.execute("SELECT immatriculation FROM vehicule WHERE id_vehicule >= ? LIMIT 1", (vehicle_id,))
+        ]
+        self.page_keys = [
+            (row['created_at'], row['id']) for dossier_id in ids('dossiers', 'id')
+            for row in conn.execute("SELECT created_at, id FROM dossiers WHERE id >= ? LIMIT 1", (dossier_id,))
+        ]
+        self.names = [rng.choice(NOMS) for _ in range(count)]
+        self.first_names = [rng.choice(PRENOMS) for _ in range(count)]
+
+    def pick(self, values):
+        return self.rng.choice(values)
+
+
+def production_cases(db_file, samples):
+    # (nom, appel) : écrans dossiers (list_dossier.py), véhicules (list_cars.py), archivage
+    conn = get_reader(db_file)
+    pick = samples.pick
+
+    def search_match():
+        return database.fts_match_expression(pick(samples.names))
+
+    def next_search_page():
+        # Page suivante d'une recherche : clé de la dernière ligne de la première page
+        match = search_match()
+        first = database.fetch_dossiers_page(conn, match, "first")
+        if not first:
+            return first
+        return database.fetch_dossiers_page(conn, match, "next", database.page_key(first[-1]))
+
+    def vehicle_details():
+        # show_vehicle_details : véhicule et historique en une requête
+        vehicule, historique = cars_queries.fetch_vehicle_details(conn, pick(samples.vehicle_ids))
+        return [vehicule] + historique
+
+    def owner_details():
+        # show_owner_details : propriétaire et véhicules possédés en une requête
+        proprietaire, vehicules = cars_queries.fetch_owner_details(conn, pick(samples.owner_ids))
+        return [proprietaire] + vehicules
+
+    return [
+        ('search_dossiers', lambda: database.search_dossiers(pick(samples.names))),
+        ('count_matches', lambda: [database.count_matches(conn, search_match())]),
+        ('fetch_dossiers_page first', lambda: database.fetch_dossiers_page(conn, None, "first")),
+        ('fetch_dossiers_page next', lambda: database.fetch_dossiers_page(conn, None, "next", pick(samples.page_keys))),
+        ('fetch_dossiers_page previous', lambda: database.fetch_dossiers_page(conn, None, "previous", pick(samples.page_keys))),
+        ('fetch_dossiers_page last', lambda: database.fetch_dossiers_page(conn, None, "last")),
+        ('fetch_dossiers_page first (recherche)', lambda: database.fetch_dossiers_page(conn, search_match(), "first")),
+        ('fetch_dossiers_page next (recherche)', next_search_page),
+        ('fetch_dossier', lambda: database.fetch_dossier(conn, pick(samples.page_keys)[1])),
+        ('find_exact_plate', lambda: [cars_queries.find_exact_plate(conn, pick(samples.plates).lower())]),
+        ('search_vehicles_and_owners (nom)', lambda: cars_queries.search_vehicles_and_owners(conn, pick(samples.names)[:4])),
+        ('search_vehicles_and_owners (prénom)', lambda: cars_queries.search_vehicles_and_owners(conn, pick(samples.first_names))),
+        ('search_vehicles_and_owners (marque)', lambda: cars_queries.search_vehicles_and_owners(conn, 'Peu')),
+        ('search_vehicles_and_owners (plaque)', lambda: cars_queries.search_vehicles_and_owners(conn, pick(samples.plates)[3:8])),
+        ('show_vehicle_details', vehicle_details),
+        ('show_owner_details', owner_details),
+    ]
+
+
+def measure(call, repeat=REPEAT, warmup=WARMUP):
+    # Latences (ms) et lignes/s sur repeat exécutions, après warmup exécutions non comptées
+    for _ in range(warmup):
+        call()
+    timings = []
+    rows = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        rows += row_count(call())
+        timings.append(time.perf_counter() - start)
+    return summarize(timings, rows)
+
+
+def measure_archive(db_file, samples, repeat=ARCHIVE_REPEAT):
+    # INSERT ... SELECT de build_main_archive, une tranche à partir d'un id tiré au hasard ;
+    # annulé après chaque mesure pour laisser main_archive vide
+    conn = get_writer(db_file)
+    timings = []
+    rows = 0
+    for i in range(repeat + 1):
+        low = samples.pick(samples.history_ids) - 1
+        start = time.perf_counter()
+        inserted = conn.execute(
+            ARCHIVE_INSERT_SQL.format(where="WHERE hp.id_historique > ? AND hp.id_historique <= ?"),
+            (low, low + ARCHIVE_CHUNK_SIZE)
+        ).rowcount
+        elapsed = time.perf_counter() - start
+        conn.rollback()
+        if i:  # Première exécution : préchauffage du cache
+            timings.append(elapsed)
+            rows += inserted
+    return summarize(timings, rows)
+
+
+def summarize(timings, rows):
+    cuts = statistics.quantiles(timings, n=100, method='inclusive')
+    return {
+        'runs': len(timings),
+        'p50_ms': round(cuts[49] * 1000, 4),
+        'p95_ms': round(cuts[94] * 1000, 4),
+        'p99_ms': round(cuts[98] * 1000, 4),
+        'rows': rows,
+        'rows_per_s': round(rows / sum(timings), 1) if sum(timings) else 0,
+    }
+
+
+def run(sizes, data_dir, seed, repeat):
+    results = {}
+    for label in sizes:
+        db_file = database_for(data_dir, label, seed)
+        database.DATABASE_NAME = db_file  # database.search_dossiers lit cette base
+        samples = Samples(get_reader(db_file), random.Random(seed))
+        results[label] = {}
+        print(f"\n--- {label} ({db_file}) ---")
+        print(f"{'requête':45} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'lignes/s':>12}")
+        measures = [(name, lambda call=call: measure(call, repeat)) for name, call in production_cases(db_file, samples)]
+        measures.append(('archive INSERT ... SELECT', lambda: measure_archive(db_file, samples)))
+        for name, run_measure in measures:
+            stats = results[label][name] = run_measure()
+            print(f"{name:45} {stats['p50_ms']:9.3f} {stats['p95_ms']:9.3f} {stats['p99_ms']:9.3f} {stats['rows_per_s']:12.0f}")
+        close_all()
+    return results
+
+
+def regressions(results, baseline, threshold=THRESHOLD):
+    # [(taille, requête, p95 de référence, p95 mesuré)] dont le p95 a augmenté de plus de threshold
+    found = []
+    for label, cases in results.items():
+        for name, stats in cases.items():
+            before = baseline.get('results', {}).get(label, {}).get(name)
+            if before is None:
+                continue
+            limit = before['p95_ms'] * (1 + threshold)
+            if stats['p95_ms'] > limit and stats['p95_ms'] - before['p95_ms'] > NOISE_FLOOR_MS:
+                found.append((label, name, before['p95_ms'], stats['p95_ms']))
+    return found
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Banc d'essai des requêtes de production")
+    parser.add_argument("--sizes", nargs='+', choices=list(SIZES), default=list(SIZES))
+    parser.add_argument("--data-dir", default="bench_data")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeat", type=int, default=REPEAT)
+    parser.add_argument("--output", default=f"bench_{datetime.now():%Y%m%d_%H%M%S}.json")
+    parser.add_argument("--baseline", help="résultat JSON d'un passage précédent")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD, help="hausse du p95 tolérée (0.2 = 20 %%)")
+    args = parser.parse_args()
+
+    results = run(args.sizes, args.data_dir, args.seed, args.repeat)
+    report = {
+        'date': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'sqlite': sqlite3.sqlite_version,
+        'machine': platform.platform(),
+        'seed': args.seed,
+        'repeat': args.repeat,
+        'results': results,
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\nRésultats enregistrés dans '{args.output}'.")
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        found = regressions(results, baseline, args.threshold)
+        for label, name, before, after in found:
+            print(f"RÉGRESSION {label} {name} : p95 {before:.3f} ms -> {after:.3f} ms")
+        if found:
+            sys.exit(1)
+        print(f"Aucune régression au-delà de {args.threshold:.0%} par rapport à '{args.baseline}'.")
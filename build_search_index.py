@@ -0,0 +1,15 @@
+import sys
+
+import database
+
+# Reconstruit l'index plein texte (dossiers_fts) d'une base existante.
+# Usage : python build_search_index.py [chemin/vers/dossiers.db]
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        database.DATABASE_NAME = sys.argv[1]
+
+    with database.get_db_writer() as conn:
+        database.rebuild_fts_index(conn)
+        count = conn.execute("SELECT COUNT(*) FROM dossiers").fetchone()[0]
+    print(f"Index plein texte reconstruit pour {count} dossiers dans '{database.DATABASE_NAME}'.")
@@ -0,0 +1,74 @@
+# Requêtes SQLite de l'écran véhicules / propriétaires (list_cars.py).
+# Fonctions pures (connexion en paramètre, pas de Flet) : exécutables sur un
+# thread du pool db_worker et réutilisables hors de l'interface.
+
+from detail_queries import OWNER_DETAILS_SQL, VEHICLE_DETAILS_SQL, decode_history
+from plate_index import plate_match_expression
+from search_keys import prefix_range
+
+
+def find_exact_plate(conn, plate):
+    # Identifiant du véhicule dont l'immatriculation correspond exactement, ou None
+    row = conn.execute(
+        "SELECT id_vehicule FROM vehicule WHERE UPPER(immatriculation) = UPPER(?)", (plate,)
+    ).fetchone()
+    return row["id_vehicule"] if row else None
+
+
+def search_vehicles_and_owners(conn, query):
+    # Recherche large : véhicules (immatriculation, marque, modèle) et propriétaires
+    # dont une de ces colonnes commence par la saisie, sans tenir compte des accents
+    # ni de la casse. Chaque condition est un intervalle sur un index (voir search_keys.py).
+    # Pour l'immatriculation, un fragment d'au moins 3 caractères est cherché n'importe
+    # où dans la plaque, par l'index trigrammes (voir plate_index.py).
+    bounds = prefix_range(query)
+    if bounds is None:
+        return []
+    params = dict(zip(('low', 'high'), bounds))
+    plate_match = plate_match_expression(query)
+    if plate_match:
+        plate_filter = "SELECT rowid FROM vehicule_plates_fts WHERE vehicule_plates_fts MATCH :plate"
+        params['plate'] = plate_match
+    else:
+        plate_filter = "SELECT id_vehicule FROM vehicule WHERE UPPER(immatriculation) >= :low AND UPPER(immatriculation) < :high"
+    # IN (... UNION ...) plutôt que des OR : chaque branche garde son index
+    cursor = conn.execute(f"""
+        SELECT 'VEHICULE' as type, id_vehicule as id, immatriculation as libelle
+        FROM vehicule
+        WHERE id_vehicule IN (
+            {plate_filter}
+            UNION SELECT id_vehicule FROM vehicule WHERE marque_cle >= :low AND marque_cle < :high
+            UNION SELECT id_vehicule FROM vehicule WHERE modele_cle >= :low AND modele_cle < :high
+        )
+        UNION ALL
+        SELECT 'PROPRIETAIRE' as type, id_proprietaire as id,
+               CASE
+                 WHEN type_proprietaire = 'PHYSIQUE' THEN nom || ' ' || prenom
+                 ELSE raison_sociale
+               END as libelle
+        FROM proprietaire
+        WHERE (type_proprietaire = 'PHYSIQUE' AND ((nom_cle >= :low AND nom_cle < :high)
+                                                   OR (prenom_cle >= :low AND prenom_cle < :high)))
+           OR (type_proprietaire = 'MORALE' AND raison_sociale_cle >= :low AND raison_sociale_cle < :high)
+        ORDER BY type, libelle
+    """, params)
+    return [tuple(row) for row in cursor.fetchall()]
+
+
+def fetch_vehicle_details(conn, vehicle_id):
+    # Véhicule, propriétaire actuel (vehicule_current_owner, tenue à jour par
+    # current_owner.py) et historique des propriétaires en une seule requête :
+    # (ligne ou None, [dict] du plus récent au plus ancien)
+    row = conn.execute(VEHICLE_DETAILS_SQL['sqlite'], {'id': vehicle_id}).fetchone()
+    if row is None:
+        return None, []
+    return row, decode_history(row["historique"])
+
+
+def fetch_owner_details(conn, owner_id):
+    # Propriétaire et véhicules possédés (actuellement ou par le passé) en une
+    # seule requête : (ligne ou None, [dict] du plus récent au plus ancien)
+    row = conn.execute(OWNER_DETAILS_SQL['sqlite'], {'id': owner_id}).fetchone()
+    if row is None:
+        return None, []
+    return row, decode_history(row["vehicules"])
@@ -0,0 +1,203 @@
+import contextlib
+import io
+import os
+import re
+import sys
+import tempfile
+
+import archive_app
+import cars_queries
+import database
+import main
+import setup_initial_tables
+from current_owner import create_current_owner_table, rollover_current_owners
+from db_pool import close_all, get_writer, writer
+from export_dossiers import iter_dossiers
+from migrations import LATEST_VERSIONS, format_versions, migrate
+
+# Vérifie, par EXPLAIN QUERY PLAN, que les requêtes de production passent par un index.
+# Le schéma complet (dossiers + véhicules, migrations comprises) est créé dans une base
+# temporaire ; chaque requête est exécutée par sa vraie fonction, les instructions
+# envoyées à SQLite sont relevées puis expliquées avec les mêmes paramètres.
+# Base presque vide et sans ANALYZE : le planificateur décide sur la forme des requêtes
+# et les index disponibles, comme sur une base de production non analysée.
+#
+# Chaque requête de production est aussi un test pytest nommé (tests/test_query_plans.py,
+# exécuté par la CI), qui échoue seul ; ce script affiche le rapport complet.
+#
+# Usage : python check_query_plans.py [-v]   (code de sortie 1 si une table est parcourue en entier)
+
+# Parcours complets acceptés : fonction -> (table parcourue, raison)
+KNOWN_SCANS = {
+    'iter_dossiers': ('dossiers', "export complet, dans l'ordre de l'index de pagination"),
+    'build_main_archive': ('historique_proprietaires', "comptage de l'historique pour la progression, une fois par reconstruction"),
+    'refresh_main_archive': ('archive_changes', "lecture de la liste des lignes à retraiter, vidée à chaque mise à jour"),
+}
+
+# Tables de service lues en entier à la mise en place (catalogue, une ligne par schéma)
+SERVICE_TABLES = ('sqlite_master', 'schema_versions')
+
+# "SCAN table" ou "SCAN table USING [COVERING] INDEX ..." : toutes les lignes de la table ou
+# de l'index sont lues. Un parcours d'index n'est accepté que si la requête a un LIMIT
+# (lecture dans l'ordre de l'index, arrêtée après une page).
+FULL_SCAN = re.compile(r'^SCAN (\w+)(?: AS \w+)?( USING (?:COVERING )?INDEX \w+)?$')
+
+
+class RecordingConnection:
+    # Enveloppe d'une connexion : note chaque (sql, paramètres) passé à execute().
+    # Sert aussi de curseur (fetchone(), description... lisent le dernier résultat)
+    def __init__(self, conn):
+        self._conn = conn
+        self._cursor = None
+        self.statements = []
+
+    def execute(self, sql, params=()):
+        self.statements.append((sql, params))
+        self._cursor = self._conn.execute(sql, params)
+        return self._cursor
+
+    def cursor(self):
+        return self
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+@contextlib.contextmanager
+def archive_connection(conn):
+    # archive_app ouvre ses connexions par get_db_connection() : conn les remplace
+    # le temps de l'appel (messages de progression masqués)
+    previous = archive_app.get_db_connection
+    archive_app.get_db_connection = lambda: contextlib.nullcontext(conn)
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            yield
+    finally:
+        archive_app.get_db_connection = previous
+
+
+def build_archive(conn):
+    with archive_connection(conn):
+        return archive_app.build_main_archive()
+
+
+def refresh_archive(conn):
+    # Archive construite puis un propriétaire modifié : seule la mise à jour incrémentale est relevée
+    with archive_connection(conn):
+        archive_app.build_main_archive()
+        conn.execute("UPDATE proprietaire SET telephone = '0102030405' WHERE id_proprietaire = 101")
+        conn.statements.clear()
+        return archive_app.refresh_main_archive()
+
+
+def create_full_schema(db_file):
+    main.SQL_DIALECT = "sqlite"  # Plans vérifiés sur le remplaçant SQLite, quel que soit FLETAPP_DB_BACKEND
+    with writer(db_file) as conn:
+        database.create_schema(conn)
+    setup_initial_tables.DB_FILE = db_file
+    with contextlib.redirect_stdout(io.StringIO()):
+        setup_initial_tables.insert_example_data()
+    with writer(db_file) as conn:
+        create_current_owner_table(conn)
+        versions = migrate(conn)
+    if versions != LATEST_VERSIONS:
+        raise RuntimeError(f"Migrations incomplètes : {format_versions(versions)}")
+
+
+def production_queries(conn):
+    # (nom, appel) : les requêtes lancées par les écrans et les outils
+    match = database.fts_match_expression("dupont")
+    key = ('2024-01-01 00:00:00', 5)
+    calls = [
+        ('find_exact_plate', lambda: cars_queries.find_exact_plate(conn, 'ab-123-cd')),
+        ('search_vehicles_and_owners', lambda: cars_queries.search_vehicles_and_owners(conn, 'Hélè')),
+        ('search_vehicles_and_owners (plaque)', lambda: cars_queries.search_vehicles_and_owners(conn, 'ab')),
+        ('fetch_vehicle_details', lambda: cars_queries.fetch_vehicle_details(conn, 1)),
+        ('fetch_owner_details', lambda: cars_queries.fetch_owner_details(conn, 101)),
+        ('fetch_dossier', lambda: database.fetch_dossier(conn, 1)),
+        ('count_dossiers', lambda: database.count_dossiers(conn)),
+        ('count_matches', lambda: database.count_matches(conn, match)),
+        ('iter_dossiers', lambda: list(iter_dossiers(conn))),
+        ('iter_dossiers (recherche)', lambda: list(iter_dossiers(conn, "dupont"))),
+        ('rollover_current_owners', lambda: rollover_current_owners(conn, force=True)),
+        # main.py (écran Oracle), rejoué sur le remplaçant SQLite
+        ('main.fetch_search_results', lambda: main.fetch_search_results(conn, 'Hélè')),
+        ('main.fetch_search_results (plaque)', lambda: main.fetch_search_results(conn, 'ab')),
+        ('main.fetch_vehicle_details', lambda: main.fetch_vehicle_details(conn, 1)),
+        ('main.fetch_owner_details', lambda: main.fetch_owner_details(conn, 101)),
+        # archive_app.py : tranches de la reconstruction (borne LIMIT 1 OFFSET ?, INSERT...SELECT)
+        # et mise à jour incrémentale
+        ('build_main_archive', lambda: build_archive(conn)),
+        ('refresh_main_archive', lambda: refresh_archive(conn)),
+    ]
+    for direction in ('first', 'next', 'previous', 'current', 'last'):
+        calls.append((f'fetch_dossiers_page {direction}',
+                      lambda d=direction: database.fetch_dossiers_page(conn, None, d, key)))
+        calls.append((f'fetch_dossiers_page {direction} (recherche)',
+                      lambda d=direction: database.fetch_dossiers_page(conn, match, d, (-1.0, 5))))
+    return calls
+
+
+def full_scans(conn, sql, params):
+    # Tables (ou alias) parcourues en entier ; les sous-requêtes "(subquery-N)" et les
+    # tables virtuelles FTS5 ("... VIRTUAL TABLE INDEX") ne correspondent pas à FULL_SCAN
+    plan = [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params)]
+    limited = re.search(r'\bLIMIT\b', sql, re.IGNORECASE) is not None
+    scans = [
+        m.group(1) for m in map(FULL_SCAN.match, plan)
+        if m and not (m.group(2) and limited) and m.group(1) not in SERVICE_TABLES
+    ]
+    return scans, plan
+
+
+def query_names():
+    # Noms des requêtes de production (les appels ne sont pas exécutés)
+    return [name for name, _ in production_queries(None)]
+
+
+def check_query(conn, name):
+    # Rejoue la requête name sur son propre enregistreur ; retourne, pour chaque
+    # instruction envoyée à SQLite, (statut, tables parcourues en entier non acceptées, plan)
+    recorder = RecordingConnection(conn)
+    dict(production_queries(recorder))[name]()
+    base_name = name.split(' ')[0]
+    results = []
+    for sql, params in recorder.statements:
+        scans, plan = full_scans(conn, sql, params)
+        known_table, reason = KNOWN_SCANS.get(base_name, (None, None))
+        if scans and set(scans) == {known_table}:
+            results.append((f"accepté ({reason})", [], plan))
+        elif scans:
+            results.append((f"PARCOURS COMPLET : {', '.join(scans)}", scans, plan))
+        else:
+            results.append(("ok", [], plan))
+    return results
+
+
+def check(db_file, verbose=False):
+    # Retourne la liste des (requête, tables parcourues en entier) non acceptées.
+    # Connexion d'écriture : le passage quotidien des propriétaires actuels écrit aussi.
+    failures = []
+    conn = get_writer(db_file)
+    for name in query_names():
+        for status, scans, plan in check_query(conn, name):
+            if scans:
+                failures.append((name, scans))
+            print(f"{name:45} {status}")
+            if verbose or scans:
+                for line in plan:
+                    print(f"    {line}")
+    return failures
+
+
+if __name__ == "__main__":
+    verbose = '-v' in sys.argv[1:]
+    with tempfile.TemporaryDirectory() as directory:
+        db_file = os.path.join(directory, 'plans.db')
+        create_full_schema(db_file)
+        failures = check(db_file, verbose)
+        close_all()
+    if failures:
+        print(f"\n{len(failures)} requête(s) sans index.")
+        sys.exit(1)
+    print("\nToutes les requêtes de production utilisent un index.")
@@ -0,0 +1,339 @@
+import argparse
+import json
+import mmap
+import os
+import struct
+import zlib
+from itertools import islice
+
+from db_pool import get_reader, writer
+
+# Stockage froid de main_archive : un fichier par année de date_debut, colonne par colonne.
+#
+# Format d'un fichier (main_archive_<année>.col) :
+#   MAGIC | groupes de lignes | index JSON | longueur de l'index (uint32, little-endian) | MAGIC
+# Les lignes sont rangées par groupes d'au plus ROW_GROUP_SIZE ; chaque groupe a un bloc
+# par colonne, compressé avec zlib (liste JSON des valeurs). L'index donne pour chaque
+# groupe son nombre de lignes, ses dates extrêmes et la position / taille de ses blocs.
+# Il est écrit en fin de fichier, une fois les groupes écrits : l'export n'a jamais plus
+# d'un groupe en mémoire. Le lecteur projette le fichier en mémoire (mmap) et ne
+# décompresse, groupe par groupe, que les colonnes demandées ; les années hors de la
+# plage demandée ne sont pas ouvertes.
+#
+# Usage : python cold_archive.py export [--dossier archive_cold] [--avant 2023] [--purger]
+#         python cold_archive.py proprietaires AB-123-CD [--de 2019] [--a 2024]
+
+DB_FILE = 'dossiers.db'
+COLD_DIRECTORY = 'archive_cold'
+MAGIC = b'FCOL2\n'
+COMPRESSION_LEVEL = 6
+ROW_GROUP_SIZE = 65536
+FETCH_SIZE = 10000
+IN_CHUNK_SIZE = 500  # Identifiants par requête "IN (...)" (limite de paramètres SQLite)
+
+ARCHIVE_COLUMNS = (
+    'id_historique', 'id_vehicule_orig', 'id_proprietaire_orig', 'date_debut', 'date_fin',
+    'immatriculation_veh', 'marque_veh', 'modele_veh', 'annee_fabrication_veh', 'couleur_veh',
+    'type_proprietaire_prop', 'adresse_prop', 'telephone_prop', 'email_prop',
+    'nom_prop', 'prenom_prop', 'date_naissance_prop',
+    'raison_sociale_prop', 'siret_prop', 'representant_legal_prop',
+)
+ID_INDEX = ARCHIVE_COLUMNS.index('id_historique')
+DATE_INDEX = ARCHIVE_COLUMNS.index('date_debut')
+
+
+def partition_path(directory, year):
+    return os.path.join(directory, f"main_archive_{year}.col")
+
+
+class PartitionWriter:
+    # Écriture en continu d'une partition : append() prend une ligne (tuple dans l'ordre
+    # d'ARCHIVE_COLUMNS), chaque groupe est compressé et écrit dès qu'il est plein.
+    # Fichier temporaire renommé à la sortie du "with" : jamais de partition à moitié
+    # écrite ; en cas d'exception, le fichier temporaire est supprimé.
+    def __init__(self, path, year, row_group_size=ROW_GROUP_SIZE):
+        self.path = path
+        self.year = year
+        self.row_group_size = row_group_size
+        self.rows = 0
+        self._tmp_path = path + '.tmp'
+        self._file = open(self._tmp_path, 'wb')
+        self._file.write(MAGIC)
+        self._row_groups = []
+        self._pending = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self._file.close()
+            os.remove(self._tmp_path)
+
+    def append(self, row):
+        self._pending.append(row)
+        if len(self._pending) >= self.row_group_size:
+            self._flush()
+
+    def _flush(self):
+        if not self._pending:
+            return
+        columns = {}
+        for name, values in zip(ARCHIVE_COLUMNS, zip(*self._pending)):
+            block = zlib.compress(json.dumps(values, ensure_ascii=False).encode('utf-8'), COMPRESSION_LEVEL)
+            columns[name] = {"offset": self._file.tell(), "length": len(block)}
+            self._file.write(block)
+        dates = [row[DATE_INDEX] for row in self._pending]
+        self._row_groups.append({
+            "rows": len(self._pending),
+            "date_min": min(dates),
+            "date_max": max(dates),
+            "columns": columns,
+        })
+        self.rows += len(self._pending)
+        self._pending = []
+
+    def close(self):
+        self._flush()
+        groups = self._row_groups
+        index = json.dumps({
+            "year": self.year,
+            "rows": self.rows,
+            "date_min": min(group["date_min"] for group in groups) if groups else None,
+            "date_max": max(group["date_max"] for group in groups) if groups else None,
+            "row_groups": groups,
+        }).encode('utf-8')
+        self._file.write(index)
+        self._file.write(struct.pack('<I', len(index)))
+        self._file.write(MAGIC)
+        self._file.close()
+        os.replace(self._tmp_path, self.path)
+
+
+def export_cold_archive(db_file=DB_FILE, directory=COLD_DIRECTORY, before_year=None, purge=False, progress=None):
+    # Écrit main_archive en fichiers colonnes par année de date_debut (années < before_year
+    # si précisé). Une partition déjà exportée est fusionnée : ses lignes sont reprises,
+    # sauf celles dont l'id_historique est encore dans main_archive (la version de la base,
+    # rafraîchie par refresh_main_archive, remplace celle du fichier).
+    # purge : supprime ensuite de main_archive les lignes relues identiques dans le
+    # fichier écrit (voir purge_partition). progress(année, lignes) est appelé après
+    # chaque partition. Retourne {année: lignes de la partition}.
+    # Une reconstruction complète de main_archive (archive_app) réinsère les lignes purgées.
+    os.makedirs(directory, exist_ok=True)
+    with writer(db_file) as conn:
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_main_archive_date_debut ON main_archive(date_debut)")
+    conn = get_reader(db_file)
+
+    years = [int(row[0]) for row in conn.execute(
+        "SELECT DISTINCT substr(date_debut, 1, 4) FROM main_archive ORDER BY 1"
+    )]
+    if before_year is not None:
+        years = [year for year in years if year < before_year]
+
+    exported = {}
+    for year in years:
+        bounds = (f"{year:04d}-01-01", f"{year + 1:04d}-01-01")
+        cursor = conn.execute(f'''
+            SELECT {', '.join(ARCHIVE_COLUMNS)} FROM main_archive
+            WHERE date_debut >= ? AND date_debut < ?
+            ORDER BY date_debut, id_historique
+        ''', bounds)
+        path = partition_path(directory, year)
+        with PartitionWriter(path, year) as partition:
+            if os.path.exists(path):
+                previous = ColdPartition(path)
+                try:
+                    for rows in _chunks(previous.iter_rows(), IN_CHUNK_SIZE):
+                        in_database = _ids_in_main_archive(conn, [row[ID_INDEX] for row in rows])
+                        for row in rows:
+                            if row[ID_INDEX] not in in_database:
+                                partition.append(row)
+                finally:
+                    # Fermée avant le remplacement du fichier par le nouveau
+                    previous.close()
+            while True:
+                rows = cursor.fetchmany(FETCH_SIZE)
+                if not rows:
+                    break
+                for row in rows:
+                    partition.append(tuple(row))
+        exported[year] = partition.rows
+
+        if purge:
+            purge_partition(db_file, path)
+        if progress:
+            progress(year, exported[year])
+    return exported
+
+
+def purge_partition(db_file, path):
+    # Supprime de main_archive les lignes présentes dans la partition path, relue sur
+    # disque : seule une ligne identique (toutes colonnes) à celle du fichier est
+    # supprimée. Une ligne modifiée entre-temps reste dans la base et sera fusionnée au
+    # prochain export. Retourne le nombre de lignes supprimées.
+    # id_historique = ? en premier : recherche par clé primaire, puis comparaison des colonnes
+    condition = ' AND '.join(f"{name} = ?" if name == 'id_historique' else f"{name} IS ?" for name in ARCHIVE_COLUMNS)
+    partition = ColdPartition(path)
+    deleted = 0
+    try:
+        for rows in _chunks(partition.iter_rows(), FETCH_SIZE):
+            with writer(db_file) as conn:
+                before = conn.total_changes
+                conn.executemany(f"DELETE FROM main_archive WHERE {condition}", rows)
+                deleted += conn.total_changes - before
+    finally:
+        partition.close()
+    return deleted
+
+
+def _ids_in_main_archive(conn, ids):
+    placeholders = ', '.join('?' for _ in ids)
+    return {row[0] for row in conn.execute(
+        f"SELECT id_historique FROM main_archive WHERE id_historique IN ({placeholders})", ids
+    )}
+
+
+def _chunks(rows, size):
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+class ColdPartition:
+    # Un fichier de partition projeté en mémoire ; les blocs sont décompressés à la demande,
+    # un groupe de lignes à la fois
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'rb')
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            if self._map[:len(MAGIC)] == MAGIC and self._map[-len(MAGIC):] == MAGIC:
+                index_end = len(self._map) - len(MAGIC) - 4
+                index_length = struct.unpack_from('<I', self._map, index_end)[0]
+                self.header = json.loads(self._map[index_end - index_length:index_end])
+            else:
+                raise ValueError(f"Fichier d'archive invalide : {path}")
+        except Exception:
+            self.close()
+            raise
+
+    @property
+    def year(self):
+        return self.header["year"]
+
+    @property
+    def rows(self):
+        return self.header["rows"]
+
+    @property
+    def row_groups(self):
+        return self.header["row_groups"]
+
+    def column(self, group, name):
+        # Valeurs de la colonne name dans le groupe de lignes group (élément de row_groups)
+        info = group["columns"][name]
+        start = info["offset"]
+        return json.loads(zlib.decompress(self._map[start:start + info["length"]]))
+
+    def iter_rows(self, columns=ARCHIVE_COLUMNS):
+        # Générateur de tuples (dans l'ordre de columns), un groupe décompressé à la fois
+        for group in self.row_groups:
+            yield from zip(*(self.column(group, name) for name in columns))
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+
+class ColdArchive:
+    # Lecture du stockage froid : élagage des colonnes (seules celles demandées ou
+    # filtrées sont décompressées) et des partitions (années hors plage ignorées)
+    def __init__(self, directory=COLD_DIRECTORY):
+        self.directory = directory
+        self._partitions = {}
+        if os.path.isdir(directory):
+            for name in os.listdir(directory):
+                if name.startswith('main_archive_') and name.endswith('.col'):
+                    self._partitions[int(name[len('main_archive_'):-len('.col')])] = None
+
+    @property
+    def years(self):
+        return sorted(self._partitions)
+
+    def _partition(self, year):
+        if self._partitions[year] is None:
+            self._partitions[year] = ColdPartition(partition_path(self.directory, year))
+        return self._partitions[year]
+
+    def scan(self, columns, filters=None, year_from=None, year_to=None):
+        # Générateur de dicts {colonne: valeur} ; filters : {colonne: valeur attendue}
+        filters = filters or {}
+        for year in self.years:
+            if year_from is not None and year < year_from or year_to is not None and year > year_to:
+                continue
+            partition = self._partition(year)
+            for group in partition.row_groups:
+                # Les colonnes filtrées d'abord : si aucune ligne du groupe ne correspond,
+                # le reste du groupe n'est pas décompressé
+                selected = range(group["rows"])
+                for name, expected in filters.items():
+                    values = partition.column(group, name)
+                    selected = [i for i in selected if values[i] == expected]
+                    if not selected:
+                        break
+                if not selected:
+                    continue
+                data = {name: partition.column(group, name) for name in columns}
+                for i in selected:
+                    yield {name: data[name][i] for name in columns}
+
+    def ownership_history(self, immatriculation, year_from=None, year_to=None):
+        # Propriétaires successifs d'un véhicule, du plus ancien au plus récent
+        rows = self.scan(
+            ('date_debut', 'date_fin', 'type_proprietaire_prop', 'nom_prop', 'prenom_prop', 'raison_sociale_prop'),
+            {'immatriculation_veh': immatriculation}, year_from, year_to
+        )
+        return sorted(rows, key=lambda row: row['date_debut'])
+
+    def vehicles_of_owner(self, id_proprietaire, year_from=None, year_to=None):
+        rows = self.scan(
+            ('immatriculation_veh', 'marque_veh', 'modele_veh', 'date_debut', 'date_fin'),
+            {'id_proprietaire_orig': id_proprietaire}, year_from, year_to
+        )
+        return sorted(rows, key=lambda row: row['date_debut'])
+
+    def close(self):
+        for partition in self._partitions.values():
+            if partition is not None:
+                partition.close()
+        self._partitions = dict.fromkeys(self._partitions)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stockage froid de main_archive (fichiers colonnes par année)")
+    parser.add_argument("--dossier", default=COLD_DIRECTORY)
+    parser.add_argument("--db", default=DB_FILE)
+    commands = parser.add_subparsers(dest="commande", required=True)
+    export_parser = commands.add_parser("export")
+    export_parser.add_argument("--avant", type=int, help="n'exporter que les années antérieures")
+    export_parser.add_argument("--purger", action="store_true", help="supprimer de main_archive les lignes exportées")
+    owners_parser = commands.add_parser("proprietaires")
+    owners_parser.add_argument("immatriculation")
+    owners_parser.add_argument("--de", type=int)
+    owners_parser.add_argument("--a", type=int)
+    args = parser.parse_args()
+
+    if args.commande == "export":
+        export_cold_archive(args.db, args.dossier, args.avant, args.purger,
+                            progress=lambda year, rows: print(f"{year} : {rows} lignes"))
+    else:
+        archive = ColdArchive(args.dossier)
+        for row in archive.ownership_history(args.immatriculation, args.de, args.a):
+            owner = row['raison_sociale_prop'] or f"{row['nom_prop']} {row['prenom_prop']}"
+            print(f"{row['date_debut']} -> {row['date_fin'] or 'présent'} : {owner}")
+        archive.close()
@@ -0,0 +1,142 @@
+import sys
+from datetime import datetime, timedelta
+
+from db_pool import writer
+
+# Propriétaire actuel de chaque véhicule, matérialisé dans vehicule_current_owner.
+# Les triggers sur historique_proprietaires et proprietaire la tiennent à jour à chaque
+# écriture ; rollover_current_owners() traite une fois par jour les périodes dont la
+# date_fin vient d'être atteinte (aucune écriture ne les signale).
+# L'en-tête du détail d'un véhicule devient une lecture par clé primaire.
+#
+# Usage (tâche planifiée quotidienne) : python current_owner.py [cars.db]
+# Équivalent Oracle (triggers + job DBMS_SCHEDULER) : current_owner_oracle.sql
+
+DB_NAME = "cars.db"
+
+OWNER_NAME_SQL = """
+    CASE
+      WHEN {p}.type_proprietaire = 'PHYSIQUE' THEN {p}.nom || ' ' || {p}.prenom
+      ELSE {p}.raison_sociale
+    END
+"""
+
+# Recalcul de la ligne d'un véhicule : période en cours la plus récente, ou aucune ligne.
+# {vehicle} : new.id_vehicule / old.id_vehicule dans un trigger, ? sinon
+DELETE_SQL = "DELETE FROM vehicule_current_owner WHERE id_vehicule = {vehicle}"
+INSERT_SQL = """
+    INSERT INTO vehicule_current_owner (id_vehicule, id_proprietaire, proprietaire_actuel, date_debut, date_fin)
+    SELECT hp.id_vehicule, hp.id_proprietaire, {owner_name}, hp.date_debut, hp.date_fin
+    FROM historique_proprietaires hp
+    JOIN proprietaire p ON hp.id_proprietaire = p.id_proprietaire
+    WHERE hp.id_vehicule = {vehicle}
+      AND (hp.date_fin IS NULL OR hp.date_fin > CURRENT_DATE)
+    ORDER BY hp.date_debut DESC
+    LIMIT 1
+"""
+
+
+def refresh_statements(vehicle):
+    return (DELETE_SQL.format(vehicle=vehicle),
+            INSERT_SQL.format(vehicle=vehicle, owner_name=OWNER_NAME_SQL.format(p='p')))
+
+
+def refresh_sql(vehicle):
+    # Corps de trigger : les deux requêtes, terminées par ";"
+    return ''.join(f"{statement};\n" for statement in refresh_statements(vehicle))
+
+
+def create_current_owner_table(conn):
+    # Table, index et triggers ; remplie entièrement si elle vient d'être créée.
+    cursor = conn.cursor()
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'vehicule_current_owner'")
+    created = cursor.fetchone() is None
+
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS vehicule_current_owner (
+            id_vehicule INTEGER PRIMARY KEY REFERENCES vehicule(id_vehicule),
+            id_proprietaire INTEGER NOT NULL,
+            proprietaire_actuel TEXT,
+            date_debut TEXT NOT NULL,
+            date_fin TEXT
+        )
+    ''')
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_current_owner_proprietaire ON vehicule_current_owner(id_proprietaire)")
+    # Jour du dernier passage de rollover_current_owners()
+    cursor.execute("CREATE TABLE IF NOT EXISTS current_owner_rollover (id INTEGER PRIMARY KEY CHECK (id = 1), day TEXT NOT NULL)")
+
+    triggers = (
+        f'''CREATE TRIGGER IF NOT EXISTS current_owner_hp_ai AFTER INSERT ON historique_proprietaires BEGIN
+            {refresh_sql('new.id_vehicule')}
+        END''',
+        f'''CREATE TRIGGER IF NOT EXISTS current_owner_hp_au AFTER UPDATE ON historique_proprietaires BEGIN
+            {refresh_sql('old.id_vehicule')}
+            {refresh_sql('new.id_vehicule')}
+        END''',
+        f'''CREATE TRIGGER IF NOT EXISTS current_owner_hp_ad AFTER DELETE ON historique_proprietaires BEGIN
+            {refresh_sql('old.id_vehicule')}
+        END''',
+        f'''CREATE TRIGGER IF NOT EXISTS current_owner_prop_au AFTER UPDATE ON proprietaire BEGIN
+            UPDATE vehicule_current_owner
+            SET proprietaire_actuel = {OWNER_NAME_SQL.format(p='new')}
+            WHERE id_proprietaire = new.id_proprietaire;
+        END''',
+    )
+    for trigger in triggers:
+        cursor.execute(trigger)
+
+    if created:
+        fill_current_owner_table(conn)
+    return created
+
+
+def fill_current_owner_table(conn):
+    # Recalcul complet (création de la table, après un chargement massif sans triggers)
+    cursor = conn.cursor()
+    cursor.execute("DELETE FROM vehicule_current_owner")
+    cursor.execute(f'''
+        INSERT INTO vehicule_current_owner (id_vehicule, id_proprietaire, proprietaire_actuel, date_debut, date_fin)
+        SELECT id_vehicule, id_proprietaire, proprietaire_actuel, date_debut, date_fin FROM (
+            SELECT hp.id_vehicule, hp.id_proprietaire, {OWNER_NAME_SQL.format(p='p')} AS proprietaire_actuel,
+                   hp.date_debut, hp.date_fin,
+                   ROW_NUMBER() OVER (PARTITION BY hp.id_vehicule ORDER BY hp.date_debut DESC) AS rang
+            FROM historique_proprietaires hp
+            JOIN proprietaire p ON hp.id_proprietaire = p.id_proprietaire
+            WHERE hp.date_fin IS NULL OR hp.date_fin > CURRENT_DATE
+        )
+        WHERE rang = 1
+    ''')
+    cursor.execute("INSERT OR REPLACE INTO current_owner_rollover (id, day) VALUES (1, CURRENT_DATE)")
+
+
+def rollover_current_owners(conn, force=False):
+    # Recalcule les véhicules dont la période en cours a pris fin (date_fin atteinte).
+    # Sans force, ne fait rien si le passage du jour a déjà eu lieu.
+    # Retourne le nombre de véhicules recalculés.
+    today = conn.execute("SELECT CURRENT_DATE").fetchone()[0]
+    last = conn.execute("SELECT day FROM current_owner_rollover WHERE id = 1").fetchone()
+    if last and last[0] >= today and not force:
+        return 0
+
+    expired = [row[0] for row in conn.execute(
+        "SELECT id_vehicule FROM vehicule_current_owner WHERE date_fin IS NOT NULL AND date_fin <= CURRENT_DATE"
+    )]
+    for vehicle_id in expired:
+        for statement in refresh_statements('?'):
+            conn.execute(statement, (vehicle_id,))
+    conn.execute("INSERT OR REPLACE INTO current_owner_rollover (id, day) VALUES (1, CURRENT_DATE)")
+    return len(expired)
+
+
+def seconds_until_next_day():
+    # Délai avant le prochain passage quotidien (juste après minuit UTC, comme CURRENT_DATE)
+    now = datetime.utcnow()
+    return (datetime.combine(now.date() + timedelta(days=1), datetime.min.time()) - now).total_seconds() + 60
+
+
+if __name__ == "__main__":
+    db_file = sys.argv[1] if len(sys.argv) > 1 else DB_NAME
+    with writer(db_file) as conn:
+        create_current_owner_table(conn)
+        count = rollover_current_owners(conn, force=True)
+    print(f"Propriétaires actuels recalculés pour {count} véhicules dans '{db_file}'.")
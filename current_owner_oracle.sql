@@ -0,0 +1,113 @@
+-- Propriétaire actuel de chaque véhicule, matérialisé (équivalent Oracle de current_owner.py).
+-- Tenue à jour par triggers sur HISTORIQUE_PROPRIETAIRES et PROPRIETAIRE ; un job
+-- DBMS_SCHEDULER recalcule chaque nuit les périodes dont la date_fin vient d'être atteinte.
+-- Lu par fetch_vehicle_details (main.py) : une lecture par clé primaire.
+
+CREATE TABLE vehicule_current_owner (
+    id_vehicule         NUMBER PRIMARY KEY REFERENCES vehicule(id_vehicule),
+    id_proprietaire     NUMBER NOT NULL,
+    proprietaire_actuel VARCHAR2(400),
+    date_debut          DATE NOT NULL,
+    date_fin            DATE
+);
+
+CREATE INDEX idx_current_owner_proprietaire ON vehicule_current_owner(id_proprietaire);
+
+-- Recalcul de la ligne d'un véhicule : période en cours la plus récente, ou aucune ligne
+CREATE OR REPLACE PROCEDURE refresh_current_owner(p_id_vehicule IN NUMBER) AS
+BEGIN
+    DELETE FROM vehicule_current_owner WHERE id_vehicule = p_id_vehicule;
+    INSERT INTO vehicule_current_owner (id_vehicule, id_proprietaire, proprietaire_actuel, date_debut, date_fin)
+    SELECT id_vehicule, id_proprietaire, proprietaire_actuel, date_debut, date_fin FROM (
+        SELECT hp.id_vehicule, hp.id_proprietaire,
+               CASE
+                 WHEN p.type_proprietaire = 'PHYSIQUE' THEN p.nom || ' ' || p.prenom
+                 ELSE p.raison_sociale
+               END AS proprietaire_actuel,
+               hp.date_debut, hp.date_fin
+        FROM historique_proprietaires hp
+        JOIN proprietaire p ON hp.id_proprietaire = p.id_proprietaire
+        WHERE hp.id_vehicule = p_id_vehicule
+          AND (hp.date_fin IS NULL OR hp.date_fin > SYSDATE)
+        ORDER BY hp.date_debut DESC
+    )
+    WHERE ROWNUM = 1;
+END;
+/
+
+-- Trigger composé : les véhicules touchés sont collectés ligne par ligne puis recalculés
+-- après l'instruction (pas de lecture de la table en mutation)
+CREATE OR REPLACE TRIGGER trg_vco_historique
+FOR INSERT OR UPDATE OR DELETE ON historique_proprietaires
+COMPOUND TRIGGER
+    TYPE t_ids IS TABLE OF NUMBER INDEX BY PLS_INTEGER;
+    v_ids t_ids;
+
+    AFTER EACH ROW IS
+    BEGIN
+        IF :OLD.id_vehicule IS NOT NULL THEN
+            v_ids(:OLD.id_vehicule) := :OLD.id_vehicule;
+        END IF;
+        IF :NEW.id_vehicule IS NOT NULL THEN
+            v_ids(:NEW.id_vehicule) := :NEW.id_vehicule;
+        END IF;
+    END AFTER EACH ROW;
+
+    AFTER STATEMENT IS
+        v_id PLS_INTEGER;
+    BEGIN
+        v_id := v_ids.FIRST;
+        WHILE v_id IS NOT NULL LOOP
+            refresh_current_owner(v_id);
+            v_id := v_ids.NEXT(v_id);
+        END LOOP;
+        v_ids.DELETE;
+    END AFTER STATEMENT;
+END trg_vco_historique;
+/
+
+-- Changement de nom / raison sociale : le libellé dénormalisé suit
+CREATE OR REPLACE TRIGGER trg_vco_proprietaire
+AFTER UPDATE OF nom, prenom, raison_sociale, type_proprietaire ON proprietaire
+FOR EACH ROW
+BEGIN
+    UPDATE vehicule_current_owner
+    SET proprietaire_actuel = CASE
+                                WHEN :NEW.type_proprietaire = 'PHYSIQUE' THEN :NEW.nom || ' ' || :NEW.prenom
+                                ELSE :NEW.raison_sociale
+                              END
+    WHERE id_proprietaire = :NEW.id_proprietaire;
+END;
+/
+
+-- Passage quotidien : véhicules dont la période en cours a pris fin
+CREATE OR REPLACE PROCEDURE rollover_current_owners AS
+BEGIN
+    FOR r IN (SELECT id_vehicule FROM vehicule_current_owner
+              WHERE date_fin IS NOT NULL AND date_fin <= SYSDATE) LOOP
+        refresh_current_owner(r.id_vehicule);
+    END LOOP;
+    COMMIT;
+END;
+/
+
+BEGIN
+    DBMS_SCHEDULER.CREATE_JOB(
+        job_name        => 'JOB_ROLLOVER_CURRENT_OWNERS',
+        job_type        => 'STORED_PROCEDURE',
+        job_action      => 'ROLLOVER_CURRENT_OWNERS',
+        start_date      => TRUNC(SYSTIMESTAMP) + INTERVAL '1' DAY + INTERVAL '1' MINUTE,
+        repeat_interval => 'FREQ=DAILY;BYHOUR=0;BYMINUTE=1',
+        enabled         => TRUE
+    );
+END;
+/
+
+-- Remplissage initial
+BEGIN
+    FOR r IN (SELECT DISTINCT id_vehicule FROM historique_proprietaires) LOOP
+        refresh_current_owner(r.id_vehicule);
+    END LOOP;
+    COMMIT;
+END;
+/
@@ -1,15 +1,40 @@
 import sqlite3
 import os
+import re
+
+from db_pool import get_reader, writer
+from migrations import migrate
 
 DATABASE_NAME = 'dossiers.db'
 
+# Colonnes d'un dossier, dans l'ordre attendu par l'interface
+DOSSIER_COLUMNS = ('id', 'numero', 'date', 'personne', 'objet', 'numero_reference', 'date_debut', 'date_fin', 'observation')
+
+# Colonnes affichées dans l'en-tête des cartes : seules colonnes lues par les listes,
+# le reste (observation...) est chargé par fetch_dossier() à l'ouverture des détails
+LIST_COLUMNS = ('id', 'numero', 'personne', 'objet')
+
+# Colonnes indexées en plein texte (miroir de la table dossiers)
+FTS_COLUMNS = ('numero', 'personne', 'objet', 'numero_reference', 'observation')
+
+# Au-delà, le nombre de résultats d'une recherche n'est plus compté ("1000+")
+COUNT_CAP = 1000
+
 def get_db_connection():
-    conn = sqlite3.connect(DATABASE_NAME)
-    conn.row_factory = sqlite3.Row  # Permet d'accéder aux colonnes par leur nom
-    return conn
+    # Connexion de lecture du thread courant, ouverte une seule fois par le pool
+    return get_reader(DATABASE_NAME)
+
+def get_db_writer():
+    # Connexion d'écriture unique (à utiliser avec "with get_db_writer() as conn:")
+    return writer(DATABASE_NAME)
 
 def create_table():
-    conn = get_db_connection()
+    with get_db_writer() as conn:
+        create_schema(conn)
+
+def create_schema(conn, repair_bulk_load=True):
+    # repair_bulk_load : termine un import massif interrompu sans end_bulk_load()
+    # (processus tué) ; import_dossiers le désactive pour reprendre son propre import
     cursor = conn.cursor()
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS dossiers (
@@ -26,69 +51,275 @@ def create_table():
         )
     ''')
     conn.commit()
-    conn.close()
+    create_fts_index(conn)
+    create_pagination_index(conn)
+    create_counter_table(conn)
+    migrate(conn)
+    conn.commit()
+    if repair_bulk_load and bulk_load_in_progress(conn):
+        print("Import massif interrompu : rétablissement des triggers, de l'index et des compteurs...")
+        end_bulk_load(conn)
 
-def insert_sample_data():
-    conn = get_db_connection()
+def create_pagination_index(conn):
+    # Index couvrant l'ordre d'affichage (created_at, id) utilisé par la pagination par curseur
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_dossiers_created_at_id ON dossiers(created_at, id)")
+    conn.commit()
+
+def create_counter_table(conn):
+    # Nombre de lignes de chaque table, tenu à jour par triggers :
+    # le total affiché par la pagination ne demande plus de COUNT(*) sur toute la table
     cursor = conn.cursor()
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS row_counts (
+            table_name TEXT PRIMARY KEY,
+            total INTEGER NOT NULL
+        )
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS dossiers_count_ai AFTER INSERT ON dossiers BEGIN
+            UPDATE row_counts SET total = total + 1 WHERE table_name = 'dossiers';
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS dossiers_count_ad AFTER DELETE ON dossiers BEGIN
+            UPDATE row_counts SET total = total - 1 WHERE table_name = 'dossiers';
+        END
+    ''')
+    # Comptage complet une seule fois, à la création du compteur
+    cursor.execute('''
+        INSERT OR IGNORE INTO row_counts (table_name, total)
+        SELECT 'dossiers', COUNT(*) FROM dossiers
+    ''')
+    conn.commit()
 
-    # Vérifier si la table est vide pour ne pas insérer plusieurs fois
-    cursor.execute("SELECT COUNT(*) FROM dossiers")
-    if cursor.fetchone()[0] == 0:
-        dossiers_data = [
-            ("D001", "2023-01-15", "Jean Dupont", "Demande d'information", "REF001", "2023-01-10", "2023-01-20", "Dossier traité."),
-            ("D002", "2023-02-20", "Marie Curie", "Réclamation produit", "REF002", "2023-02-15", "2023-02-25", "En attente de réponse."),
-            ("D003", "2023-03-10", "Pierre Dubois", "Suivi de commande", None, "2023-03-05", "2023-03-15", "Commande expédiée."),
-            ("D004", "2023-04-01", "Sophie Martin", "Demande de devis", "REF003", "2023-03-28", "2023-04-05", "Devis envoyé."),
-            ("D005", "2023-05-05", "Jean Dupont", "Nouveau projet X", "PROJX", "2023-05-01", "2023-05-30", "Réunion planifiée."),
-            ("D006", "2023-06-12", "Alice Smith", "Mise à jour coordonnées", None, "2023-06-10", "2023-06-15", "Coordonnées mises à jour."),
-            ("D007", "2023-07-01", "Bob Johnson", "Incident technique", "INC001", "2023-06-25", "2023-07-05", "En cours de résolution."),
-            ("D008", "2023-08-18", "Marie Curie", "Question sur facture", "FAC005", "2023-08-10", "2023-08-20", "Facture clarifiée."),
-            ("D009", "2023-09-22", "Pierre Dubois", "Validation document", "DOC010", "2023-09-15", "2023-09-25", "Document validé."),
-            ("D010", "2023-10-30", "Sophie Martin", "Feedback produit Y", "PRDY", "2023-10-25", "2023-11-05", "Feedback enregistré."),
-            ("D011", "2023-11-11", "Alice Smith", "Demande de support", "SUP007", "2023-11-08", "2023-11-15", "Ticket ouvert."),
-            ("D012", "2023-12-05", "Bob Johnson", "Proposition commerciale", "PROP003", "2023-12-01", "2023-12-10", "En attente de réponse."),
-            ("D013", "2024-01-20", "Jean Dupont", "Renouvellement contrat", "CONTR12", "2024-01-15", "2024-01-25", "Contrat en cours de signature."),
-            ("D014", "2024-02-14", "Marie Curie", "Mise à jour données", None, "2024-02-10", "2024-02-20", "Données actualisées."),
-            ("D015", "2024-03-25", "Pierre Dubois", "Projet Z finalisation", "PROJZ", "2024-03-20", "2024-03-30", "Projet terminé."),
-        ]
-        cursor.executemany('''
-            INSERT INTO dossiers (numero, date, personne, objet, numero_reference, date_debut, date_fin, observation)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        ''', dossiers_data)
-        conn.commit()
-    conn.close()
+def count_dossiers(conn):
+    # Nombre total de dossiers, lu dans row_counts (une ligne, par clé primaire)
+    return conn.execute("SELECT total FROM row_counts WHERE table_name = 'dossiers'").fetchone()[0]
 
-def search_dossiers(query, page=1, page_size=10):
-    conn = get_db_connection()
+def count_matches(conn, match, cap=COUNT_CAP):
+    # Nombre de résultats d'une recherche FTS5, compté jusqu'à cap + 1 au plus :
+    # une valeur supérieure à cap signifie "plus de cap résultats"
+    return conn.execute('''
+        SELECT COUNT(*) FROM (
+            SELECT 1 FROM dossiers_fts WHERE dossiers_fts MATCH ? LIMIT ?
+        )
+    ''', (match, cap + 1)).fetchone()[0]
+
+def count_results(conn, match=None):
+    # Total affiché par la pagination : exact sans recherche, plafonné avec
+    if match:
+        return count_matches(conn, match)
+    return count_dossiers(conn)
+
+def create_fts_index(conn):
+    # Table FTS5 miroir de dossiers, synchronisée par triggers.
+    # Si elle n'existait pas encore, elle est remplie avec les dossiers existants.
     cursor = conn.cursor()
-    offset = (page - 1) * page_size
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'dossiers_fts'")
+    already_exists = cursor.fetchone() is not None
+
+    columns = ', '.join(FTS_COLUMNS)
+    new_values = ', '.join(f'new.{col}' for col in FTS_COLUMNS)
+    old_values = ', '.join(f'old.{col}' for col in FTS_COLUMNS)
+
+    cursor.execute(f'''
+        CREATE VIRTUAL TABLE IF NOT EXISTS dossiers_fts USING fts5(
+            {columns},
+            content='dossiers',
+            content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2'
+        )
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS dossiers_fts_ai AFTER INSERT ON dossiers BEGIN
+            INSERT INTO dossiers_fts(rowid, {columns}) VALUES (new.id, {new_values});
+        END
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS dossiers_fts_ad AFTER DELETE ON dossiers BEGIN
+            INSERT INTO dossiers_fts(dossiers_fts, rowid, {columns}) VALUES ('delete', old.id, {old_values});
+        END
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS dossiers_fts_au AFTER UPDATE ON dossiers BEGIN
+            INSERT INTO dossiers_fts(dossiers_fts, rowid, {columns}) VALUES ('delete', old.id, {old_values});
+            INSERT INTO dossiers_fts(rowid, {columns}) VALUES (new.id, {new_values});
+        END
+    ''')
+    if not already_exists:
+        cursor.execute("INSERT INTO dossiers_fts(dossiers_fts) VALUES ('rebuild')")
+    conn.commit()
+
+def rebuild_fts_index(conn):
+    # Reconstruit entièrement l'index plein texte à partir de la table dossiers
+    create_fts_index(conn)
+    conn.execute("INSERT INTO dossiers_fts(dossiers_fts) VALUES ('rebuild')")
+    conn.commit()
+
+def bulk_load_in_progress(conn):
+    # True si begin_bulk_load() n'a pas encore été suivi de end_bulk_load()
+    return conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'bulk_load'"
+    ).fetchone() is not None and conn.execute("SELECT 1 FROM bulk_load").fetchone() is not None
+
+def begin_bulk_load(conn):
+    # Avant un chargement massif : retire les triggers FTS / compteur et l'index de
+    # pagination, qui seraient sinon mis à jour ligne par ligne. end_bulk_load() les
+    # rétablit en une passe. Entre les deux, l'index plein texte et row_counts sont
+    # en retard sur la table : ne pas utiliser l'application pendant l'import.
+    # La table bulk_load note le chargement en cours : si le processus meurt avant
+    # end_bulk_load(), le prochain create_schema() fait la réparation.
+    conn.execute("CREATE TABLE IF NOT EXISTS bulk_load (id INTEGER PRIMARY KEY CHECK (id = 1), started_at TEXT DEFAULT CURRENT_TIMESTAMP)")
+    conn.execute("INSERT OR IGNORE INTO bulk_load (id) VALUES (1)")
+    for trigger in ('dossiers_fts_ai', 'dossiers_fts_ad', 'dossiers_fts_au', 'dossiers_count_ai', 'dossiers_count_ad'):
+        conn.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+    conn.execute("DROP INDEX IF EXISTS idx_dossiers_created_at_id")
+    conn.commit()
+
+def end_bulk_load(conn):
+    # Recrée triggers et index, reconstruit l'index plein texte et recompte les dossiers
+    rebuild_fts_index(conn)
+    create_pagination_index(conn)
+    create_counter_table(conn)
+    conn.execute("UPDATE row_counts SET total = (SELECT COUNT(*) FROM dossiers) WHERE table_name = 'dossiers'")
+    conn.execute("DROP TABLE IF EXISTS bulk_load")
+    conn.commit()
 
-    # Construction de la clause WHERE pour la recherche
-    search_term = f'%{query}%'
-    sql_where_clause = '''
-        WHERE numero LIKE ? OR date LIKE ? OR personne LIKE ? OR objet LIKE ? OR numero_reference LIKE ? OR date_debut LIKE ? OR date_fin LIKE ? OR observation LIKE ?
-    '''
+def fts_match_expression(query):
+    # Chaque mot saisi devient un préfixe entre guillemets, ce qui neutralise
+    # la syntaxe FTS5 (AND, OR, NEAR, ...) tapée par l'utilisateur.
+    # Retourne None si la saisie ne contient aucun mot.
+    tokens = re.findall(r'\w+', query or '')
+    if not tokens:
+        return None
+    return ' '.join(f'"{token}"*' for token in tokens)
 
-    # Requête pour les résultats paginés
+def insert_sample_data():
+    with get_db_writer() as conn:
+        cursor = conn.cursor()
+
+        # Vérifier si la table est vide pour ne pas insérer plusieurs fois
+        if count_dossiers(conn) == 0:
+            dossiers_data = [
+                ("D001", "2023-01-15", "Jean Dupont", "Demande d'information", "REF001", "2023-01-10", "2023-01-20", "Dossier traité."),
+                ("D002", "2023-02-20", "Marie Curie", "Réclamation produit", "REF002", "2023-02-15", "2023-02-25", "En attente de réponse."),
+                ("D003", "2023-03-10", "Pierre Dubois", "Suivi de commande", None, "2023-03-05", "2023-03-15", "Commande expédiée."),
+                ("D004", "2023-04-01", "Sophie Martin", "Demande de devis", "REF003", "2023-03-28", "2023-04-05", "Devis envoyé."),
+                ("D005", "2023-05-05", "Jean Dupont", "Nouveau projet X", "PROJX", "2023-05-01", "2023-05-30", "Réunion planifiée."),
+                ("D006", "2023-06-12", "Alice Smith", "Mise à jour coordonnées", None, "2023-06-10", "2023-06-15", "Coordonnées mises à jour."),
+                ("D007", "2023-07-01", "Bob Johnson", "Incident technique", "INC001", "2023-06-25", "2023-07-05", "En cours de résolution."),
+                ("D008", "2023-08-18", "Marie Curie", "Question sur facture", "FAC005", "2023-08-10", "2023-08-20", "Facture clarifiée."),
+                ("D009", "2023-09-22", "Pierre Dubois", "Validation document", "DOC010", "2023-09-15", "2023-09-25", "Document validé."),
+                ("D010", "2023-10-30", "Sophie Martin", "Feedback produit Y", "PRDY", "2023-10-25", "2023-11-05", "Feedback enregistré."),
+                ("D011", "2023-11-11", "Alice Smith", "Demande de support", "SUP007", "2023-11-08", "2023-11-15", "Ticket ouvert."),
+                ("D012", "2023-12-05", "Bob Johnson", "Proposition commerciale", "PROP003", "2023-12-01", "2023-12-10", "En attente de réponse."),
+                ("D013", "2024-01-20", "Jean Dupont", "Renouvellement contrat", "CONTR12", "2024-01-15", "2024-01-25", "Contrat en cours de signature."),
+                ("D014", "2024-02-14", "Marie Curie", "Mise à jour données", None, "2024-02-10", "2024-02-20", "Données actualisées."),
+                ("D015", "2024-03-25", "Pierre Dubois", "Projet Z finalisation", "PROJZ", "2024-03-20", "2024-03-30", "Projet terminé."),
+            ]
+            cursor.executemany('''
+                INSERT INTO dossiers (numero, date, personne, objet, numero_reference, date_debut, date_fin, observation)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ''', dossiers_data)
+
+def search_dossiers(query, page=1, page_size=10):
+    match = fts_match_expression(query)
+    if match is None:
+        return [], 0
+
+    cursor = get_db_connection().cursor()
+    offset = (page - 1) * page_size
+
+    # Requête pour les résultats paginés, classés par pertinence (bm25)
+    columns = ', '.join(f'd.{col}' for col in LIST_COLUMNS)
     cursor.execute(f'''
-        SELECT * FROM dossiers
-        {sql_where_clause}
-        ORDER BY date DESC
+        SELECT {columns} FROM dossiers_fts
+        JOIN dossiers d ON d.id = dossiers_fts.rowid
+        WHERE dossiers_fts MATCH ?
+        ORDER BY bm25(dossiers_fts), d.date DESC
         LIMIT ? OFFSET ?
-    ''', (search_term, search_term, search_term, search_term, search_term, search_term, search_term, search_term, page_size, offset))
+    ''', (match, page_size, offset))
     results = cursor.fetchall()
 
-    # Requête pour le nombre total de résultats (pour la pagination)
-    cursor.execute(f'''
-        SELECT COUNT(*) FROM dossiers
-        {sql_where_clause}
-    ''', (search_term, search_term, search_term, search_term, search_term, search_term, search_term, search_term))
-    total_results = cursor.fetchone()[0]
+    # Nombre de résultats pour la pagination, plafonné à COUNT_CAP + 1 ("1000+")
+    total_results = count_matches(get_db_connection(), match)
 
-    conn.close()
     return results, total_results
 
+def fetch_dossiers_page(conn, match=None, direction="first", key=None, page_size=10, last_page_size=None):
+    # Pagination par curseur (keyset) : au lieu d'un OFFSET, chaque page part
+    # de la clé (sort_key, id) de la page voisine, ce qui coûte O(page_size)
+    # quelle que soit la page demandée.
+    #
+    # - sans recherche, sort_key = created_at, tri décroissant (plus récents d'abord)
+    # - avec recherche (match FTS5), sort_key = bm25, tri croissant (plus pertinents d'abord)
+    #
+    # direction : "first", "next" (après key), "previous" (avant key),
+    # "current" (à partir de key inclus) ou "last" (dernière page, de last_page_size lignes).
+    # Les lignes (LIST_COLUMNS) sont retournées dans l'ordre d'affichage, sort_key en dernière colonne.
+    if match:
+        columns = ', '.join(f'd.{col}' for col in LIST_COLUMNS)
+        source = f"""
+            SELECT * FROM (
+                SELECT {columns}, bm25(dossiers_fts) AS sort_key
+                FROM dossiers_fts
+                JOIN dossiers d ON d.id = dossiers_fts.rowid
+                WHERE dossiers_fts MATCH ?
+            )
+        """
+        params = [match]
+        key_expr = "sort_key"
+        descending = False
+    else:
+        columns = ', '.join(LIST_COLUMNS)
+        source = f"SELECT {columns}, created_at AS sort_key FROM dossiers"
+        params = []
+        key_expr = "created_at"
+        descending = True
+
+    forward_op, backward_op = ("<", ">") if descending else (">", "<")
+    forward_order, backward_order = ("DESC", "ASC") if descending else ("ASC", "DESC")
+
+    if direction in ("next", "previous", "current") and key is None:
+        direction = "first"
+
+    where = ""
+    order = forward_order
+    limit = page_size
+    if direction == "next":
+        where = f"WHERE ({key_expr}, id) {forward_op} (?, ?)"
+        params += list(key)
+    elif direction == "current":
+        where = f"WHERE ({key_expr}, id) {forward_op}= (?, ?)"
+        params += list(key)
+    elif direction == "previous":
+        where = f"WHERE ({key_expr}, id) {backward_op} (?, ?)"
+        params += list(key)
+        order = backward_order
+    elif direction == "last":
+        order = backward_order
+        limit = last_page_size or page_size
+
+    cursor = conn.execute(f"""
+        {source}
+        {where}
+        ORDER BY {key_expr} {order}, id {order}
+        LIMIT ?
+    """, params + [limit])
+    rows = cursor.fetchall()
+    if order != forward_order:
+        rows.reverse()
+    return rows
+
+def fetch_dossier(conn, dossier_id):
+    # Dossier complet (DOSSIER_COLUMNS) par sa clé primaire, ou None
+    columns = ', '.join(DOSSIER_COLUMNS)
+    return conn.execute(f"SELECT {columns} FROM dossiers WHERE id = ?", (dossier_id,)).fetchone()
+
+def page_key(row):
+    # Clé de curseur (sort_key, id) d'une ligne retournée par fetch_dossiers_page
+    return (row[-1], row[0])
+
 if __name__ == "__main__":
     create_table()
     insert_sample_data()
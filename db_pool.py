@@ -0,0 +1,101 @@
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+import sql_trace
+
+# Pragmas appliqués une seule fois, à l'ouverture de chaque connexion
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA mmap_size=268435456",   # 256 Mo
+    "PRAGMA cache_size=-65536",     # 64 Mo (valeur négative = en Kio)
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA busy_timeout=5000",
+)
+
+# Une connexion de lecture par thread et par fichier, un seul écrivain par fichier.
+# Les connexions restent ouvertes : plus de connect ni de relecture du schéma à chaque clic.
+_local = threading.local()
+_writers = {}
+_writer_locks = {}
+_registry_lock = threading.Lock()
+_all_connections = []
+_generation = 0
+
+
+def _key(db_file):
+    return os.path.abspath(db_file)
+
+
+def _open(db_file, read_only=False):
+    # Connexion tracée si FLETAPP_SQL_TRACE=1 (voir sql_trace.py)
+    conn = sqlite3.connect(db_file, check_same_thread=False, factory=sql_trace.connection_factory())
+    conn.row_factory = sqlite3.Row  # Permet d'accéder aux colonnes par leur nom
+    for pragma in PRAGMAS:
+        conn.execute(pragma)
+    if read_only:
+        # Les écritures doivent passer par writer() pour rester sérialisées
+        conn.execute("PRAGMA query_only=ON")
+    with _registry_lock:
+        _all_connections.append(conn)
+    return conn
+
+
+def get_reader(db_file):
+    # Connexion de lecture propre au thread appelant
+    readers = getattr(_local, "readers", None)
+    if readers is None or _local.generation != _generation:
+        # Premier appel dans ce thread, ou pool fermé depuis par close_all()
+        readers = _local.readers = {}
+        _local.generation = _generation
+    key = _key(db_file)
+    conn = readers.get(key)
+    if conn is None:
+        conn = readers[key] = _open(db_file, read_only=True)
+    return conn
+
+
+def get_writer(db_file):
+    # Connexion d'écriture unique partagée par tous les threads.
+    # Préférer writer(), qui prend le verrou et gère commit/rollback.
+    key = _key(db_file)
+    with _registry_lock:
+        lock = _writer_locks.setdefault(key, threading.RLock())
+    with lock:
+        conn = _writers.get(key)
+        if conn is None:
+            conn = _writers[key] = _open(db_file)
+    return conn
+
+
+@contextmanager
+def writer(db_file):
+    # Usage :
+    #     with writer(DB_FILE) as conn:
+    #         conn.execute("INSERT ...")
+    # Commit en sortie, rollback si une exception est levée.
+    conn = get_writer(db_file)
+    lock = _writer_locks[_key(db_file)]
+    with lock:
+        try:
+            yield conn
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+
+
+def close_all():
+    # Ferme toutes les connexions ouvertes par le pool (fin de programme, tests)
+    global _generation
+    with _registry_lock:
+        _generation += 1
+        for conn in _all_connections:
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+        _all_connections.clear()
+        _writers.clear()
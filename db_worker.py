@@ -0,0 +1,123 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import partial
+
+import sql_trace
+import ui_profile
+
+# Pool de threads dédié aux requêtes : le thread des événements Flet ne fait plus
+# que soumettre le travail puis appliquer le résultat.
+MAX_WORKERS = 4
+EXECUTOR = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="db-worker")
+# Instructions de la machine virtuelle SQLite entre deux vérifications d'annulation
+PROGRESS_STEPS = 1000
+
+# Nombre de requêtes en cours par indicateur de chargement (un même indicateur
+# peut être partagé par plusieurs requêtes simultanées)
+_in_flight = {}
+_in_flight_lock = threading.Lock()
+
+
+async def run(work, *args):
+    # Exécute work(*args) sur le pool sans bloquer la boucle asyncio appelante.
+    # Utilisable directement dans un gestionnaire Flet "async def".
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(EXECUTOR, partial(work, *args))
+
+
+def submit(page, work, on_done=None, on_error=None, loading=None, handler=None):
+    # Soumet work() au pool depuis un gestionnaire Flet synchrone.
+    # on_done(résultat) ou on_error(exception) sont appelés sur la boucle de la page,
+    # suivis d'un page.update(). loading : contrôle (ProgressBar, ProgressRing...)
+    # rendu visible tant que la requête est en cours.
+    # handler : nom sous lequel les requêtes de work() sont tracées (search, detail, save...)
+    # et l'application du résultat profilée (ui_profile)
+    if handler:
+        work = sql_trace.tagged(handler, work)
+    _track_loading(loading, 1)
+    if loading is not None:
+        page.update()
+    return page.run_task(_run_and_apply, page, work, on_done, on_error, loading, handler)
+
+
+async def _run_and_apply(page, work, on_done, on_error, loading, handler=None):
+    try:
+        result, error = await run(work), None
+    except Exception as e:
+        result, error = None, e
+    except BaseException:
+        # Tâche annulée (page fermée) : l'indicateur est tout de même retiré
+        _track_loading(loading, -1)
+        page.update()
+        raise
+    # Construction des contrôles et envoi au client, mesurés si FLETAPP_UI_PROFILE=1
+    with ui_profile.section(handler or getattr(on_done, "__name__", "submit"), page):
+        try:
+            if error is not None:
+                if on_error:
+                    on_error(error)
+                else:
+                    print("Erreur lors de la requête en arrière-plan:", error)
+            elif on_done:
+                on_done(result)
+        finally:
+            _track_loading(loading, -1)
+            page.update()
+
+
+def post(page, apply, *args):
+    # Applique apply(*args) sur la boucle de la page, suivi d'un page.update().
+    # Pour un travail en cours sur le pool qui doit afficher un état intermédiaire
+    # (progression) : les contrôles ne sont jamais modifiés depuis le thread du pool.
+    return page.run_task(_apply, page, apply, args)
+
+
+async def _apply(page, apply, args):
+    with ui_profile.section(getattr(apply, "__name__", "post"), page):
+        try:
+            apply(*args)
+        finally:
+            page.update()
+
+
+def _track_loading(loading, delta):
+    if loading is None:
+        return
+    with _in_flight_lock:
+        count = _in_flight.get(id(loading), 0) + delta
+        if count > 0:
+            _in_flight[id(loading)] = count
+        else:
+            _in_flight.pop(id(loading), None)
+        loading.visible = count > 0
+
+
+class LatestOnly:
+    # Jeton de génération : seul le résultat de la dernière requête soumise est appliqué,
+    # les réponses plus anciennes arrivées en retard sont ignorées.
+    def __init__(self):
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def next(self):
+        with self._lock:
+            self._generation += 1
+            return self._generation
+
+    def is_current(self, token):
+        return token == self._generation
+
+
+@contextmanager
+def cancel_when_stale(conn, requests, token):
+    # Interrompt la requête SQLite en cours sur conn dès qu'une requête plus récente
+    # a été soumise (requests.next()) : le gestionnaire de progression renvoie True
+    # et SQLite lève OperationalError("interrupted") au lieu de finir le parcours.
+    conn.set_progress_handler(lambda: not requests.is_current(token), PROGRESS_STEPS)
+    try:
+        yield conn
+    finally:
+        # Les connexions de lecture sont réutilisées par le thread : on retire le gestionnaire
+        conn.set_progress_handler(None, PROGRESS_STEPS)
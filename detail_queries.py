@@ -0,0 +1,135 @@
+import json
+from datetime import datetime
+
+try:
+    import oracledb
+except ImportError:  # Seul clob_as_text en a besoin, et seulement sous Oracle
+    oracledb = None
+
+# Fiches véhicule et propriétaire en un seul aller-retour : l'entité et tout son
+# historique dans une seule ligne, l'historique agrégé en tableau JSON par la base
+# (json_group_array sous SQLite, JSON_ARRAYAGG sous Oracle) puis décodé une fois ici.
+# Sous Oracle, chaque requête évitée est un aller-retour réseau de moins.
+#
+# Une requête par dialecte ("sqlite", "oracle"), paramètre nommé :id. La dernière
+# colonne contient le tableau JSON ; les colonnes précédentes sont celles de l'entité.
+
+# (clé JSON, expression SQL) des éléments de chaque historique
+HISTORY_FIELDS = (
+    ('nom_proprietaire', "CASE WHEN p.type_proprietaire = 'PHYSIQUE' THEN p.nom || ' ' || p.prenom ELSE p.raison_sociale END"),
+    ('type_proprietaire', 'p.type_proprietaire'),
+    ('date_debut', 'hp.date_debut'),
+    ('date_fin', 'hp.date_fin'),
+)
+OWNED_VEHICLE_FIELDS = (
+    ('immatriculation', 'v.immatriculation'),
+    ('marque', 'v.marque'),
+    ('modele', 'v.modele'),
+    ('date_debut', 'hp.date_debut'),
+    ('date_fin', 'hp.date_fin'),
+)
+DATE_KEYS = ('date_debut', 'date_fin')
+
+# Colonnes de l'entité, dans l'ordre des tuples de main.py, retrouvées par nom dans la ligne
+# (column_values) : v.* et p.* s'allongent avec le schéma (clés *_cle de search_keys.py).
+# Un tuple de noms désigne le premier présent : l'année est annee dans cars.db,
+# annee_fabrication dans le schéma de setup_initial_tables.
+VEHICLE_COLUMNS = (
+    'id_vehicule', 'immatriculation', 'marque', 'modele', ('annee', 'annee_fabrication'), 'couleur',
+    'proprietaire_actuel', 'date_debut',
+)
+OWNER_COLUMNS = (
+    'id_proprietaire', 'type_proprietaire', 'adresse', 'telephone', 'email',
+    'nom', 'prenom', 'date_naissance', 'raison_sociale', 'siret', 'representant_legal',
+)
+
+
+def json_array_sql(dialect, fields):
+    # Agrégat JSON d'objets {clé: expression}. Oracle : tri à l'agrégation et CLOB
+    # (pas de limite à 4000 octets pour les grandes flottes) ; SQLite avant 3.44 ne
+    # trie pas dans un agrégat, decode_history() retrie.
+    if dialect == 'oracle':
+        pairs = ', '.join(f"'{key}' VALUE {expression}" for key, expression in fields)
+        return f"JSON_ARRAYAGG(JSON_OBJECT({pairs}) ORDER BY hp.date_debut DESC RETURNING CLOB)"
+    pairs = ', '.join(f"'{key}', {expression}" for key, expression in fields)
+    return f"json_group_array(json_object({pairs}))"
+
+
+def vehicle_details_sql(dialect):
+    # Propriétaire actuel, date, v.* puis historique (vehicule_current_owner : voir current_owner.py)
+    return f"""
+        SELECT co.proprietaire_actuel, co.date_debut, v.*,
+               (SELECT {json_array_sql(dialect, HISTORY_FIELDS)}
+                FROM historique_proprietaires hp
+                JOIN proprietaire p ON hp.id_proprietaire = p.id_proprietaire
+                WHERE hp.id_vehicule = v.id_vehicule) AS historique
+        FROM vehicule v
+        LEFT JOIN vehicule_current_owner co ON co.id_vehicule = v.id_vehicule
+        WHERE v.id_vehicule = :id
+    """
+
+
+def owner_details_sql(dialect):
+    # p.* puis véhicules possédés (actuellement ou par le passé)
+    return f"""
+        SELECT p.*,
+               (SELECT {json_array_sql(dialect, OWNED_VEHICLE_FIELDS)}
+                FROM historique_proprietaires hp
+                JOIN vehicule v ON hp.id_vehicule = v.id_vehicule
+                WHERE hp.id_proprietaire = p.id_proprietaire) AS vehicules
+        FROM proprietaire p
+        WHERE p.id_proprietaire = :id
+    """
+
+
+VEHICLE_DETAILS_SQL = {dialect: vehicle_details_sql(dialect) for dialect in ('sqlite', 'oracle')}
+OWNER_DETAILS_SQL = {dialect: owner_details_sql(dialect) for dialect in ('sqlite', 'oracle')}
+
+
+def clob_as_text(cursor, metadata):
+    # outputtypehandler oracledb (voir oracle_pool.create_pool) : les CLOB des tableaux
+    # JSON arrivent en str avec la ligne, au lieu d'un LOB à relire par un appel réseau
+    if oracledb is not None and metadata.type_code is oracledb.DB_TYPE_CLOB:
+        return cursor.var(oracledb.DB_TYPE_LONG, arraysize=cursor.arraysize)
+
+
+def decode_history(value):
+    # Tableau JSON -> [dict], du plus récent au plus ancien. Un CLOB non converti
+    # par le pilote (objet LOB, session hors pool) est lu ici.
+    if value is None:
+        return []
+    if hasattr(value, 'read'):
+        value = value.read()
+    items = json.loads(value)
+    # Dates ISO (Oracle : "2020-05-10T00:00:00", SQLite : "2020-05-10") : tri texte
+    items.sort(key=lambda item: item['date_debut'] or '', reverse=True)
+    return items
+
+
+def column_values(description, row, columns):
+    # Valeurs de row pour columns, par nom d'après cursor.description (sans tenir compte de
+    # la casse : Oracle renvoie les noms en majuscules). Erreur si une colonne manque.
+    positions = {}
+    for i, column in enumerate(description):
+        positions.setdefault(column[0].lower(), i)
+    values = []
+    for names in columns:
+        names = (names,) if isinstance(names, str) else names
+        position = next((positions[name] for name in names if name in positions), None)
+        if position is None:
+            raise KeyError(f"Colonne absente du résultat : {' / '.join(names)}")
+        values.append(row[position])
+    return tuple(values)
+
+
+def parse_date(value):
+    return datetime.strptime(value[:10], "%Y-%m-%d") if value else None
+
+
+def as_rows(items, fields):
+    # [dict] -> [tuple] dans l'ordre de fields, dates converties en datetime
+    # (même forme que les lignes lues directement par oracledb)
+    return [
+        tuple(parse_date(item[key]) if key in DATE_KEYS else item[key] for key, _ in fields)
+        for item in items
+    ]
@@ -0,0 +1,93 @@
+import argparse
+import csv
+import gzip
+import json
+import time
+
+from database import DATABASE_NAME, DOSSIER_COLUMNS, fts_match_expression
+from db_pool import get_reader
+
+# Export des dossiers (tous, ou le résultat d'une recherche) en CSV ou JSONL,
+# compressé en gzip si le nom se termine par .gz.
+# Usage : python export_dossiers.py sortie.csv|sortie.jsonl[.gz] [--recherche "mots"] [--db dossiers.db]
+# Les lignes sont lues par paquets (fetchmany) et écrites au fil de l'eau :
+# la mémoire utilisée ne dépend pas du nombre de dossiers exportés.
+
+CHUNK_SIZE = 5000
+FORMATS = ('.csv', '.jsonl', '.ndjson')
+
+
+def export_format(path):
+    name = path.lower()
+    if name.endswith('.gz'):
+        name = name[:-3]
+    for ext in FORMATS:
+        if name.endswith(ext):
+            return 'csv' if ext == '.csv' else 'jsonl'
+    raise ValueError(f"Format non pris en charge : {path} (attendu : .csv, .jsonl, éventuellement .gz)")
+
+
+def iter_dossiers(conn, query=None, chunk_size=CHUNK_SIZE):
+    # Générateur des dossiers correspondant au même filtre que search_dossiers,
+    # dans l'ordre de l'écran (pertinence pour une recherche, plus récents sinon)
+    match = fts_match_expression(query)
+    if match:
+        columns = ', '.join(f'd.{col}' for col in DOSSIER_COLUMNS)
+        cursor = conn.execute(f'''
+            SELECT {columns} FROM dossiers_fts
+            JOIN dossiers d ON d.id = dossiers_fts.rowid
+            WHERE dossiers_fts MATCH ?
+            ORDER BY bm25(dossiers_fts), d.id
+        ''', (match,))
+    else:
+        cursor = conn.execute(f'''
+            SELECT {', '.join(DOSSIER_COLUMNS)} FROM dossiers
+            ORDER BY created_at DESC, id DESC
+        ''')
+    while True:
+        rows = cursor.fetchmany(chunk_size)
+        if not rows:
+            break
+        yield from rows
+
+
+def print_progress(count, elapsed):
+    rate = count / elapsed if elapsed > 0 else 0
+    print(f"{count} dossiers exportés ({rate:.0f} lignes/s)")
+
+
+def export_dossiers(path, query=None, db_file=DATABASE_NAME, chunk_size=CHUNK_SIZE, progress=None):
+    # Écrit les dossiers dans path ; retourne (nombre de dossiers, durée en secondes)
+    file_format = export_format(path)
+    opener = gzip.open if path.lower().endswith('.gz') else open
+    conn = get_reader(db_file)
+    count = 0
+    start = time.perf_counter()
+
+    with opener(path, 'wt', encoding='utf-8', newline='') as f:
+        if file_format == 'csv':
+            out = csv.writer(f)
+            out.writerow(DOSSIER_COLUMNS)
+        for row in iter_dossiers(conn, query, chunk_size):
+            if file_format == 'csv':
+                out.writerow(tuple(row))
+            else:
+                f.write(json.dumps(dict(zip(DOSSIER_COLUMNS, row)), ensure_ascii=False) + '\n')
+            count += 1
+            if progress and count % chunk_size == 0:
+                progress(count, time.perf_counter() - start)
+
+    return count, time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export des dossiers en CSV ou JSONL (gzip si .gz)")
+    parser.add_argument("sortie")
+    parser.add_argument("--recherche", default="", help="mêmes mots-clés que l'écran de recherche")
+    parser.add_argument("--db", default=DATABASE_NAME)
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    args = parser.parse_args()
+
+    count, elapsed = export_dossiers(args.sortie, args.recherche, args.db, args.chunk_size, print_progress)
+    rate = count / elapsed if elapsed > 0 else 0
+    print(f"Export terminé : {count} dossiers dans '{args.sortie}' en {elapsed:.1f} s ({rate:.0f} lignes/s).")
@@ -0,0 +1,439 @@
+import argparse
+import random
+import time
+from datetime import date, timedelta
+from functools import lru_cache
+from itertools import accumulate, islice
+
+import database
+import setup_initial_tables
+from current_owner import fill_current_owner_table
+from db_pool import writer
+from migrations import migrate, table_exists
+from search_keys import SEARCH_KEY_COLUMNS, fold_text, key_column
+
+# Jeu de données synthétique à l'échelle de la production : dossiers, véhicules,
+# propriétaires et historiques de propriété. Même graine et même date de référence
+# (--date, "aujourd'hui" pour les données) = mêmes données, quel que soit le jour.
+#
+# Usage : python generate_data.py [--db dossiers.db] [--dossiers 1000000]
+#         [--vehicules 1000000] [--proprietaires 600000] [--seed 42] [--date 2025-01-01]
+#
+# - noms et prénoms français, fréquences décroissantes (quelques noms très courants)
+# - plaques SIV (AB-123-CD) et, pour une part des véhicules anciens, FNI (1234 AB 75),
+#   uniques : le numéro de plaque est une permutation de l'identifiant du véhicule
+# - historiques : 1 à 5 propriétaires successifs par véhicule, périodes sans chevauchement
+# - flottes : un particulier a quelques véhicules, certaines sociétés des milliers
+#
+# Chargement massif : triggers et index des tables remplies sont retirés pendant
+# l'insertion (executemany par lots) puis recréés, et les données dérivées
+# (index plein texte, trigrammes, propriétaires actuels, compteurs) recalculées en une passe.
+# Les tables véhicules sont créées au format de dossiers.db si elles n'existent pas.
+
+BATCH_SIZE = 50000
+TABLE_SIZE = 1000
+REFERENCE_DATE = date(2025, 1, 1)
+FIRST_DAY = date(1940, 1, 1)
+
+PRENOMS = (
+    'Jean', 'Marie', 'Pierre', 'Nathalie', 'Michel', 'Isabelle', 'Philippe', 'Sylvie', 'Alain', 'Catherine',
+    'Nicolas', 'Françoise', 'Christophe', 'Sandrine', 'Patrick', 'Valérie', 'Stéphane', 'Christine', 'Laurent',
+    'Céline', 'Thomas', 'Sophie', 'Julien', 'Hélène', 'Frédéric', 'Camille', 'Sébastien', 'Émilie', 'Olivier',
+    'Léa', 'David', 'Chloé', 'Éric', 'Manon', 'Antoine', 'Inès', 'Mathieu', 'Élodie', 'François', 'Clémence',
+    'Jérôme', 'Océane', 'Benoît', 'Zoé', 'Loïc', 'Anaïs', 'Hugo', 'Noémie', 'Théo', 'Maëlle',
+)
+NOMS = (
+    'Martin', 'Bernard', 'Thomas', 'Petit', 'Robert', 'Richard', 'Durand', 'Dubois', 'Moreau', 'Laurent',
+    'Simon', 'Michel', 'Lefèvre', 'Leroy', 'Roux', 'David', 'Bertrand', 'Morel', 'Fournier', 'Girard',
+    'Bonnet', 'Dupont', 'Lambert', 'Fontaine', 'Rousseau', 'Vincent', 'Muller', 'Lefebvre', 'Faure', 'André',
+    'Mercier', 'Blanc', 'Guérin', 'Boyer', 'Garnier', 'Chevalier', 'François', 'Legrand', 'Gauthier', 'Garcia',
+    'Perrin', 'Robin', 'Clément', 'Morin', 'Nicolas', 'Henry', 'Roussel', 'Mathieu', 'Gautier', 'Masson',
+    'Marchand', 'Duval', 'Denis', 'Dumont', 'Marie', 'Lemaire', 'Noël', 'Meyer', 'Dufour', 'Meunier',
+    'Brun', 'Blanchard', 'Giraud', 'Joly', 'Rivière', 'Lucas', 'Brunet', 'Gaillard', 'Barbier', 'Arnaud',
+    'Martínez', 'Gérard', 'Roche', 'Renard', 'Schmitt', 'Roy', 'Leroux', 'Colin', 'Vidal', 'Caron',
+    'Picard', 'Roger', 'Fabre', 'Aubert', 'Lemoine', 'Renaud', 'Dumas', 'Lacroix', 'Olivier', 'Philippe',
+    'Bourgeois', 'Pierre', 'Benoît', 'Rey', 'Léger', 'Hamon', 'Lévêque', 'Bouvier', 'Chauvin', 'Besnard',
+)
+ACTIVITES = ('Transports', 'Location', 'Livraisons', 'Bâtiment', 'Taxis', 'Ambulances', 'Dépannage', 'Services', 'Auto-école', 'Logistique')
+FORMES = ('SAS', 'SARL', 'SA', 'EURL', 'SNC')
+VOIES = ('rue', 'avenue', 'boulevard', 'place', 'chemin', 'allée', 'impasse', 'route')
+NOMS_VOIES = ('de la Paix', 'Victor Hugo', 'Jean Jaurès', 'de la République', 'Pasteur', 'du Général de Gaulle',
+              'des Lilas', 'de la Gare', 'Gambetta', 'du Moulin', 'de l\'Église', 'Voltaire')
+VILLES = (('Paris', '75', 20), ('Marseille', '13', 9), ('Lyon', '69', 6), ('Toulouse', '31', 5), ('Nice', '06', 4),
+          ('Nantes', '44', 4), ('Strasbourg', '67', 3), ('Montpellier', '34', 3), ('Bordeaux', '33', 3),
+          ('Lille', '59', 3), ('Rennes', '35', 2), ('Reims', '51', 2), ('Dijon', '21', 2), ('Angers', '49', 2),
+          ('Grenoble', '38', 2), ('Brest', '29', 1), ('Limoges', '87', 1), ('Tours', '37', 1), ('Amiens', '80', 1),
+          ('Metz', '57', 1), ('Besançon', '25', 1), ('Orléans', '45', 1), ('Rouen', '76', 1), ('Caen', '14', 1))
+MODELES = (
+    ('Renault', ('Clio', 'Mégane', 'Captur', 'Twingo', 'Scénic', 'Kangoo', 'Master', 'Zoé'), 22),
+    ('Peugeot', ('208', '308', '2008', '3008', '5008', 'Partner', 'Expert', '106'), 20),
+    ('Citroën', ('C3', 'C4', 'C5 Aircross', 'Berlingo', 'Jumper', 'Picasso', 'Saxo'), 14),
+    ('Volkswagen', ('Golf', 'Polo', 'Tiguan', 'Passat', 'Transporter', 'T-Roc'), 8),
+    ('Dacia', ('Sandero', 'Duster', 'Logan', 'Spring', 'Jogger'), 8),
+    ('Toyota', ('Yaris', 'Corolla', 'C-HR', 'RAV4', 'Aygo'), 6),
+    ('Ford', ('Fiesta', 'Focus', 'Kuga', 'Transit', 'Puma'), 5),
+    ('Opel', ('Corsa', 'Astra', 'Mokka', 'Vivaro'), 4),
+    ('BMW', ('Série 1', 'Série 3', 'X1', 'X3'), 3),
+    ('Mercedes-Benz', ('Classe A', 'Classe C', 'Sprinter', 'Vito'), 3),
+    ('Fiat', ('500', 'Panda', 'Ducato', 'Tipo'), 3),
+    ('Škoda', ('Octavia', 'Fabia', 'Kodiaq'), 2),
+    ('Tesla', ('Model 3', 'Model Y'), 1),
+    ('Kia', ('Picanto', 'Sportage', 'Niro'), 1),
+)
+COULEURS = (('Gris', 28), ('Blanc', 24), ('Noir', 18), ('Bleu', 10), ('Rouge', 8), ('Argent', 7), ('Vert', 2),
+            ('Beige', 1), ('Orange', 1), ('Jaune', 1))
+OBJETS = ("Demande d'information", 'Réclamation produit', 'Suivi de commande', 'Demande de devis',
+          'Mise à jour coordonnées', 'Incident technique', 'Question sur facture', 'Validation document',
+          'Demande de support', 'Renouvellement contrat', 'Changement de titulaire', "Demande d'immatriculation",
+          'Contestation amende', 'Certificat de cession', 'Duplicata carte grise')
+OBSERVATIONS = ('Dossier traité.', 'En attente de réponse.', 'Pièces manquantes.', 'Transmis au service concerné.',
+                'Clôturé.', 'Relance envoyée.', 'En cours de résolution.', None, None)
+
+# Plaques SIV : lettres sans I, O, U ; numéro 001 à 999
+SIV_LETTERS = 'ABCDEFGHJKLMNPQRSTVWXYZ'
+SIV_SPACE = len(SIV_LETTERS) ** 4 * 999
+FNI_SPACE = 9999 * len(SIV_LETTERS) ** 2 * len(VILLES)
+# Permutations fixes (indépendantes de la graine) : pas premier avec la taille de
+# l'espace, donc une plaque différente pour chaque identifiant inférieur à cette taille
+# (generate_vehicles refuse d'aller au-delà)
+SIV_STRIDE, SIV_OFFSET = 2654435761, 104729
+FNI_STRIDE, FNI_OFFSET = 40505, 7919
+PLATE_SPACE = min(SIV_SPACE, FNI_SPACE)
+FNI_SHARE = 0.1  # Part des véhicules d'avant 2009 restés en numérotation FNI
+EMAIL_DOMAINS = ('gmail.com', 'orange.fr', 'free.fr', 'laposte.net', 'hotmail.fr', 'sfr.fr')
+BIRTH_FIRST, BIRTH_LAST = (date(1940, 1, 1) - FIRST_DAY).days, (date(2006, 1, 1) - FIRST_DAY).days
+DOSSIERS_FIRST = (date(2015, 1, 1) - FIRST_DAY).days
+
+
+def zipf_weights(count, exponent=0.9):
+    # Poids décroissants : le premier élément est le plus fréquent
+    return [1 / (rank + 1) ** exponent for rank in range(count)]
+
+
+def weighted_table(population, weights, size=TABLE_SIZE):
+    # Tirage pondéré en un accès : chaque élément répété selon son poids
+    total = sum(weights)
+    table = []
+    for item, weight in zip(population, weights):
+        table.extend([item] * max(1, round(size * weight / total)))
+    return table
+
+
+def day_number(day):
+    return (day - FIRST_DAY).days
+
+
+@lru_cache(maxsize=None)
+def cached_fold(value):
+    return fold_text(value)
+
+
+@lru_cache(maxsize=None)
+def email_part(value):
+    return fold_text(value).lower().replace(' ', '-').replace("'", '')
+
+
+def siv_plate(index):
+    n = (index * SIV_STRIDE + SIV_OFFSET) % SIV_SPACE
+    n, number = divmod(n, 999)
+    letters = []
+    for _ in range(4):
+        n, i = divmod(n, len(SIV_LETTERS))
+        letters.append(SIV_LETTERS[i])
+    return f"{letters[0]}{letters[1]}-{number + 1:03d}-{letters[2]}{letters[3]}"
+
+
+def fni_plate(index):
+    n = (index * FNI_STRIDE + FNI_OFFSET) % FNI_SPACE
+    n, number = divmod(n, 9999)
+    n, first = divmod(n, len(SIV_LETTERS))
+    n, second = divmod(n, len(SIV_LETTERS))
+    return f"{number + 1} {SIV_LETTERS[first]}{SIV_LETTERS[second]} {VILLES[n][1]}"
+
+
+class Generator:
+    # Tirages par random() et tables précalculées : quelques microsecondes par ligne
+    def __init__(self, seed, today=REFERENCE_DATE):
+        self.random = random.Random(seed)
+        self.rand = self.random.random
+        self.prenoms = weighted_table(PRENOMS, zipf_weights(len(PRENOMS)))
+        self.noms = weighted_table(NOMS, zipf_weights(len(NOMS)))
+        self.villes = weighted_table(VILLES, [weight for _, _, weight in VILLES])
+        self.modeles = weighted_table(MODELES, [weight for _, _, weight in MODELES])
+        self.couleurs = weighted_table([couleur for couleur, _ in COULEURS], [weight for _, weight in COULEURS])
+        self.chain_lengths = weighted_table((1, 2, 3, 4, 5), (40, 30, 17, 9, 4))
+        years = range(1995, today.year + 1)
+        self.years = weighted_table(years, [(year - 1994) ** 1.5 for year in years])
+        # Dates manipulées en jours depuis FIRST_DAY ; une année au-delà d'aujourd'hui
+        # pour les échéances des dossiers
+        self.days = [(FIRST_DAY + timedelta(days=i)).isoformat() for i in range(day_number(today) + 367)]
+        self.times = [f"{s // 3600:02d}:{s // 60 % 60:02d}:{s % 60:02d}" for s in range(8 * 3600, 19 * 3600)]
+        self.today = day_number(today)
+
+    def pick(self, table):
+        return table[int(self.rand() * len(table))]
+
+    def below(self, n):
+        return int(self.rand() * n)
+
+    def day_between(self, start, end):
+        return start + self.below(max(end - start, 1))
+
+    def address(self):
+        ville, departement, _ = self.pick(self.villes)
+        return f"{self.below(180) + 1} {self.pick(VOIES)} {self.pick(NOMS_VOIES)}, {departement}{self.below(1000):03d} {ville}"
+
+    def phone(self):
+        digits = f"{self.below(10 ** 8):08d}"
+        return f"0{self.pick('1234567')} {digits[:2]} {digits[2:4]} {digits[4:6]} {digits[6:]}"
+
+    def owner(self, owner_id):
+        # (id, type, adresse, telephone, email, nom, prenom, date_naissance, raison_sociale, siret, representant_legal)
+        nom = self.pick(self.noms)
+        prenom = self.pick(self.prenoms)
+        if self.rand() < 0.85:
+            birth = self.days[self.day_between(BIRTH_FIRST, BIRTH_LAST)]
+            email = f"{email_part(prenom)}.{email_part(nom)}{self.below(100)}@{self.pick(EMAIL_DOMAINS)}"
+            return (owner_id, 'PHYSIQUE', self.address(), self.phone(), email,
+                    nom, prenom, birth, None, None, None)
+        raison_sociale = f"{self.pick(ACTIVITES)} {nom} {self.pick(FORMES)}"
+        return (owner_id, 'MORALE', self.address(), self.phone(), f"contact@{email_part(nom)}-{owner_id}.fr",
+                None, None, None, raison_sociale, f"{self.below(10 ** 14):014d}", f"{prenom} {nom}")
+
+    def vehicle(self, vehicle_id):
+        # ((id, immatriculation, marque, modele, annee, couleur), jour de première immatriculation)
+        marque, modeles, _ = self.pick(self.modeles)
+        annee = self.pick(self.years)
+        first_registration = self.day_between(day_number(date(annee, 1, 1)), min(day_number(date(annee + 1, 1, 1)), self.today))
+        plate = fni_plate(vehicle_id) if annee < 2009 and self.rand() < FNI_SHARE else siv_plate(vehicle_id)
+        return (vehicle_id, plate, marque, self.pick(modeles), annee, self.pick(self.couleurs)), first_registration
+
+    def ownership_chain(self, first_registration):
+        # [(date_debut, date_fin)] successifs sans chevauchement, le dernier souvent en cours
+        span = self.today - first_registration
+        owners = self.pick(self.chain_lengths)
+        if span < 4 * owners:
+            owners = 1
+        # Coupures paires distinctes : au moins 2 jours d'écart, donc date_fin > date_debut
+        cuts = sorted({first_registration + 2 * (1 + self.below(span // 2 - 1)) for _ in range(owners - 1)})
+        periods = []
+        start = first_registration
+        for cut in cuts:
+            periods.append((self.days[start], self.days[cut]))
+            start = cut + 1
+        # Véhicule détruit ou exporté : la dernière période est close
+        if self.rand() < 0.08 and self.today - start > 2:
+            periods.append((self.days[start], self.days[self.day_between(start + 1, self.today)]))
+        else:
+            periods.append((self.days[start], None))
+        return periods
+
+    def dossier(self, number):
+        # (numero, date, personne, objet, numero_reference, date_debut, date_fin, observation, created_at)
+        day = self.day_between(DOSSIERS_FIRST, self.today + 1)
+        reference = f"REF{self.below(10 ** 6):06d}" if self.rand() < 0.7 else None
+        return (f"D{number:08d}", self.days[day], f"{self.pick(self.prenoms)} {self.pick(self.noms)}",
+                self.pick(OBJETS), reference, self.days[day - self.below(15)], self.days[day + 1 + self.below(59)],
+                self.pick(OBSERVATIONS), f"{self.days[day]} {self.pick(self.times)}")
+
+
+def suspend_triggers_and_indexes(conn, tables):
+    # Retire triggers et index (hors contraintes UNIQUE / clés) des tables ; retourne leur SQL
+    placeholders = ', '.join('?' for _ in tables)
+    saved = conn.execute(f'''
+        SELECT type, name, sql FROM sqlite_master
+        WHERE type IN ('trigger', 'index') AND sql IS NOT NULL AND tbl_name IN ({placeholders})
+    ''', tables).fetchall()
+    for kind, name, _ in saved:
+        conn.execute(f"DROP {kind.upper()} IF EXISTS {name}")
+    return [sql for _, _, sql in saved]
+
+
+def restore_triggers_and_indexes(conn, saved):
+    for sql in saved:
+        conn.execute(sql)
+
+
+def load(db_file, sql, rows, label, batch_size=BATCH_SIZE):
+    # executemany par lots (une transaction par lot) ; retourne le nombre de lignes
+    count = 0
+    start = time.perf_counter()
+    rows = iter(rows)
+    while True:
+        batch = list(islice(rows, batch_size))
+        if not batch:
+            break
+        with writer(db_file) as conn:
+            conn.execute("BEGIN")
+            conn.executemany(sql, batch)
+        count += len(batch)
+        elapsed = time.perf_counter() - start
+        print(f"{label} : {count} lignes ({count / elapsed:.0f} lignes/s)", end='\r')
+    elapsed = time.perf_counter() - start
+    if count:
+        print(f"{label} : {count} lignes en {elapsed:.1f} s ({count / elapsed:.0f} lignes/s)")
+    return count
+
+
+def key_columns(conn, table):
+    # Colonnes *_cle présentes (migration des clés de recherche appliquée)
+    existing = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+    return [column for column in SEARCH_KEY_COLUMNS[table] if key_column(column) in existing]
+
+
+def next_id(conn, table, column):
+    return conn.execute(f"SELECT COALESCE(MAX({column}), 0) + 1 FROM {table}").fetchone()[0]
+
+
+def generate_dossiers(db_file, generator, count, batch_size=BATCH_SIZE):
+    with writer(db_file) as conn:
+        database.create_schema(conn)
+        first = next_id(conn, 'dossiers', 'id')
+        saved = suspend_triggers_and_indexes(conn, ('dossiers',))
+    rows = (generator.dossier(first + i) for i in range(count))
+    load(db_file, '''
+        INSERT INTO dossiers (numero, date, personne, objet, numero_reference, date_debut, date_fin, observation, created_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ''', rows, "Dossiers", batch_size)
+    with writer(db_file) as conn:
+        restore_triggers_and_indexes(conn, saved)
+        database.rebuild_fts_index(conn)
+        conn.execute("UPDATE row_counts SET total = (SELECT COUNT(*) FROM dossiers) WHERE table_name = 'dossiers'")
+
+
+def generate_vehicles(db_file, generator, vehicles, owners, batch_size=BATCH_SIZE):
+    r = generator.random
+    with writer(db_file) as conn:
+        if not table_exists(conn, 'vehicule'):
+            setup_initial_tables.create_tables(conn.cursor())
+        migrate(conn)
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(vehicule)")}
+        year_column = 'annee' if 'annee' in columns else 'annee_fabrication'
+        owner_keys = key_columns(conn, 'proprietaire')
+        vehicle_keys = key_columns(conn, 'vehicule')
+        first_owner = next_id(conn, 'proprietaire', 'id_proprietaire')
+        first_vehicle = next_id(conn, 'vehicule', 'id_vehicule')
+        first_history = next_id(conn, 'historique_proprietaires', 'id_historique')
+        if first_vehicle + vehicles > PLATE_SPACE:
+            # Au-delà, les plaques se répéteraient et INSERT OR IGNORE écarterait des véhicules
+            raise ValueError(f"Identifiants de véhicules au-delà de {PLATE_SPACE} : plaques non uniques")
+        saved = suspend_triggers_and_indexes(conn, ('vehicule', 'proprietaire', 'historique_proprietaires'))
+
+    # Propriétaires ; clés de recherche calculées ici (triggers retirés)
+    owner_columns = ('id_proprietaire', 'type_proprietaire', 'adresse', 'telephone', 'email', 'nom', 'prenom',
+                     'date_naissance', 'raison_sociale', 'siret', 'representant_legal')
+    key_positions = [owner_columns.index(column) for column in owner_keys]
+    fleet_weights = []
+
+    def owner_rows():
+        for owner_id in range(first_owner, first_owner + owners):
+            row = generator.owner(owner_id)
+            # Flottes très inégales : une société pèse de 2 à plusieurs milliers de particuliers
+            fleet_weights.append(1.0 if row[1] == 'PHYSIQUE' else min(2 * r.paretovariate(1.1), 5000.0))
+            yield row + tuple(cached_fold(row[i]) if row[i] else None for i in key_positions)
+
+    all_owner_columns = owner_columns + tuple(key_column(column) for column in owner_keys)
+    load(db_file, f'''
+        INSERT INTO proprietaire ({', '.join(all_owner_columns)})
+        VALUES ({', '.join('?' for _ in all_owner_columns)})
+    ''', owner_rows(), "Propriétaires", batch_size)
+
+    owner_ids = range(first_owner, first_owner + owners)
+    cumulative = list(accumulate(fleet_weights))
+    histories = []
+    vehicle_columns = ('id_vehicule', 'immatriculation', 'marque', 'modele', year_column, 'couleur')
+    vehicle_key_positions = [('id_vehicule', 'immatriculation', 'marque', 'modele').index(column) for column in vehicle_keys]
+
+    def vehicle_rows():
+        history_id = first_history
+        for vehicle_id in range(first_vehicle, first_vehicle + vehicles):
+            row, first_registration = generator.vehicle(vehicle_id)
+            periods = generator.ownership_chain(first_registration)
+            for owner_id, (debut, fin) in zip(r.choices(owner_ids, cum_weights=cumulative, k=len(periods)), periods):
+                histories.append((history_id, vehicle_id, owner_id, debut, fin))
+                history_id += 1
+            yield row + tuple(cached_fold(row[i]) for i in vehicle_key_positions)
+
+    def history_rows():
+        # Produites au fil des véhicules : vidées par lots pour garder la mémoire bornée
+        vehicle_iter = vehicle_rows()
+        while True:
+            batch = list(islice(vehicle_iter, batch_size))
+            if not batch:
+                break
+            yield batch, histories[:]
+            histories.clear()
+
+    all_vehicle_columns = vehicle_columns + tuple(key_column(column) for column in vehicle_keys)
+    vehicle_sql = f'''
+        INSERT OR IGNORE INTO vehicule ({', '.join(all_vehicle_columns)})
+        VALUES ({', '.join('?' for _ in all_vehicle_columns)})
+    '''
+    history_sql = '''
+        INSERT INTO historique_proprietaires (id_historique, id_vehicule, id_proprietaire, date_debut, date_fin)
+        VALUES (?, ?, ?, ?, ?)
+    '''
+    vehicle_count = history_count = 0
+    start = time.perf_counter()
+    for vehicle_batch, history_batch in history_rows():
+        with writer(db_file) as conn:
+            conn.execute("BEGIN")
+            conn.executemany(vehicle_sql, vehicle_batch)
+            conn.executemany(history_sql, history_batch)
+        vehicle_count += len(vehicle_batch)
+        history_count += len(history_batch)
+        rate = (vehicle_count + history_count) / (time.perf_counter() - start)
+        print(f"Véhicules : {vehicle_count}, historiques : {history_count} ({rate:.0f} lignes/s)", end='\r')
+    if vehicle_count:
+        elapsed = time.perf_counter() - start
+        print(f"Véhicules : {vehicle_count}, historiques : {history_count} en {elapsed:.1f} s "
+              f"({(vehicle_count + history_count) / elapsed:.0f} lignes/s)")
+
+    print("Recréation des index et des données dérivées...")
+    with writer(db_file) as conn:
+        # Plaque déjà présente en base (INSERT OR IGNORE) : son historique généré est retiré
+        ignored = conn.execute('''
+            DELETE FROM historique_proprietaires
+            WHERE id_historique >= ? AND id_vehicule NOT IN (SELECT id_vehicule FROM vehicule)
+        ''', (first_history,)).rowcount
+        if ignored:
+            print(f"{ignored} périodes retirées (plaques déjà existantes)")
+        restore_triggers_and_indexes(conn, saved)
+        if table_exists(conn, 'vehicule_plates_fts'):
+            conn.execute("INSERT INTO vehicule_plates_fts(vehicule_plates_fts) VALUES ('rebuild')")
+        if table_exists(conn, 'vehicule_current_owner'):
+            fill_current_owner_table(conn)
+        if table_exists(conn, 'archive_changes'):
+            # Lignes à archiver au prochain rafraîchissement incrémental de main_archive
+            conn.execute(
+                "INSERT OR IGNORE INTO archive_changes SELECT id_historique FROM historique_proprietaires WHERE id_historique >= ?",
+                (first_history,)
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Génération d'un jeu de données synthétique (déterministe)")
+    parser.add_argument("--db", default=database.DATABASE_NAME)
+    parser.add_argument("--dossiers", type=int, default=1000000)
+    parser.add_argument("--vehicules", type=int, default=1000000)
+    parser.add_argument("--proprietaires", type=int, help="par défaut 60 %% du nombre de véhicules")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--date", type=date.fromisoformat, default=REFERENCE_DATE,
+                        help="date de référence des données, AAAA-MM-JJ (par défaut %(default)s)")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    args = parser.parse_args()
+
+    owners = args.proprietaires if args.proprietaires is not None else max(args.vehicules * 6 // 10, 1)
+    generator = Generator(args.seed, args.date)
+    start = time.perf_counter()
+    with writer(args.db) as conn:
+        conn.execute("PRAGMA synchronous=OFF")  # Base reconstructible : pas de fsync pendant le chargement
+    try:
+        if args.dossiers:
+            generate_dossiers(args.db, generator, args.dossiers, args.batch_size)
+        if args.vehicules:
+            generate_vehicles(args.db, generator, args.vehicules, owners, args.batch_size)
+    finally:
+        with writer(args.db) as conn:
+            conn.execute("PRAGMA synchronous=NORMAL")
+    print(f"Terminé en {time.perf_counter() - start:.1f} s : '{args.db}'.")
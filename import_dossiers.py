@@ -0,0 +1,140 @@
+import argparse
+import csv
+import json
+import os
+import time
+from itertools import islice
+
+from database import DATABASE_NAME, begin_bulk_load, create_schema, end_bulk_load
+from db_pool import writer
+
+# Import massif de dossiers depuis un fichier CSV (en-têtes = noms de colonnes) ou JSONL.
+# Usage : python import_dossiers.py fichier.csv|fichier.jsonl [--db dossiers.db]
+#         [--batch-size 10000] [--restart]
+# Relancé après une interruption, l'import reprend après le dernier lot validé.
+
+IMPORT_COLUMNS = ('numero', 'date', 'personne', 'objet', 'numero_reference', 'date_debut', 'date_fin', 'observation')
+REQUIRED_COLUMNS = ('numero', 'date', 'personne', 'objet')
+BATCH_SIZE = 10000
+FORMATS = {'.csv': 'csv', '.jsonl': 'jsonl', '.ndjson': 'jsonl'}
+
+INSERT_SQL = f"""
+    INSERT INTO dossiers ({', '.join(IMPORT_COLUMNS)})
+    VALUES ({', '.join('?' for _ in IMPORT_COLUMNS)})
+"""
+
+
+def create_progress_table(conn):
+    # Position atteinte dans chaque fichier, validée dans la même transaction que le lot
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS import_progress (
+            source TEXT PRIMARY KEY,
+            position INTEGER NOT NULL,
+            imported INTEGER NOT NULL,
+            rejected INTEGER NOT NULL,
+            updated_at TEXT DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    conn.commit()
+
+
+def source_key(path):
+    # Un fichier modifié depuis l'import interrompu repart de zéro
+    return f"{os.path.abspath(path)}:{os.path.getsize(path)}"
+
+
+def read_records(path):
+    # Générateur : le fichier est lu ligne à ligne, jamais chargé en entier
+    file_format = FORMATS[os.path.splitext(path)[1].lower()]
+    with open(path, encoding='utf-8', newline='') as f:
+        if file_format == 'csv':
+            yield from csv.DictReader(f)
+        else:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def to_row(record):
+    # Enregistrement du fichier -> tuple IMPORT_COLUMNS, ou None s'il manque un champ obligatoire
+    values = []
+    for col in IMPORT_COLUMNS:
+        value = record.get(col)
+        values.append((str(value).strip() or None) if value is not None else None)
+    if any(value is None for col, value in zip(IMPORT_COLUMNS, values) if col in REQUIRED_COLUMNS):
+        return None
+    return tuple(values)
+
+
+def print_progress(imported, rejected, elapsed):
+    rate = imported / elapsed if elapsed > 0 else 0
+    print(f"{imported} dossiers importés, {rejected} rejetés ({rate:.0f} lignes/s)")
+
+
+def import_file(path, db_file=DATABASE_NAME, batch_size=BATCH_SIZE, restart=False, progress=print_progress):
+    # Importe path par lots de batch_size lignes (executemany, une transaction par lot).
+    # Retourne (lignes importées, lignes rejetées, durée en secondes) pour cette exécution.
+    if os.path.splitext(path)[1].lower() not in FORMATS:
+        raise ValueError(f"Format non pris en charge : {path} (attendu : .csv, .jsonl)")
+    source = source_key(path)
+
+    with writer(db_file) as conn:
+        # Un import précédent interrompu est repris tel quel (triggers encore retirés)
+        create_schema(conn, repair_bulk_load=False)
+        create_progress_table(conn)
+        if restart:
+            conn.execute("DELETE FROM import_progress WHERE source = ?", (source,))
+        state = conn.execute(
+            "SELECT position, imported, rejected FROM import_progress WHERE source = ?", (source,)
+        ).fetchone()
+        begin_bulk_load(conn)
+
+    position, imported, rejected = tuple(state) if state else (0, 0, 0)
+    if position:
+        print(f"Reprise après {position} lignes déjà traitées")
+    records = islice(read_records(path), position, None)
+    imported_now = rejected_now = 0
+    start = time.perf_counter()
+
+    # En cas d'erreur (ou Ctrl+C), triggers, index et compteurs sont rétablis avant de
+    # remonter l'exception : l'application reste utilisable, l'import pourra être repris
+    try:
+        while True:
+            batch = list(islice(records, batch_size))
+            if not batch:
+                break
+            rows = [row for row in map(to_row, batch) if row is not None]
+            position += len(batch)
+            imported_now += len(rows)
+            rejected_now += len(batch) - len(rows)
+
+            with writer(db_file) as conn:
+                conn.execute("BEGIN")
+                conn.executemany(INSERT_SQL, rows)
+                conn.execute(
+                    "INSERT OR REPLACE INTO import_progress (source, position, imported, rejected) VALUES (?, ?, ?, ?)",
+                    (source, position, imported + imported_now, rejected + rejected_now)
+                )
+            if progress:
+                progress(imported + imported_now, rejected + rejected_now, time.perf_counter() - start)
+    finally:
+        with writer(db_file) as conn:
+            end_bulk_load(conn)
+
+    with writer(db_file) as conn:
+        conn.execute("DELETE FROM import_progress WHERE source = ?", (source,))
+
+    return imported_now, rejected_now, time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Import massif de dossiers (CSV ou JSONL)")
+    parser.add_argument("fichier")
+    parser.add_argument("--db", default=DATABASE_NAME)
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--restart", action="store_true", help="ignorer un import interrompu et repartir du début")
+    args = parser.parse_args()
+
+    imported, rejected, elapsed = import_file(args.fichier, args.db, args.batch_size, args.restart)
+    rate = imported / elapsed if elapsed > 0 else 0
+    print(f"Import terminé : {imported} dossiers en {elapsed:.1f} s ({rate:.0f} lignes/s), {rejected} lignes rejetées.")
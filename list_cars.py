@@ -1,12 +1,31 @@
+import asyncio
 import flet as ft
 import sqlite3
 from datetime import datetime
 
+import cars_queries
+import db_worker
+from current_owner import create_current_owner_table, rollover_current_owners, seconds_until_next_day
+from db_pool import get_reader, writer
+from migrations import migrate
+from plate_fuzzy import PlateMatcher
+import sql_trace
+import ui_profile
+
 # --- SQLite Configuration ---
 DB_NAME = "cars.db"
 
+# --- Recherche pendant la frappe ---
+SEARCH_DEBOUNCE_MS = 300    # Délai sans frappe avant de lancer la recherche
+MIN_LIVE_QUERY_LENGTH = 2   # En dessous, on attend Entrée / le bouton (évite les parcours complets)
+
+# --- Plaques mal lues ("Vouliez-vous dire ?") ---
+MIN_FUZZY_LENGTH = 5        # Suggestions proposées sans résultat, à partir de cette longueur
+PLATE_MATCHER = PlateMatcher()
+
 def main(page: ft.Page):
     page.title = "Recherche Véhicules & Propriétaires"
+    ui_profile.attach(page)  # FLETAPP_UI_PROFILE=1 : coût du rendu par gestionnaire
     page.theme_mode = ft.ThemeMode.LIGHT
     page.padding = 20
     page.vertical_alignment = ft.MainAxisAlignment.START
@@ -15,76 +34,116 @@ def main(page: ft.Page):
     # État de l'application
     search_results = []
     selected_item = None
+    # Seules les réponses de la dernière recherche / du dernier détail demandé sont affichées
+    search_requests = db_worker.LatestOnly()
+    detail_requests = db_worker.LatestOnly()
     
     # Fonctions de base de données SQLite
     def connect_to_sqlite():
+        # Connexion de lecture du thread courant, conservée par le pool entre les clics
         try:
-            connection = sqlite3.connect(DB_NAME, check_same_thread=False)
-            connection.row_factory = sqlite3.Row
-            return connection
+            return get_reader(DB_NAME)
         except sqlite3.Error as e:
             print("Erreur de connexion à SQLite:", e)
             return None
 
     def initialize_db():
-        conn = connect_to_sqlite()
-        if conn:
-            cursor = conn.cursor()
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS vehicule (
-                    id_vehicule INTEGER PRIMARY KEY AUTOINCREMENT,
-                    immatriculation TEXT NOT NULL UNIQUE,
-                    marque TEXT NOT NULL,
-                    modele TEXT NOT NULL,
-                    annee INTEGER,
-                    couleur TEXT
-                )
-            ''')
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS proprietaire (
-                    id_proprietaire INTEGER PRIMARY KEY AUTOINCREMENT,
-                    type_proprietaire TEXT NOT NULL CHECK(type_proprietaire IN ('PHYSIQUE', 'MORALE')),
-                    adresse TEXT,
-                    telephone TEXT,
-                    email TEXT,
-                    nom TEXT,
-                    prenom TEXT,
-                    date_naissance TEXT,
-                    raison_sociale TEXT,
-                    siret TEXT,
-                    representant_legal TEXT
-                )
-            ''')
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS historique_proprietaires (
-                    id_historique INTEGER PRIMARY KEY AUTOINCREMENT,
-                    id_vehicule INTEGER NOT NULL,
-                    id_proprietaire INTEGER NOT NULL,
-                    date_debut TEXT NOT NULL,
-                    date_fin TEXT,
-                    FOREIGN KEY (id_vehicule) REFERENCES vehicule(id_vehicule),
-                    FOREIGN KEY (id_proprietaire) REFERENCES proprietaire(id_proprietaire)
-                )
-            ''')
-            conn.commit()
-            conn.close()
+        try:
+            with writer(DB_NAME) as conn:
+                cursor = conn.cursor()
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS vehicule (
+                        id_vehicule INTEGER PRIMARY KEY AUTOINCREMENT,
+                        immatriculation TEXT NOT NULL UNIQUE,
+                        marque TEXT NOT NULL,
+                        modele TEXT NOT NULL,
+                        annee INTEGER,
+                        couleur TEXT
+                    )
+                ''')
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS proprietaire (
+                        id_proprietaire INTEGER PRIMARY KEY AUTOINCREMENT,
+                        type_proprietaire TEXT NOT NULL CHECK(type_proprietaire IN ('PHYSIQUE', 'MORALE')),
+                        adresse TEXT,
+                        telephone TEXT,
+                        email TEXT,
+                        nom TEXT,
+                        prenom TEXT,
+                        date_naissance TEXT,
+                        raison_sociale TEXT,
+                        siret TEXT,
+                        representant_legal TEXT
+                    )
+                ''')
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS historique_proprietaires (
+                        id_historique INTEGER PRIMARY KEY AUTOINCREMENT,
+                        id_vehicule INTEGER NOT NULL,
+                        id_proprietaire INTEGER NOT NULL,
+                        date_debut TEXT NOT NULL,
+                        date_fin TEXT,
+                        FOREIGN KEY (id_vehicule) REFERENCES vehicule(id_vehicule),
+                        FOREIGN KEY (id_proprietaire) REFERENCES proprietaire(id_proprietaire)
+                    )
+                ''')
+                # Propriétaire actuel matérialisé (triggers) + passage quotidien en retard éventuel
+                create_current_owner_table(conn)
+                migrate(conn)
+                rollover_current_owners(conn)
             print("Base de données SQLite initialisée et tables créées (si elles n'existaient pas).")
-        else:
-            print("Impossible d'initialiser la base de données.")
+        except sqlite3.Error as e:
+            print("Impossible d'initialiser la base de données:", e)
 
     initialize_db()
 
+    def rollover():
+        with writer(DB_NAME) as conn:
+            return rollover_current_owners(conn)
+
+    async def daily_rollover():
+        # Les périodes dont la date_fin est atteinte ne déclenchent aucun trigger :
+        # recalcul une fois par jour tant que l'application reste ouverte
+        while True:
+            await asyncio.sleep(seconds_until_next_day())
+            try:
+                await db_worker.run(sql_trace.tagged("maintenance", rollover))
+            except sqlite3.Error as e:
+                print("Erreur lors de la mise à jour des propriétaires actuels:", e)
+
+    page.run_task(daily_rollover)
+
+    # Index des plaques chargé en arrière-plan, complété ensuite à chaque recherche
+    db_worker.EXECUTOR.submit(sql_trace.tagged("search", lambda: PLATE_MATCHER.refresh(get_reader(DB_NAME))))
+
     def show_snackbar(message):
         page.snack_bar = ft.SnackBar(ft.Text(message))
         page.snack_bar.open = True
         page.update()
     
     def execute_search(e):
+        # Entrée ou bouton : recherche immédiate, la requête précédente est abandonnée
+        run_search(search_requests.next())
+
+    def on_search_change(e):
+        # Chaque frappe rend obsolète (et interrompt) la requête en cours,
+        # la nouvelle recherche ne part qu'après SEARCH_DEBOUNCE_MS sans frappe
+        token = search_requests.next()
+        if len(search_field.value.strip()) < MIN_LIVE_QUERY_LENGTH:
+            return
+        page.run_task(debounced_search, token)
+
+    async def debounced_search(token):
+        await asyncio.sleep(SEARCH_DEBOUNCE_MS / 1000)
+        if search_requests.is_current(token):
+            run_search(token)
+
+    def run_search(token):
         nonlocal search_results
         query = search_field.value.strip()
         
         # Clear previous state
-        search_results.clear()
+        search_results = []
         results_list.controls.clear()
         details_container.controls.clear()
         details_container.visible = False
@@ -92,56 +151,49 @@ def main(page: ft.Page):
 
         if not query:
             return
+
+        def work():
+            # Exécuté sur un thread du pool : aucune modification de l'interface ici
+            connection = connect_to_sqlite()
+            if not connection:
+                raise sqlite3.OperationalError("Erreur de connexion à la base de données")
             
-        connection = connect_to_sqlite()
-        if not connection:
-            show_snackbar("Erreur de connexion à la base de données")
-            return
-            
-        try:
-            cursor = connection.cursor()
-            
-            # --- STEP 1: Check for exact vehicle immatriculation match ---
-            cursor.execute("SELECT id_vehicule FROM vehicule WHERE UPPER(immatriculation) = UPPER(?)", (query,))
-            exact_vehicule_match = cursor.fetchone()
+            with db_worker.cancel_when_stale(connection, search_requests, token):
+                # --- STEP 1: Check for exact vehicle immatriculation match ---
+                exact_vehicule_id = cars_queries.find_exact_plate(connection, query)
+                if exact_vehicule_id is not None:
+                    return ('EXACT', exact_vehicule_id)
+                
+                # --- STEP 2: If no exact vehicle match, perform combined broad search ---
+                results = cars_queries.search_vehicles_and_owners(connection, query)
+                if results or len(query) < MIN_FUZZY_LENGTH:
+                    return ('LISTE', results)
+
+                # --- STEP 3: Nothing found, suggest close plates (misread characters) ---
+                suggestions = PLATE_MATCHER.suggest(connection, query)
+                return ('SUGGESTIONS', [('VEHICULE', vehicle_id, plate) for vehicle_id, plate, _ in suggestions])
 
-            if exact_vehicule_match:
+        def done(result):
+            nonlocal search_results
+            if not search_requests.is_current(token):
+                return # Une recherche plus récente a été lancée entre-temps
+            kind, payload = result
+            if kind == 'EXACT':
                 # If exact match found, display its details directly
-                show_details(('VEHICULE', exact_vehicule_match['id_vehicule'], query)) # Pass type, id, and libelle
-                return # Exit function as we've handled the search
-            
-            # --- STEP 2: If no exact vehicle match, perform combined broad search ---
-            param = f'%{query}%'
-
-            cursor.execute(f"""
-                SELECT 'VEHICULE' as type, id_vehicule as id, immatriculation as libelle
-                FROM vehicule 
-                WHERE UPPER(immatriculation) LIKE UPPER(?) 
-                   OR UPPER(marque) LIKE UPPER(?) 
-                   OR UPPER(modele) LIKE UPPER(?)
-                UNION ALL
-                SELECT 'PROPRIETAIRE' as type, id_proprietaire as id, 
-                       CASE 
-                         WHEN type_proprietaire = 'PHYSIQUE' THEN nom || ' ' || prenom
-                         ELSE raison_sociale
-                       END as libelle
-                FROM proprietaire 
-                WHERE (type_proprietaire = 'PHYSIQUE' AND (UPPER(nom) LIKE UPPER(?) OR UPPER(prenom) LIKE UPPER(?)))
-                   OR (type_proprietaire = 'MORALE' AND UPPER(raison_sociale) LIKE UPPER(?))
-                ORDER BY type, libelle
-            """, (param, param, param, param, param, param))
-            
-            search_results = [tuple(row) for row in cursor.fetchall()]
-            display_results()
-            
-        except sqlite3.Error as e:
+                show_details(('VEHICULE', payload, query)) # Pass type, id, and libelle
+            else:
+                search_results = payload
+                display_results(suggestions=(kind == 'SUGGESTIONS'))
+
+        def failed(e):
+            if not search_requests.is_current(token):
+                return # Requête interrompue par une frappe plus récente
             print("Erreur de requête:", e)
             show_snackbar("Erreur lors de la recherche")
-        finally:
-            if connection:
-                connection.close()
+
+        db_worker.submit(page, work, done, failed, loading=loading_bar, handler="search")
     
-    def display_results():
+    def display_results(suggestions=False):
         results_list.controls.clear()
         
         if not search_results:
@@ -149,6 +201,10 @@ def main(page: ft.Page):
                 ft.ListTile(title=ft.Text("Aucun résultat trouvé"))
             )
         else:
+            if suggestions:
+                results_list.controls.append(
+                    ft.ListTile(title=ft.Text("Aucun résultat trouvé. Vouliez-vous dire :", italic=True))
+                )
             for item in search_results:
                 icon = ft.Icons.DIRECTIONS_CAR if item[0] == 'VEHICULE' else ft.Icons.PERSON
                 results_list.controls.append(
@@ -171,55 +227,41 @@ def main(page: ft.Page):
     def show_details(item):
         nonlocal selected_item
         selected_item = item
-        details_container.controls.clear()
-        details_container.visible = True
-        
-        connection = connect_to_sqlite()
-        if not connection:
-            show_snackbar("Erreur de connexion à la base de données")
-            return
-            
-        try:
-            cursor = connection.cursor()
-            
+        token = detail_requests.next()
+
+        def work():
+            connection = connect_to_sqlite()
+            if not connection:
+                raise sqlite3.OperationalError("Erreur de connexion à la base de données")
+            # Fiche et historique en un seul aller-retour (voir detail_queries.py)
+            if item[0] == 'VEHICULE':
+                return cars_queries.fetch_vehicle_details(connection, item[1])
+            return cars_queries.fetch_owner_details(connection, item[1])
+
+        def done(result):
+            if not detail_requests.is_current(token):
+                return
+            details_container.controls.clear()
+            details_container.visible = True
             if item[0] == 'VEHICULE':
                 # Use a specific, more prominent title for direct vehicle details
                 details_container.controls.append(
                     ft.Text(f"Détails du Véhicule: {item[2]}", size=24, weight=ft.FontWeight.BOLD, color=ft.Colors.BLUE_800)
                 )
-                show_vehicle_details(cursor, item[1])
+                show_vehicle_details(*result)
             elif item[0] == 'PROPRIETAIRE':
                 details_container.controls.append(
                     ft.Text(f"Détails du Propriétaire: {item[2]}", size=24, weight=ft.FontWeight.BOLD, color=ft.Colors.BLUE_800)
                 )
-                show_owner_details(cursor, item[1])
-            
-        except sqlite3.Error as e:
+                show_owner_details(*result)
+
+        def failed(e):
             print("Erreur de requête:", e)
             show_snackbar("Erreur lors du chargement des détails")
-        finally:
-            if connection:
-                connection.close()
-        
-        page.update()
+
+        db_worker.submit(page, work, done, failed, loading=loading_bar, handler="detail")
     
-    def show_vehicle_details(cursor, vehicle_id):
-        cursor.execute("""
-            SELECT v.*, 
-                   CASE 
-                     WHEN p.type_proprietaire = 'PHYSIQUE' THEN p.nom || ' ' || p.prenom
-                     ELSE p.raison_sociale
-                   END as proprietaire_actuel,
-                   hp.date_debut
-            FROM vehicule v
-            LEFT JOIN historique_proprietaires hp ON v.id_vehicule = hp.id_vehicule
-            LEFT JOIN proprietaire p ON hp.id_proprietaire = p.id_proprietaire
-            WHERE v.id_vehicule = ?
-            AND (hp.date_fin IS NULL OR hp.date_fin > CURRENT_DATE)
-            ORDER BY hp.date_debut DESC LIMIT 1
-        """, (vehicle_id,))
-        vehicule = cursor.fetchone()
-        
+    def show_vehicle_details(vehicule, historiques):
         if vehicule:
             # Removed the generic "Détails du Véhicule" title here as it's added in show_details now
             details = [
@@ -237,21 +279,6 @@ def main(page: ft.Page):
                     ft.Text(f"{label}: {value}", size=16)
                 )
             
-            cursor.execute("""
-                SELECT 
-                    CASE 
-                      WHEN p.type_proprietaire = 'PHYSIQUE' THEN p.nom || ' ' || p.prenom
-                      ELSE p.raison_sociale
-                    END as nom_proprietaire,
-                    p.type_proprietaire,
-                    hp.date_debut, hp.date_fin
-                FROM historique_proprietaires hp
-                JOIN proprietaire p ON hp.id_proprietaire = p.id_proprietaire
-                WHERE hp.id_vehicule = ?
-                ORDER BY hp.date_debut DESC
-            """, (vehicle_id,))
-            historiques = cursor.fetchall()
-            
             if historiques:
                 details_container.controls.append(
                     ft.Text("\nHistorique des Propriétaires:", size=18, weight=ft.FontWeight.BOLD)
@@ -272,12 +299,7 @@ def main(page: ft.Page):
                         )
                     )
     
-    def show_owner_details(cursor, owner_id):
-        cursor.execute("""
-            SELECT * FROM proprietaire WHERE id_proprietaire = ?
-        """, (owner_id,))
-        proprietaire = cursor.fetchone()
-        
+    def show_owner_details(proprietaire, vehicules):
         if not proprietaire:
             return
             
@@ -313,16 +335,6 @@ def main(page: ft.Page):
                     ft.Text(f"{label}: {value}", size=16)
                 )
         
-        cursor.execute("""
-            SELECT v.immatriculation, v.marque, v.modele,
-                   hp.date_debut, hp.date_fin
-            FROM historique_proprietaires hp
-            JOIN vehicule v ON hp.id_vehicule = v.id_vehicule
-            WHERE hp.id_proprietaire = ?
-            ORDER BY hp.date_debut DESC
-        """, (owner_id,))
-        vehicules = cursor.fetchall()
-        
         if vehicules:
             details_container.controls.append(
                 ft.Text("\nVéhicules associés:", size=18, weight=ft.FontWeight.BOLD)
@@ -348,6 +360,7 @@ def main(page: ft.Page):
         autofocus=True,
         expand=True,
         on_submit=execute_search,
+        on_change=on_search_change,
         prefix_icon=ft.Icons.SEARCH
     )
     
@@ -363,6 +376,9 @@ def main(page: ft.Page):
         padding=ft.padding.only(top=10)
     )
 
+    # Indicateur affiché pendant qu'une requête tourne en arrière-plan
+    loading_bar = ft.ProgressBar(visible=False)
+
     details_container = ft.Column(
         scroll=ft.ScrollMode.AUTO,
         expand=2,
@@ -380,6 +396,7 @@ def main(page: ft.Page):
                 search_field,
                 search_button
             ], alignment=ft.MainAxisAlignment.CENTER),
+            loading_bar,
             ft.Divider(),
             ft.Row([
                 ft.Column([
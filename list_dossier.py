@@ -2,41 +2,61 @@ import flet as ft
 import sqlite3
 from datetime import datetime
 
+from database import COUNT_CAP, count_results, create_schema, fts_match_expression, fetch_dossier, fetch_dossiers_page, page_key
+import db_worker
+from db_pool import get_reader, writer
+from export_dossiers import export_dossiers
+from page_cache import PageCache
+import sql_trace
+import ui_profile
+
+DB_FILE = 'dossiers.db'
+
+# Pages déjà lues (et pages voisines préchargées), partagées par toutes les sessions du processus
+PAGE_CACHE = PageCache(DB_FILE)
+
+# --- Défilement continu ---
+SCROLL_CHUNK_SIZE = 20      # Dossiers ajoutés à chaque approche du bas de la liste
+MAX_LOADED_CHUNKS = 5       # Au-delà, les blocs sortis de l'écran sont retirés de la liste
+SCROLL_THRESHOLD_PX = 300   # Distance au bord de la liste qui déclenche un chargement
+
 def main(page: ft.Page):
     # Configuration de la page
     page.title = "Gestion des Dossiers"
+    ui_profile.attach(page)  # FLETAPP_UI_PROFILE=1 : coût du rendu par gestionnaire
     page.theme_mode = ft.ThemeMode.LIGHT
     page.scroll = ft.ScrollMode.AUTO
     page.padding = 20
     page.window_min_width = 800
     page.window_min_height = 600
 
-    # Connexion à la base de données
-    conn = sqlite3.connect('dossiers.db', check_same_thread=False)
-    cursor = conn.cursor()
-    
-    # Création de la table
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS dossiers (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        numero TEXT NOT NULL,
-        date TEXT NOT NULL,
-        personne TEXT NOT NULL,
-        objet TEXT NOT NULL,
-        numero_reference TEXT,
-        date_debut TEXT,
-        date_fin TEXT,
-        observation TEXT,
-        created_at TEXT DEFAULT CURRENT_TIMESTAMP
-    )
-    ''')
-    conn.commit()
+    # Création de la table (connexion d'écriture partagée du pool)
+    with writer(DB_FILE) as conn:
+        create_schema(conn)
 
     # Variables pour la pagination et recherche
     current_page = 1
     items_per_page = 10
     total_items = 0
+    page_full = False   # La page affichée est complète (il peut y avoir une page suivante)
     current_search_query = ""
+    # Clés (sort_key, id) de la première et de la dernière ligne de la page affichée
+    first_key = None
+    last_key = None
+    # Seule la dernière page demandée est affichée si plusieurs chargements se chevauchent
+    page_requests = db_worker.LatestOnly()
+
+    # Défilement continu : la liste ne garde que MAX_LOADED_CHUNKS blocs chargés.
+    # chunks : [(clé de la première ligne, clé de la dernière ligne, nombre de cartes)]
+    infinite_scroll = False
+    chunks = []
+    scroll_token = None
+    scroll_loading = False
+    evicted_before = False   # Des blocs ont été retirés en haut de la liste
+    at_end = False           # Le dernier dossier est chargé
+
+    # Dossiers complets déjà chargés (détails, édition), par id, pour la session
+    details_cache = {}
 
     # Styles réutilisables
     card_style = ft.ButtonStyle(
@@ -57,7 +77,7 @@ def main(page: ft.Page):
         label="Rechercher par numéro, personne ou objet...",
         prefix_icon=ft.Icons.SEARCH,
         expand=True,
-        on_submit=lambda e: search_dossiers(),
+        on_submit=lambda e: new_search(),
         border_radius=10,
         filled=True,
         hint_text="Entrez des mots-clés...",
@@ -72,7 +92,7 @@ def main(page: ft.Page):
     search_button = ft.ElevatedButton(
         "Rechercher",
         icon=ft.Icons.SEARCH,
-        on_click=lambda e: search_dossiers(),
+        on_click=lambda e: new_search(),
         style=button_style
     )
 
@@ -83,13 +103,36 @@ def main(page: ft.Page):
         style=button_style
     )
 
+    export_button = ft.ElevatedButton(
+        "Exporter",
+        icon=ft.Icons.DOWNLOAD,
+        on_click=lambda e: export_picker.save_file(
+            dialog_title="Exporter les dossiers",
+            file_name="dossiers.csv.gz",
+            allowed_extensions=["csv", "jsonl", "gz"]
+        ),
+        tooltip="Exporter la recherche en cours (CSV, JSONL, .gz)",
+        style=button_style
+    )
+
     results_container = ft.ListView(
         expand=True,
         spacing=10,
         padding=10,
-        auto_scroll=False
+        auto_scroll=False,
+        on_scroll=lambda e: on_results_scroll(e),
+        on_scroll_interval=100
     )
 
+    scroll_switch = ft.Switch(
+        label="Défilement continu",
+        value=False,
+        on_change=lambda e: toggle_infinite_scroll(e.control.value)
+    )
+
+    # Indicateur affiché pendant qu'une requête tourne en arrière-plan
+    loading_bar = ft.ProgressBar(visible=False)
+
     pagination_controls = ft.Row(
         [],
         alignment=ft.MainAxisAlignment.CENTER,
@@ -112,55 +155,251 @@ def main(page: ft.Page):
         last_date=datetime(2100, 12, 31)
     )
     
+    export_picker = ft.FilePicker(on_result=lambda e: e.path and export_results(e.path))
+
     # Add date pickers to page overlay
-    page.overlay.extend([date_picker, debut_picker, fin_picker])
+    page.overlay.extend([date_picker, debut_picker, fin_picker, export_picker])
 
-    def load_dossiers():
-        nonlocal total_items, current_search_query
-        
+    def load_dossiers(direction="current"):
         if current_search_query:
-            search_dossiers()
+            search_dossiers(direction)
             return
             
-        cursor.execute("SELECT COUNT(*) FROM dossiers")
-        total_items = cursor.fetchone()[0]
-        
-        offset = (current_page - 1) * items_per_page
-        cursor.execute(
-            "SELECT id, numero, date, personne, objet, numero_reference, date_debut, date_fin, observation FROM dossiers ORDER BY created_at DESC LIMIT ? OFFSET ?",
-            (items_per_page, offset)
-        )
-        display_results(cursor.fetchall())
-        update_pagination()
+        fetch_page(None, direction)
 
-    def search_dossiers():
-        nonlocal total_items, current_search_query
-        query = search_field.value.strip()
-        current_search_query = query
+    def new_search():
+        nonlocal current_page, current_search_query
+        current_page = 1
+        current_search_query = search_field.value.strip()
+        search_dossiers("first")
+
+    def search_dossiers(direction="current"):
+        nonlocal current_search_query
         
-        if query:
-            sql = """
-            SELECT id, numero, date, personne, objet, numero_reference, date_debut, date_fin, observation, COUNT(*) OVER() as total 
-            FROM dossiers 
-            WHERE numero LIKE ? OR personne LIKE ? OR objet LIKE ? OR numero_reference LIKE ? OR date LIKE ? OR date_debut LIKE ?
-            ORDER BY created_at DESC
-            LIMIT ? OFFSET ?
-            """
-            param = f"%{query}%"
-            offset = (current_page - 1) * items_per_page
-            cursor.execute(sql, (param, param, param, param, param, param, items_per_page, offset))
-            
-            results = cursor.fetchall()
-            if results:
-                total_items = results[0][-1]
-            else:
-                total_items = 0
-            display_results([row[:-1] for row in results])
+        match = fts_match_expression(current_search_query)
+        if match:
+            fetch_page(match, direction)
         else:
             current_search_query = ""
-            load_dossiers()
+            load_dossiers(direction)
+
+    def fetch_page(match, direction):
+        # Charge une page par curseur à partir des clés de la page affichée,
+        # sur un thread du pool db_worker
+        if infinite_scroll:
+            # En défilement continu, tout rechargement repart du début de la liste
+            load_chunk(match, "first")
+            return
+        token = page_requests.next()
+        key = last_key if direction == "next" else first_key
+
+        cached = PAGE_CACHE.get((match, current_page, items_per_page))
+        if cached is not None:
+            # Page déjà lue ou préchargée : affichage immédiat, sans requête
+            total, results = cached
+            show_page(total, direction, results)
+            prefetch_neighbours(match)
+            return
+        generation = PAGE_CACHE.generation
+
+        def work():
+            conn = get_reader(DB_FILE)
+            total = count_results(conn, match)
+            total_pages = max(1, (total + items_per_page - 1) // items_per_page)
+            last_page_size = total - (total_pages - 1) * items_per_page
+
+            page_direction = direction
+            results = fetch_dossiers_page(conn, match, page_direction, key, items_per_page, last_page_size)
+            if not results and page_direction == "current" and total:
+                # La page courante a été vidée (suppression) : on recule sur la dernière page
+                page_direction = "last"
+                results = fetch_dossiers_page(conn, match, page_direction, None, items_per_page, last_page_size)
+            return total, page_direction, results
+
+        def done(result):
+            if not page_requests.is_current(token):
+                return # Une page plus récente a été demandée entre-temps
+            total, page_direction, results = result
+            show_page(total, page_direction, results)
+            PAGE_CACHE.put((match, current_page, items_per_page), (total, results), generation)
+            prefetch_neighbours(match)
+
+        db_worker.submit(page, work, done, lambda ex: show_error(f"Erreur de chargement: {ex}"), loading=loading_bar, handler="search")
+
+    def count_capped():
+        # Recherche de plus de COUNT_CAP résultats : le total exact n'est pas calculé
+        return bool(current_search_query) and total_items > COUNT_CAP
+
+    def has_next_page():
+        total_pages = max(1, (total_items + items_per_page - 1) // items_per_page)
+        if count_capped():
+            return page_full
+        return current_page < total_pages
+
+    def show_page(total, page_direction, results):
+        nonlocal total_items, current_page, first_key, last_key, page_full
+        total_items = total
+        page_full = len(results) == items_per_page
+        total_pages = max(1, (total_items + items_per_page - 1) // items_per_page)
+
+        if page_direction == "first":
+            current_page = 1
+        elif page_direction == "last":
+            current_page = total_pages
+        current_page = max(current_page, 1)
+        if not count_capped():
+            current_page = min(current_page, total_pages)
+
+        first_key = page_key(results[0]) if results else None
+        last_key = page_key(results[-1]) if results else None
+        display_results(results)
         update_pagination()
 
+    def prefetch_neighbours(match):
+        # Pendant la lecture de la page, les pages suivante et précédente sont
+        # lues en arrière-plan : le prochain clic les trouve dans PAGE_CACHE
+        neighbours = []
+        if has_next_page():
+            neighbours.append((current_page + 1, "next", last_key))
+        if current_page > 1:
+            neighbours.append((current_page - 1, "previous", first_key))
+        neighbours = [n for n in neighbours if (match, n[0], items_per_page) not in PAGE_CACHE]
+        if not neighbours:
+            return
+        total = total_items
+        generation = PAGE_CACHE.generation
+
+        def work():
+            conn = get_reader(DB_FILE)
+            for number, direction, key in neighbours:
+                results = fetch_dossiers_page(conn, match, direction, key, items_per_page)
+                PAGE_CACHE.put((match, number, items_per_page), (total, results), generation)
+
+        # Sans indicateur ni mise à jour de l'interface ; un échec laisse simplement la page hors cache
+        db_worker.EXECUTOR.submit(sql_trace.tagged("search", work))
+
+    def load_chunk(match, direction):
+        # Défilement continu : "first" (nouvelle liste), "next" (bloc suivant, en bas)
+        # ou "previous" (bloc retiré plus tôt, en haut)
+        nonlocal scroll_token, scroll_loading
+        if direction == "first":
+            scroll_token = page_requests.next()
+        token = scroll_token
+        scroll_loading = True
+        if direction == "next":
+            key = chunks[-1][1]
+        elif direction == "previous":
+            key = chunks[0][0]
+        else:
+            key = None
+
+        def work():
+            conn = get_reader(DB_FILE)
+            total = None
+            if direction == "first":
+                total = count_results(conn, match)
+            return total, fetch_dossiers_page(conn, match, direction, key, SCROLL_CHUNK_SIZE)
+
+        def done(result):
+            nonlocal total_items, scroll_loading, evicted_before, at_end
+            if not page_requests.is_current(token):
+                return # Nouvelle recherche ou changement de mode entre-temps
+            scroll_loading = False
+            total, results = result
+            if direction == "first":
+                total_items = total
+                chunks.clear()
+                evicted_before = False
+                at_end = len(results) < SCROLL_CHUNK_SIZE
+                display_results(results)
+                if results:
+                    chunks.append((page_key(results[0]), page_key(results[-1]), len(results)))
+                results_container.scroll_to(offset=0, duration=0)
+                update_pagination()
+                return
+
+            if direction == "next":
+                at_end = len(results) < SCROLL_CHUNK_SIZE
+            else:
+                evicted_before = len(results) == SCROLL_CHUNK_SIZE
+            if not results:
+                return
+            append_chunk(direction, results)
+
+        def failed(ex):
+            nonlocal scroll_loading
+            scroll_loading = False
+            show_error(f"Erreur de chargement: {ex}")
+
+        db_worker.submit(page, work, done, failed, loading=loading_bar, handler="search")
+
+    def append_chunk(direction, results):
+        # Ajoute un bloc de cartes du côté demandé et retire le bloc le plus éloigné
+        # au-delà de MAX_LOADED_CHUNKS : le nombre de contrôles reste borné
+        nonlocal evicted_before, at_end
+        cards = [create_dossier_card(row) for row in results]
+        chunk = (page_key(results[0]), page_key(results[-1]), len(cards))
+        if direction == "next":
+            anchor = results_container.controls[-1].key
+            results_container.controls.extend(cards)
+            chunks.append(chunk)
+            if len(chunks) > MAX_LOADED_CHUNKS:
+                dropped = chunks.pop(0)
+                del results_container.controls[:dropped[2]]
+                evicted_before = True
+        else:
+            anchor = results_container.controls[0].key
+            results_container.controls[0:0] = cards
+            chunks.insert(0, chunk)
+            if len(chunks) > MAX_LOADED_CHUNKS:
+                dropped = chunks.pop()
+                del results_container.controls[-dropped[2]:]
+                at_end = False
+        page.update()
+        # Les cartes retirées décalent le contenu : on garde à l'écran celle que l'on regardait
+        results_container.scroll_to(key=anchor, duration=0)
+
+    def on_results_scroll(e):
+        if not infinite_scroll or scroll_loading or not chunks:
+            return
+        match = fts_match_expression(current_search_query)
+        if e.pixels >= e.max_scroll_extent - SCROLL_THRESHOLD_PX and not at_end:
+            load_chunk(match, "next")
+        elif e.pixels <= e.min_scroll_extent + SCROLL_THRESHOLD_PX and evicted_before:
+            load_chunk(match, "previous")
+
+    def toggle_infinite_scroll(enabled):
+        nonlocal infinite_scroll, current_page
+        infinite_scroll = enabled
+        current_page = 1
+        load_dossiers("first")
+
+    def export_results(path):
+        # Export du filtre affiché, écrit au fil de l'eau sur un thread du pool
+        def done(result):
+            count, elapsed = result
+            rate = count / elapsed if elapsed > 0 else 0
+            page.snack_bar = ft.SnackBar(
+                content=ft.Text(f"{count} dossiers exportés en {elapsed:.1f} s ({rate:.0f} lignes/s)"),
+                action="OK",
+                bgcolor=ft.Colors.GREEN_700
+            )
+            page.snack_bar.open = True
+
+        db_worker.submit(
+            page, lambda: export_dossiers(path, current_search_query, DB_FILE), done,
+            lambda ex: show_error(f"Erreur lors de l'export: {ex}"),
+            loading=loading_bar, handler="export"
+        )
+
+    def show_error(message):
+        page.snack_bar = ft.SnackBar(
+            content=ft.Text(message),
+            action="OK",
+            bgcolor=ft.Colors.RED
+        )
+        page.snack_bar.open = True
+
     def display_results(results):
         results_container.controls.clear()
         
@@ -184,6 +423,7 @@ def main(page: ft.Page):
 
     def create_dossier_card(row):
         return ft.Card(
+            key=f"dossier-{row[0]}",
             elevation=5,
             content=ft.Container(
                 content=ft.Column([
@@ -194,7 +434,7 @@ def main(page: ft.Page):
                             style=title_style
                         ),
                         subtitle=ft.Text(
-                            f"Par {row[3]} - {row[4]}",
+                            f"Par {row[2]} - {row[3]}",
                             style=text_style
                         ),
                         trailing=ft.PopupMenuButton(
@@ -203,7 +443,7 @@ def main(page: ft.Page):
                                 ft.PopupMenuItem(
                                     text="Modifier",
                                     icon=ft.Icons.EDIT,
-                                    on_click=lambda e, r=row: open_edit_dialog(r)
+                                    on_click=lambda e, dossier_id=row[0]: edit_dossier(dossier_id)
                                 ),
                                 ft.PopupMenuItem(
                                     text="Supprimer",
@@ -215,26 +455,13 @@ def main(page: ft.Page):
                     ),
                     ft.ExpansionTile(
                         title=ft.Text("Détails du dossier"),
+                        # Détails chargés à la première ouverture seulement
                         controls=[
-                            ft.ListTile(
-                                title=ft.Text("Date"),
-                                subtitle=ft.Text(row[2]),
-                            ),
-                            ft.ListTile(
-                                title=ft.Text("Référence"),
-                                subtitle=ft.Text(row[5] or "Non spécifié"),
-                            ),
-                            ft.ListTile(
-                                title=ft.Text("Période"),
-                                subtitle=ft.Text(
-                                    f"{row[6] or 'Non spécifié'} au {row[7] or 'Non spécifié'}"
-                                ),
-                            ),
-                            ft.ListTile(
-                                title=ft.Text("Observation"),
-                                subtitle=ft.Text(row[8] or "Aucune observation"),
-                            )
-                        ]
+                            ft.ListTile(title=ft.Text("Chargement...", style=text_style))
+                        ],
+                        on_change=lambda e, dossier_id=row[0]: (
+                            e.data == "true" and load_details(e.control, dossier_id)
+                        )
                     )
                 ]),
                 padding=10,
@@ -243,6 +470,57 @@ def main(page: ft.Page):
             margin=5
         )
 
+    def detail_tiles(dossier):
+        return [
+            ft.ListTile(
+                title=ft.Text("Date"),
+                subtitle=ft.Text(dossier[2]),
+            ),
+            ft.ListTile(
+                title=ft.Text("Référence"),
+                subtitle=ft.Text(dossier[5] or "Non spécifié"),
+            ),
+            ft.ListTile(
+                title=ft.Text("Période"),
+                subtitle=ft.Text(
+                    f"{dossier[6] or 'Non spécifié'} au {dossier[7] or 'Non spécifié'}"
+                ),
+            ),
+            ft.ListTile(
+                title=ft.Text("Observation"),
+                subtitle=ft.Text(dossier[8] or "Aucune observation"),
+            )
+        ]
+
+    def with_dossier(dossier_id, on_loaded):
+        # Appelle on_loaded(dossier complet) : depuis le cache, sinon après lecture par id
+        if dossier_id in details_cache:
+            on_loaded(details_cache[dossier_id])
+            page.update()
+            return
+
+        def done(dossier):
+            if dossier is None:
+                show_error("Ce dossier n'existe plus")
+                return
+            details_cache[dossier_id] = dossier
+            on_loaded(dossier)
+
+        db_worker.submit(
+            page, lambda: fetch_dossier(get_reader(DB_FILE), dossier_id), done,
+            lambda ex: show_error(f"Erreur de chargement: {ex}"),
+            loading=loading_bar, handler="detail"
+        )
+
+    def load_details(tile, dossier_id):
+        def fill(dossier):
+            tile.controls = detail_tiles(dossier)
+
+        with_dossier(dossier_id, fill)
+
+    def edit_dossier(dossier_id):
+        with_dossier(dossier_id, open_edit_dialog)
+
     def open_edit_dialog(dossier):
         def save_dossier(e):
             if not numero_field.value or not date_field.value or not personne_field.value or not objet_field.value:
@@ -255,44 +533,48 @@ def main(page: ft.Page):
                 page.update()
                 return
             
-            try:
+            def work():
+                with writer(DB_FILE) as conn:
+                    if dossier:
+                        conn.execute("""
+                        UPDATE dossiers SET 
+                        numero=?, date=?, personne=?, objet=?, 
+                        numero_reference=?, date_debut=?, date_fin=?, observation=?
+                        WHERE id=?
+                        """, (
+                            numero_field.value,
+                            date_field.value,
+                            personne_field.value,
+                            objet_field.value,
+                            ref_field.value.strip() if ref_field.value else None,
+                            debut_field.value.strip() if debut_field.value else None,
+                            fin_field.value.strip() if fin_field.value else None,
+                            obs_field.value.strip() if obs_field.value else None,
+                            dossier[0]
+                        ))
+                        return "Dossier mis à jour avec succès !"
+                    else:
+                        conn.execute("""
+                        INSERT INTO dossiers (
+                            numero, date, personne, objet, 
+                            numero_reference, date_debut, date_fin, observation
+                        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                        """, (
+                            numero_field.value,
+                            date_field.value,
+                            personne_field.value,
+                            objet_field.value,
+                            ref_field.value.strip() if ref_field.value else None,
+                            debut_field.value.strip() if debut_field.value else None,
+                            fin_field.value.strip() if fin_field.value else None,
+                            obs_field.value.strip() if obs_field.value else None
+                        ))
+                        return "Nouveau dossier créé avec succès !"
+            
+            def done(message):
+                PAGE_CACHE.invalidate()
                 if dossier:
-                    cursor.execute("""
-                    UPDATE dossiers SET 
-                    numero=?, date=?, personne=?, objet=?, 
-                    numero_reference=?, date_debut=?, date_fin=?, observation=?
-                    WHERE id=?
-                    """, (
-                        numero_field.value,
-                        date_field.value,
-                        personne_field.value,
-                        objet_field.value,
-                        ref_field.value.strip() if ref_field.value else None,
-                        debut_field.value.strip() if debut_field.value else None,
-                        fin_field.value.strip() if fin_field.value else None,
-                        obs_field.value.strip() if obs_field.value else None,
-                        dossier[0]
-                    ))
-                    message = "Dossier mis à jour avec succès !"
-                else:
-                    cursor.execute("""
-                    INSERT INTO dossiers (
-                        numero, date, personne, objet, 
-                        numero_reference, date_debut, date_fin, observation
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                    """, (
-                        numero_field.value,
-                        date_field.value,
-                        personne_field.value,
-                        objet_field.value,
-                        ref_field.value.strip() if ref_field.value else None,
-                        debut_field.value.strip() if debut_field.value else None,
-                        fin_field.value.strip() if fin_field.value else None,
-                        obs_field.value.strip() if obs_field.value else None
-                    ))
-                    message = "Nouveau dossier créé avec succès !"
-                
-                conn.commit()
+                    details_cache.pop(dossier[0], None)
                 dialog.open = False
                 page.update()
                 
@@ -304,25 +586,18 @@ def main(page: ft.Page):
                 page.snack_bar.open = True
                 
                 load_dossiers()
-            except sqlite3.IntegrityError as ex:
-                error_msg = f"Erreur de base de données: {str(ex)}"
-                if "UNIQUE constraint failed: dossiers.numero" in str(ex):
-                     error_msg = "Un dossier avec ce numéro existe déjà."
-                page.snack_bar = ft.SnackBar(
-                    content=ft.Text(error_msg),
-                    action="OK",
-                    bgcolor=ft.Colors.RED
-                )
-                page.snack_bar.open = True
-            except Exception as ex:
-                page.snack_bar = ft.SnackBar(
-                    content=ft.Text(f"Une erreur est survenue: {str(ex)}"),
-                    action="OK",
-                    bgcolor=ft.Colors.RED
-                )
-                page.snack_bar.open = True
-            finally:
-                page.update()
+
+            def failed(ex):
+                if isinstance(ex, sqlite3.IntegrityError):
+                    error_msg = f"Erreur de base de données: {str(ex)}"
+                    if "UNIQUE constraint failed: dossiers.numero" in str(ex):
+                         error_msg = "Un dossier avec ce numéro existe déjà."
+                    show_error(error_msg)
+                else:
+                    show_error(f"Une erreur est survenue: {str(ex)}")
+
+            # L'écriture part sur le pool : la fenêtre reste réactive pendant l'enregistrement
+            db_worker.submit(page, work, done, failed, loading=loading_bar, handler="save")
 
         # Fonctions pour les date pickers
         def open_date_picker(e):
@@ -505,9 +780,13 @@ def main(page: ft.Page):
         print("--- Exiting open_edit_dialog ---") # DEBUG PRINT
     def delete_dossier(dossier_id):
         def confirm_delete(e):
-            try:
-                cursor.execute("DELETE FROM dossiers WHERE id=?", (dossier_id,))
-                conn.commit()
+            def work():
+                with writer(DB_FILE) as conn:
+                    conn.execute("DELETE FROM dossiers WHERE id=?", (dossier_id,))
+
+            def done(result):
+                PAGE_CACHE.invalidate()
+                details_cache.pop(dossier_id, None)
                 dialog.open = False
                 page.update()
                 
@@ -519,15 +798,12 @@ def main(page: ft.Page):
                 page.snack_bar.open = True
                 
                 load_dossiers()
-            except Exception as ex:
-                page.snack_bar = ft.SnackBar(
-                    content=ft.Text(f"Erreur lors de la suppression: {str(ex)}"),
-                    action="OK",
-                    bgcolor=ft.Colors.RED
-                )
-                page.snack_bar.open = True
-            finally:
-                page.update()
+
+            db_worker.submit(
+                page, work, done,
+                lambda ex: show_error(f"Erreur lors de la suppression: {str(ex)}"),
+                loading=loading_bar, handler="delete"
+            )
 
         dialog = ft.AlertDialog(
             modal=True,
@@ -557,13 +833,25 @@ def main(page: ft.Page):
         pagination_controls.controls.clear()
         total_pages = max(1, (total_items + items_per_page - 1) // items_per_page)
         
+        total_label = f"{COUNT_CAP}+" if count_capped() else str(total_items)
+
+        if infinite_scroll:
+            pagination_controls.controls.append(
+                ft.Text(
+                    f"{total_label} dossiers",
+                    style=ft.TextStyle(size=14, weight=ft.FontWeight.BOLD)
+                )
+            )
+            page.update()
+            return
+
         if total_pages <= 1 and current_search_query == "":
             return
 
         pagination_controls.controls.append(
             ft.IconButton(
                 icon=ft.Icons.FIRST_PAGE,
-                on_click=lambda e: change_page(1),
+                on_click=lambda e: change_page("first"),
                 disabled=current_page <= 1,
                 tooltip="Première page"
             )
@@ -572,15 +860,16 @@ def main(page: ft.Page):
         pagination_controls.controls.append(
             ft.IconButton(
                 icon=ft.Icons.CHEVRON_LEFT,
-                on_click=lambda e: change_page(-1),
+                on_click=lambda e: change_page("previous"),
                 disabled=current_page <= 1,
                 tooltip="Page précédente"
             )
         )
         
+        page_label = f"Page {current_page}" if count_capped() else f"Page {current_page}/{total_pages}"
         pagination_controls.controls.append(
             ft.Text(
-                f"Page {current_page}/{total_pages} ({total_items} dossiers)",
+                f"{page_label} ({total_label} dossiers)",
                 style=ft.TextStyle(size=14, weight=ft.FontWeight.BOLD)
             )
         )
@@ -588,8 +877,8 @@ def main(page: ft.Page):
         pagination_controls.controls.append(
             ft.IconButton(
                 icon=ft.Icons.CHEVRON_RIGHT,
-                on_click=lambda e: change_page(1),
-                disabled=current_page >= total_pages,
+                on_click=lambda e: change_page("next"),
+                disabled=not has_next_page(),
                 tooltip="Page suivante"
             )
         )
@@ -597,27 +886,33 @@ def main(page: ft.Page):
         pagination_controls.controls.append(
             ft.IconButton(
                 icon=ft.Icons.LAST_PAGE,
-                on_click=lambda e: change_page(total_pages),
-                disabled=current_page >= total_pages,
+                on_click=lambda e: change_page("last"),
+                # Dernière page inconnue tant que le total est plafonné
+                disabled=current_page >= total_pages or count_capped(),
                 tooltip="Dernière page"
             )
         )
         
         page.update()
 
-    def change_page(delta):
+    def change_page(direction):
+        # direction : "first", "previous", "next" ou "last"
         nonlocal current_page
         total_pages = max(1, (total_items + items_per_page - 1) // items_per_page)
         
-        new_page = current_page + delta if isinstance(delta, int) else delta
+        new_page = {
+            "first": 1,
+            "previous": current_page - 1,
+            "next": current_page + 1,
+            "last": total_pages,
+        }[direction]
         
-        if 1 <= new_page <= total_pages:
+        if direction == "next" and has_next_page() or 1 <= new_page <= total_pages:
             current_page = new_page
             if current_search_query:
-                search_dossiers()
+                search_dossiers(direction)
             else:
-                load_dossiers()
-        page.update()
+                load_dossiers(direction)
             
     # Layout principal
     page.add(
@@ -628,6 +923,7 @@ def main(page: ft.Page):
                     style=ft.TextStyle(size=24, weight=ft.FontWeight.BOLD),
                     expand=True
                 ),
+                scroll_switch,
                 ft.IconButton(
                     icon=ft.Icons.REFRESH,
                     on_click=lambda e: load_dossiers(),
@@ -638,9 +934,11 @@ def main(page: ft.Page):
             ft.Row([
                 search_field,
                 search_button,
-                add_button
+                add_button,
+                export_button
             ], spacing=10),
             ft.Divider(height=10),
+            loading_bar,
             ft.Container(
                 content=results_container,
                 border=ft.border.all(1, ft.Colors.GREY_300),
@@ -653,7 +951,7 @@ def main(page: ft.Page):
     )
 
     # Chargement initial des dossiers
-    load_dossiers()
+    load_dossiers("first")
 
 if __name__ == "__main__":
     ft.app(target=main)
\ No newline at end of file
@@ -1,14 +1,93 @@
 import flet as ft
-import oracledb as cx_Oracle
 from datetime import datetime
 
+import db_worker
+from detail_queries import (HISTORY_FIELDS, OWNED_VEHICLE_FIELDS, OWNER_COLUMNS, OWNER_DETAILS_SQL, VEHICLE_COLUMNS,
+                            VEHICLE_DETAILS_SQL, as_rows, clob_as_text, column_values, decode_history)
+from oracle_pool import BACKEND, DatabaseError, create_pool
+from search_keys import prefix_range
+import sql_trace
+import ui_profile
+
 # Configuration de la connexion Oracle
 ORACLE_USER = "user_dev"
 ORACLE_PASSWORD = "user_dev"
 ORACLE_DSN = "localhost:1522/XEPDB1"
+# Dialecte des requêtes agrégées en JSON (le remplaçant local exécute du SQL SQLite)
+SQL_DIALECT = "sqlite" if BACKEND == "sqlite" else "oracle"
+
+# Pool de sessions partagé, créé une seule fois au démarrage
+pool = None
+
+def init_pool():
+    global pool
+    if pool is None:
+        pool = create_pool(ORACLE_USER, ORACLE_PASSWORD, ORACLE_DSN, output_type_handler=clob_as_text)
+    return pool
+
+# Requêtes des écrans, exécutées sur un thread du pool db_worker avec un curseur
+# emprunté par run_with_cursor (fonctions du module : check_query_plans.py les rejoue)
+def fetch_search_results(cursor, query):
+    # Recherche par préfixe sans accents ni casse, sur les colonnes *_cle indexées
+    # (voir search_keys_oracle.sql) : parcours d'intervalle au lieu d'un LIKE '%...%'
+    bounds = prefix_range(query)
+    if bounds is None:
+        return []
+    params = {'low': bounds[0], 'high': bounds[1]}
+
+    # Recherche dans les véhicules
+    cursor.execute("""
+        SELECT 'VEHICULE' as type, id_vehicule as id, immatriculation as libelle
+        FROM vehicule 
+        WHERE (UPPER(immatriculation) >= :low AND UPPER(immatriculation) < :high)
+           OR (marque_cle >= :low AND marque_cle < :high)
+           OR (modele_cle >= :low AND modele_cle < :high)
+    """, params)
+    vehicules = cursor.fetchall()
+
+    # Recherche dans les propriétaires
+    cursor.execute("""
+        SELECT 'PROPRIETAIRE' as type, id_proprietaire as id, 
+               CASE 
+                 WHEN type_proprietaire = 'PHYSIQUE' THEN nom || ' ' || prenom
+                 ELSE raison_sociale
+               END as libelle
+        FROM proprietaire 
+        WHERE (type_proprietaire = 'PHYSIQUE' AND ((nom_cle >= :low AND nom_cle < :high)
+                                                   OR (prenom_cle >= :low AND prenom_cle < :high)))
+           OR (type_proprietaire = 'MORALE' AND raison_sociale_cle >= :low AND raison_sociale_cle < :high)
+    """, params)
+    proprietaires = cursor.fetchall()
+
+    return vehicules + proprietaires
+
+def fetch_vehicle_details(cursor, vehicle_id):
+    # Véhicule, propriétaire actuel et historique en un seul aller-retour, l'historique
+    # agrégé en JSON (voir detail_queries.py) ; vehicule_current_owner : voir
+    # current_owner_oracle.sql (triggers + job quotidien)
+    cursor.execute(VEHICLE_DETAILS_SQL[SQL_DIALECT], {'id': vehicle_id})
+    row = cursor.fetchone()
+    if not row:
+        return None, []
+    # Les 6 colonnes du véhicule puis propriétaire et date, lues par nom : les colonnes
+    # ajoutées à vehicule (clés de recherche, search_keys_oracle.sql) ne décalent rien
+    vehicule = column_values(cursor.description, row, VEHICLE_COLUMNS)
+    historique, = column_values(cursor.description, row, ('historique',))
+    return vehicule, as_rows(decode_history(historique), HISTORY_FIELDS)
+
+def fetch_owner_details(cursor, owner_id):
+    # Propriétaire et véhicules possédés en un seul aller-retour
+    cursor.execute(OWNER_DETAILS_SQL[SQL_DIALECT], {'id': owner_id})
+    row = cursor.fetchone()
+    if not row:
+        return None, []
+    proprietaire = column_values(cursor.description, row, OWNER_COLUMNS)
+    vehicules, = column_values(cursor.description, row, ('vehicules',))
+    return proprietaire, as_rows(decode_history(vehicules), OWNED_VEHICLE_FIELDS)
 
 def main(page: ft.Page):
     page.title = "Consultation Véhicules & Propriétaires"
+    ui_profile.attach(page)  # FLETAPP_UI_PROFILE=1 : coût du rendu par gestionnaire
     page.theme_mode = ft.ThemeMode.LIGHT
     page.padding = 20
     page.vertical_alignment = ft.MainAxisAlignment.CENTER
@@ -16,17 +95,15 @@ def main(page: ft.Page):
     # État de l'application
     search_results = []
     selected_item = None
+    search_requests = db_worker.LatestOnly()
+    detail_requests = db_worker.LatestOnly()
     
     # Fonctions
     def connect_to_oracle():
+        # Emprunte une session au pool ; connection.close() la lui rend
         try:
-            connection = cx_Oracle.connect(
-                user=ORACLE_USER,
-                password=ORACLE_PASSWORD,
-                dsn=ORACLE_DSN
-            )
-            return connection
-        except cx_Oracle.DatabaseError as e:
+            return init_pool().acquire()
+        except DatabaseError as e:
             print("Erreur de connexion à Oracle:", e)
             return None
     
@@ -35,53 +112,40 @@ def main(page: ft.Page):
         page.snack_bar.open = True
         page.update()
     
+    def run_with_cursor(fetch, *args):
+        # Exécuté sur un thread du pool db_worker : emprunte une session,
+        # lance fetch(cursor, *args) puis rend la session au pool
+        connection = connect_to_oracle()
+        if not connection:
+            raise ConnectionError("Erreur de connexion à la base de données")
+        try:
+            cursor = sql_trace.trace_cursor(connection.cursor())
+            try:
+                return fetch(cursor, *args)
+            finally:
+                cursor.close()
+        finally:
+            connection.close()
+    
     def execute_search(e):
-        nonlocal search_results
         query = search_field.value.strip()
         
         if not query:
             return
-            
-        connection = connect_to_oracle()
-        if not connection:
-            show_snackbar("Erreur de connexion à la base de données")
-            return
-            
-        try:
-            cursor = connection.cursor()
-            
-            # Recherche dans les véhicules
-            cursor.execute("""
-                SELECT 'VEHICULE' as type, id_vehicule as id, immatriculation as libelle
-                FROM vehicule 
-                WHERE UPPER(immatriculation) LIKE UPPER(:query) 
-                   OR UPPER(marque) LIKE UPPER(:query) 
-                   OR UPPER(modele) LIKE UPPER(:query)
-            """, {'query': f'%{query}%'})
-            vehicules = cursor.fetchall()
-            
-            # Recherche dans les propriétaires
-            cursor.execute("""
-                SELECT 'PROPRIETAIRE' as type, id_proprietaire as id, 
-                       CASE 
-                         WHEN type_proprietaire = 'PHYSIQUE' THEN nom || ' ' || prenom
-                         ELSE raison_sociale
-                       END as libelle
-                FROM proprietaire 
-                WHERE (type_proprietaire = 'PHYSIQUE' AND (UPPER(nom) LIKE UPPER(:query) OR UPPER(prenom) LIKE UPPER(:query)))
-                   OR (type_proprietaire = 'MORALE' AND UPPER(raison_sociale) LIKE UPPER(:query))
-            """, {'query': f'%{query}%'})
-            proprietaires = cursor.fetchall()
-            
-            search_results = vehicules + proprietaires
+        token = search_requests.next()
+
+        def done(results):
+            nonlocal search_results
+            if not search_requests.is_current(token):
+                return # Une recherche plus récente a été lancée entre-temps
+            search_results = results
             display_results()
-            
-        except cx_Oracle.DatabaseError as e:
+
+        def failed(e):
             print("Erreur de requête:", e)
             show_snackbar("Erreur lors de la recherche")
-        finally:
-            cursor.close()
-            connection.close()
+
+        db_worker.submit(page, lambda: run_with_cursor(fetch_search_results, query), done, failed, loading=loading_ring, handler="search")
     
     def display_results():
         results_list.controls.clear()
@@ -106,47 +170,27 @@ def main(page: ft.Page):
     def show_details(item):
         nonlocal selected_item
         selected_item = item
-        details_container.controls.clear()
-        details_container.visible = True
+        token = detail_requests.next()
         
-        connection = connect_to_oracle()
-        if not connection:
-            show_snackbar("Erreur de connexion à la base de données")
-            return
-            
-        try:
-            cursor = connection.cursor()
-            
-            if item[0] == 'VEHICULE':
-                show_vehicle_details(cursor, item[1])
-            elif item[0] == 'PROPRIETAIRE':
-                show_owner_details(cursor, item[1])
-            
-        except cx_Oracle.DatabaseError as e:
+        if item[0] == 'VEHICULE':
+            fetch, render = fetch_vehicle_details, show_vehicle_details
+        else:
+            fetch, render = fetch_owner_details, show_owner_details
+
+        def done(result):
+            if not detail_requests.is_current(token):
+                return
+            details_container.controls.clear()
+            details_container.visible = True
+            render(*result)
+
+        def failed(e):
             print("Erreur de requête:", e)
             show_snackbar("Erreur lors du chargement des détails")
-        finally:
-            cursor.close()
-            connection.close()
-        
-        page.update()
+
+        db_worker.submit(page, lambda: run_with_cursor(fetch, item[1]), done, failed, loading=loading_ring, handler="detail")
     
-    def show_vehicle_details(cursor, vehicle_id):
-        cursor.execute("""
-            SELECT v.*, 
-                   CASE 
-                     WHEN p.type_proprietaire = 'PHYSIQUE' THEN p.nom || ' ' || p.prenom
-                     ELSE p.raison_sociale
-                   END as proprietaire_actuel,
-                   hp.date_debut
-            FROM vehicule v
-            LEFT JOIN historique_proprietaires hp ON v.id_vehicule = hp.id_vehicule
-            LEFT JOIN proprietaire p ON hp.id_proprietaire = p.id_proprietaire
-            WHERE v.id_vehicule = :id
-            AND (hp.date_fin IS NULL OR hp.date_fin > SYSDATE)
-        """, {'id': vehicle_id})
-        vehicule = cursor.fetchone()
-        
+    def show_vehicle_details(vehicule, historiques):
         if vehicule:
             details_container.controls.append(
                 ft.Text("Détails du Véhicule", size=20, weight=ft.FontWeight.BOLD)
@@ -167,21 +211,6 @@ def main(page: ft.Page):
                     ft.Text(f"{label}: {value}", size=16)
                 )
             
-            cursor.execute("""
-                SELECT 
-                    CASE 
-                      WHEN p.type_proprietaire = 'PHYSIQUE' THEN p.nom || ' ' || p.prenom
-                      ELSE p.raison_sociale
-                    END as nom_proprietaire,
-                    p.type_proprietaire,
-                    hp.date_debut, hp.date_fin
-                FROM historique_proprietaires hp
-                JOIN proprietaire p ON hp.id_proprietaire = p.id_proprietaire
-                WHERE hp.id_vehicule = :id
-                ORDER BY hp.date_debut DESC
-            """, {'id': vehicle_id})
-            historiques = cursor.fetchall()
-            
             if historiques:
                 details_container.controls.append(
                     ft.Text("\nHistorique des Propriétaires:", size=18, weight=ft.FontWeight.BOLD)
@@ -197,12 +226,7 @@ def main(page: ft.Page):
                         )
                     )
     
-    def show_owner_details(cursor, owner_id):
-        cursor.execute("""
-            SELECT * FROM proprietaire WHERE id_proprietaire = :id
-        """, {'id': owner_id})
-        proprietaire = cursor.fetchone()
-        
+    def show_owner_details(proprietaire, vehicules):
         if not proprietaire:
             return
             
@@ -240,16 +264,6 @@ def main(page: ft.Page):
                     ft.Text(f"{label}: {value}", size=16)
                 )
         
-        cursor.execute("""
-            SELECT v.immatriculation, v.marque, v.modele,
-                   hp.date_debut, hp.date_fin
-            FROM historique_proprietaires hp
-            JOIN vehicule v ON hp.id_vehicule = v.id_vehicule
-            WHERE hp.id_proprietaire = :id
-            ORDER BY hp.date_debut DESC
-        """, {'id': owner_id})
-        vehicules = cursor.fetchall()
-        
         if vehicules:
             details_container.controls.append(
                 ft.Text("\nVéhicules associés:", size=18, weight=ft.FontWeight.BOLD)
@@ -272,6 +286,8 @@ def main(page: ft.Page):
     )
     
     results_list = ft.ListView(expand=True)
+    # Indicateur affiché pendant qu'une requête tourne en arrière-plan
+    loading_ring = ft.ProgressRing(visible=False, width=20, height=20)
     details_container = ft.Column(
         scroll=ft.ScrollMode.AUTO,
         expand=True,
@@ -283,7 +299,8 @@ def main(page: ft.Page):
         ft.Column([
             ft.Row([
                 search_field,
-                ft.IconButton(icon=ft.Icons.SEARCH, on_click=execute_search)
+                ft.IconButton(icon=ft.Icons.SEARCH, on_click=execute_search),
+                loading_ring
             ]),
             ft.Row([
                 ft.Container(results_list, width=400),
@@ -293,4 +310,8 @@ def main(page: ft.Page):
     )
 
 if __name__ == "__main__":
+    try:
+        init_pool()
+    except DatabaseError as e:
+        print("Erreur de création du pool Oracle:", e)
     ft.app(target=main)
\ No newline at end of file
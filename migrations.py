@@ -0,0 +1,124 @@
+import sys
+
+from db_pool import writer
+from plate_index import create_plate_index
+from search_keys import create_search_keys, replace_search_key_triggers
+
+# Migrations du schéma SQLite, numérotées dans l'ordre d'application.
+# Les bases (dossiers.db, cars.db) n'ont pas les mêmes tables : chaque migration appartient
+# à un schéma (groupe de tables créées ensemble) et la table schema_versions garde, par
+# schéma, la dernière migration appliquée. Chaque base atteint ainsi la dernière version
+# des schémas qu'elle contient, sans rejouer à chaque démarrage ceux qu'elle n'a pas.
+# Chaque étape indique la table qu'elle concerne et n'est exécutée que si cette table
+# existe. Une migration dont une table manque encore n'est pas comptée comme appliquée ;
+# elle sera reprise par le prochain migrate(), après la création de la table (toutes les
+# étapes sont rejouables). Une étape est une requête, ou une fonction appelée avec la connexion.
+# PRAGMA user_version (version unique des premières versions) n'est plus utilisé.
+#
+# Appelé après la création des tables par chaque point d'entrée (database.create_schema,
+# list_cars, archive_app, setup_initial_tables). Les plans des requêtes de production sont
+# vérifiés par check_query_plans.py.
+#
+# Usage : python migrations.py [dossiers.db|cars.db]
+
+MIGRATIONS = (
+    (1, 'vehicules', "Historique des propriétaires : accès par véhicule et par propriétaire, déjà trié par date", (
+        # Remplacés par les index composites (même préfixe)
+        ('historique_proprietaires', "DROP INDEX IF EXISTS idx_historique_vehicule"),
+        ('historique_proprietaires', "DROP INDEX IF EXISTS idx_historique_proprietaire"),
+        ('historique_proprietaires', "CREATE INDEX IF NOT EXISTS idx_historique_vehicule_date ON historique_proprietaires(id_vehicule, date_debut)"),
+        ('historique_proprietaires', "CREATE INDEX IF NOT EXISTS idx_historique_proprietaire_date ON historique_proprietaires(id_proprietaire, date_debut)"),
+    )),
+    (2, 'dossiers', "Dossiers : date du dossier et date de création", (
+        ('dossiers', "CREATE INDEX IF NOT EXISTS idx_dossiers_date ON dossiers(date)"),
+        # Déjà créé par database.create_pagination_index ; retiré le temps d'un import massif
+        ('dossiers', "CREATE INDEX IF NOT EXISTS idx_dossiers_created_at_id ON dossiers(created_at, id)"),
+    )),
+    (3, 'vehicules', "Véhicules : recherche exacte d'immatriculation sans tenir compte de la casse", (
+        ('vehicule', "CREATE INDEX IF NOT EXISTS idx_vehicule_immatriculation_upper ON vehicule(UPPER(immatriculation))"),
+    )),
+    (4, 'proprietaires_actuels', "Propriétaires actuels : périodes terminées à traiter par le passage quotidien", (
+        ('vehicule_current_owner', "CREATE INDEX IF NOT EXISTS idx_current_owner_date_fin ON vehicule_current_owner(date_fin) WHERE date_fin IS NOT NULL"),
+    )),
+    (5, 'vehicules', "Clés de recherche sans accents ni casse (nom, prénom, raison sociale, marque, modèle)", (
+        ('proprietaire', lambda conn: create_search_keys(conn, 'proprietaire')),
+        ('vehicule', lambda conn: create_search_keys(conn, 'vehicule')),
+    )),
+    (6, 'vehicules', "Véhicules : index trigrammes des immatriculations (fragment au milieu d'une plaque)", (
+        ('vehicule', create_plate_index),
+    )),
+    (7, 'vehicules', "Clés de recherche : triggers en SQL pur, sans fonction fold_text() enregistrée par connexion", (
+        ('proprietaire', lambda conn: replace_search_key_triggers(conn, 'proprietaire')),
+        ('vehicule', lambda conn: replace_search_key_triggers(conn, 'vehicule')),
+    )),
+)
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+# Dernière migration de chaque schéma
+LATEST_VERSIONS = {schema: number for number, schema, _, _ in MIGRATIONS}
+
+VERSIONS_TABLE_SQL = '''
+    CREATE TABLE IF NOT EXISTS schema_versions (
+        schema TEXT PRIMARY KEY,
+        version INTEGER NOT NULL
+    )
+'''
+
+
+def schema_version(conn):
+    # {schéma: dernière migration appliquée}, pour les schémas présents dans la base
+    if not table_exists(conn, 'schema_versions'):
+        return {}
+    return {schema: version for schema, version in conn.execute("SELECT schema, version FROM schema_versions")}
+
+
+def table_exists(conn, table):
+    return conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)
+    ).fetchone() is not None
+
+
+def migrate(conn):
+    # Applique les migrations postérieures à la version de leur schéma (validé par
+    # l'appelant, en général en sortie de writer()). Retourne schema_version().
+    conn.execute(VERSIONS_TABLE_SQL)
+    versions = schema_version(conn)
+    reached = dict(versions)
+    blocked = set()
+    for number, schema, description, steps in MIGRATIONS:
+        if number <= versions.get(schema, 0):
+            continue
+        complete = True
+        for table, statement in steps:
+            if not table_exists(conn, table):
+                complete = False
+            elif callable(statement):
+                statement(conn)
+            else:
+                conn.execute(statement)
+        # La version d'un schéma n'avance que sur une suite continue de ses migrations complètes
+        if complete and schema not in blocked:
+            reached[schema] = number
+        else:
+            blocked.add(schema)
+    for schema, version in reached.items():
+        if version != versions.get(schema):
+            conn.execute(
+                "INSERT OR REPLACE INTO schema_versions (schema, version) VALUES (?, ?)", (schema, version)
+            )
+    return reached
+
+
+def format_versions(versions):
+    # "vehicules 6/6, dossiers 2/2" ; "aucun schéma" pour une base sans tables connues
+    return ', '.join(
+        f"{schema} {version}/{LATEST_VERSIONS[schema]}" for schema, version in versions.items()
+    ) or "aucun schéma"
+
+
+if __name__ == "__main__":
+    db_file = sys.argv[1] if len(sys.argv) > 1 else 'dossiers.db'
+    with writer(db_file) as conn:
+        before = schema_version(conn)
+        after = migrate(conn)
+    print(f"'{db_file}' : {format_versions(before)} -> {format_versions(after)}.")
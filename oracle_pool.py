@@ -0,0 +1,266 @@
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+from datetime import datetime
+
+try:
+    import oracledb
+except ImportError:  # Le remplaçant SQLite reste utilisable sans le client Oracle
+    oracledb = None
+
+# --- Dimensionnement du pool de sessions ---
+POOL_MIN = 2
+POOL_MAX = 8
+POOL_INCREMENT = 1
+STMT_CACHE_SIZE = 40      # Requêtes préparées conservées par session
+PING_INTERVAL = 60        # Secondes d'inactivité avant de vérifier une session à l'acquisition
+WAIT_TIMEOUT_MS = 5000    # Attente maximale d'une session libre quand le pool est plein
+
+# Backend : "oracle" (par défaut) ou "sqlite" pour travailler sans instance Oracle
+BACKEND = os.environ.get("FLETAPP_DB_BACKEND", "oracle")
+SQLITE_STANDIN_DB = os.environ.get("FLETAPP_SQLITE_DB", "cars.db")
+
+# Exceptions à intercepter quel que soit le backend
+if oracledb is not None:
+    DatabaseError = (oracledb.DatabaseError, sqlite3.Error)
+else:
+    DatabaseError = (sqlite3.Error,)
+
+
+def create_pool(user, password, dsn, min=POOL_MIN, max=POOL_MAX, increment=POOL_INCREMENT, backend=None,
+                output_type_handler=None):
+    # Crée le pool une fois au démarrage ; chaque clic emprunte ensuite une session
+    # déjà authentifiée au lieu de refaire un oracledb.connect complet.
+    # output_type_handler : outputtypehandler posé sur chaque session du pool, et
+    # seulement sur elles (par ex. detail_queries.clob_as_text) ; ignoré par le remplaçant
+    backend = backend or BACKEND
+    if backend == "sqlite":
+        return SQLitePool(SQLITE_STANDIN_DB, min=min, max=max)
+    if oracledb is None:
+        raise RuntimeError("Le module oracledb n'est pas installé (FLETAPP_DB_BACKEND=sqlite pour le remplaçant local)")
+    return oracledb.create_pool(
+        user=user,
+        password=password,
+        dsn=dsn,
+        min=min,
+        max=max,
+        increment=increment,
+        stmtcachesize=STMT_CACHE_SIZE,
+        ping_interval=PING_INTERVAL,
+        getmode=oracledb.POOL_GETMODE_TIMEDWAIT,
+        wait_timeout=WAIT_TIMEOUT_MS,
+        session_callback=_session_setup(output_type_handler) if output_type_handler else None,
+    )
+
+
+def _session_setup(output_type_handler):
+    # Appelé par oracledb à la première remise de chaque nouvelle session
+    def setup(connection, requested_tag):
+        connection.outputtypehandler = output_type_handler
+    return setup
+
+
+# --- Remplaçant local compatible avec le pool oracledb ---
+# Même interface (acquire/release/drop/close, opened/busy, connexions utilisables
+# en "with" et rendues au pool par close()), adossée à un fichier SQLite.
+
+# Colonnes DATE côté Oracle : converties en datetime comme le ferait oracledb
+DATE_COLUMNS = {"date_debut", "date_fin", "date_naissance"}
+_SYSDATE = re.compile(r"\bSYSDATE\b", re.IGNORECASE)
+
+
+class SQLitePool:
+    def __init__(self, db_file, min=POOL_MIN, max=POOL_MAX, stmtcachesize=STMT_CACHE_SIZE, connect_delay=0.0):
+        # connect_delay simule le coût d'une connexion réseau (poignée de main + authentification)
+        self.db_file = db_file
+        self.min = min
+        self.max = max
+        self.stmtcachesize = stmtcachesize
+        self.connect_delay = connect_delay
+        self._idle = []
+        self._opened = 0
+        self._busy = 0
+        self._closed = False
+        self._cond = threading.Condition()
+        for _ in range(min):
+            self._idle.append(self._connect())
+
+    @property
+    def opened(self):
+        return self._opened
+
+    @property
+    def busy(self):
+        return self._busy
+
+    def _connect(self):
+        conn = connect_standin(self.db_file, self.stmtcachesize, self.connect_delay)
+        conn._pool = self
+        self._opened += 1
+        return conn
+
+    def acquire(self):
+        with self._cond:
+            if self._closed:
+                raise sqlite3.ProgrammingError("Le pool est fermé")
+            deadline = time.monotonic() + WAIT_TIMEOUT_MS / 1000
+            while not self._idle and self._opened >= self.max:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not self._cond.wait(remaining):
+                    raise sqlite3.OperationalError("Aucune session libre dans le pool")
+            conn = self._idle.pop() if self._idle else self._connect()
+            self._busy += 1
+
+        # Vérification de santé : une session cassée est fermée (comme drop) et remplacée par une neuve
+        if not conn.ping():
+            conn._conn.close()
+            with self._cond:
+                self._opened -= 1
+                conn = self._connect()
+        return conn
+
+    def release(self, conn):
+        with self._cond:
+            self._busy -= 1
+            if self._closed:
+                conn._conn.close()
+                self._opened -= 1
+            else:
+                self._idle.append(conn)
+            self._cond.notify()
+
+    def drop(self, conn):
+        with self._cond:
+            self._busy -= 1
+            self._opened -= 1
+            conn._conn.close()
+            self._cond.notify()
+
+    def close(self, force=False):
+        with self._cond:
+            if self._busy and not force:
+                raise sqlite3.OperationalError("Des sessions du pool sont encore utilisées")
+            self._closed = True
+            for conn in self._idle:
+                conn._conn.close()
+                self._opened -= 1
+            self._idle.clear()
+
+
+class SQLiteStandinConnection:
+    def __init__(self, conn):
+        self._conn = conn
+        self._pool = None
+
+    def cursor(self):
+        return SQLiteStandinCursor(self._conn.cursor())
+
+    def commit(self):
+        self._conn.commit()
+
+    def rollback(self):
+        self._conn.rollback()
+
+    def ping(self):
+        try:
+            self._conn.execute("SELECT 1")
+            return True
+        except sqlite3.Error:
+            return False
+
+    def close(self):
+        # Comme avec oracledb, fermer une connexion issue du pool la lui rend
+        if self._pool is not None:
+            self._pool.release(self)
+        else:
+            self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class SQLiteStandinCursor:
+    def __init__(self, cursor):
+        self._cursor = cursor
+        self._date_indexes = ()
+
+    def execute(self, sql, params=()):
+        self._cursor.execute(_SYSDATE.sub("CURRENT_DATE", sql), params)
+        description = self._cursor.description or ()
+        self._date_indexes = [i for i, col in enumerate(description) if col[0].lower() in DATE_COLUMNS]
+        return self
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    def _convert(self, row):
+        if row is None or not self._date_indexes:
+            return row
+        row = list(row)
+        for i in self._date_indexes:
+            if row[i]:
+                row[i] = datetime.strptime(row[i][:10], "%Y-%m-%d")
+        return tuple(row)
+
+    def fetchone(self):
+        return self._convert(self._cursor.fetchone())
+
+    def fetchmany(self, size=100):
+        return [self._convert(row) for row in self._cursor.fetchmany(size)]
+
+    def fetchall(self):
+        return [self._convert(row) for row in self._cursor.fetchall()]
+
+    def __iter__(self):
+        for row in self._cursor:
+            yield self._convert(row)
+
+    def close(self):
+        self._cursor.close()
+
+
+def connect_standin(db_file, stmtcachesize=STMT_CACHE_SIZE, connect_delay=0.0):
+    # Connexion directe (hors pool), équivalent local d'un oracledb.connect
+    if connect_delay:
+        time.sleep(connect_delay)
+    conn = sqlite3.connect(db_file, check_same_thread=False, cached_statements=stmtcachesize)
+    return SQLiteStandinConnection(conn)
+
+
+# --- Mesure du gain : connexion par clic vs session empruntée au pool ---
+# Usage : python oracle_pool.py [base.db] [latence_connexion_ms] [nb_requêtes]
+if __name__ == "__main__":
+    db_file = sys.argv[1] if len(sys.argv) > 1 else SQLITE_STANDIN_DB
+    delay = (float(sys.argv[2]) if len(sys.argv) > 2 else 20.0) / 1000
+    lookups = int(sys.argv[3]) if len(sys.argv) > 3 else 50
+    sql = "SELECT * FROM vehicule WHERE id_vehicule = :id"
+
+    start = time.perf_counter()
+    for i in range(lookups):
+        connection = connect_standin(db_file, connect_delay=delay)
+        cursor = connection.cursor()
+        cursor.execute(sql, {"id": i + 1}).fetchone()
+        cursor.close()
+        connection.close()
+    per_connect = (time.perf_counter() - start) / lookups
+
+    pool = SQLitePool(db_file, min=POOL_MIN, max=POOL_MAX, connect_delay=delay)
+    start = time.perf_counter()
+    for i in range(lookups):
+        with pool.acquire() as connection:
+            cursor = connection.cursor()
+            cursor.execute(sql, {"id": i + 1}).fetchone()
+            cursor.close()
+    per_pool = (time.perf_counter() - start) / lookups
+    pool.close()
+
+    print(f"Connexion par requête : {per_connect * 1000:.2f} ms/requête")
+    print(f"Session du pool       : {per_pool * 1000:.2f} ms/requête")
+    print(f"Gain                  : x{per_connect / per_pool:.1f}")
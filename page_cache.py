@@ -0,0 +1,64 @@
+import sqlite3
+import threading
+from collections import OrderedDict
+
+# Nombre de pages gardées en mémoire par processus
+PAGE_CACHE_SIZE = 64
+
+
+class PageCache:
+    # Cache LRU des pages de résultats, clé (recherche, numéro de page, taille de page).
+    # Vidé par invalidate() après chaque écriture de l'application, et automatiquement
+    # quand PRAGMA data_version signale qu'une autre connexion (autre processus) a écrit.
+    def __init__(self, db_file, max_entries=PAGE_CACHE_SIZE):
+        self.db_file = db_file
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._version_conn = None
+        self._data_version = None
+
+    @property
+    def generation(self):
+        # À relever avant une lecture : put() ignore un résultat lu avant une invalidation
+        return self._generation
+
+    def _check_data_version(self):
+        # data_version n'a de sens que comparé sur une même connexion : on en garde une dédiée
+        if self._version_conn is None:
+            self._version_conn = sqlite3.connect(self.db_file, check_same_thread=False)
+        version = self._version_conn.execute("PRAGMA data_version").fetchone()[0]
+        if self._data_version is not None and version != self._data_version:
+            self._clear()
+        self._data_version = version
+
+    def _clear(self):
+        self._entries.clear()
+        self._generation += 1
+
+    def get(self, key):
+        with self._lock:
+            self._check_data_version()
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def __contains__(self, key):
+        with self._lock:
+            self._check_data_version()
+            return key in self._entries
+
+    def put(self, key, value, generation):
+        with self._lock:
+            if generation != self._generation:
+                return # Lu avant la dernière écriture : ne pas remettre une page périmée
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self):
+        with self._lock:
+            self._clear()
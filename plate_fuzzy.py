@@ -0,0 +1,216 @@
+import threading
+
+# Correspondance approchée des immatriculations ("Vouliez-vous dire ?").
+# Les plaques mal lues confondent surtout 0/O, 1/I, 8/B... : la distance d'édition
+# compte ces substitutions CONFUSABLE_COST au lieu de 1. Une modification est une
+# insertion, une suppression, une substitution ou l'inversion de deux caractères voisins.
+#
+# Index en mémoire sur la forme canonique des plaques (séparateurs retirés, caractères
+# confondus ramenés à un représentant : AB-I23-CD -> A8123CD). La distance d'édition
+# entre formes canoniques ne dépasse jamais la distance pondérée : les candidats à au plus
+# une modification près en forme canonique contiennent tous ceux à moins de 2 en distance
+# pondérée (autant de confusions qu'on veut + une autre erreur), classés ensuite.
+# L'index est limité à cette modification : MAX_WEIGHTED_DISTANCE reste inférieure à 2
+# (deux erreurs hors confusions demanderaient de parcourir presque tout l'index).
+#
+# Une seule modification laisse intacts les SEGMENT premiers ou les SEGMENT derniers
+# caractères d'une plaque d'au moins 2 * SEGMENT caractères (sauf l'inversion des deux
+# caractères du milieu d'une plaque de 2 * SEGMENT, cherchée à part) : les candidats sont
+# ceux qui partagent l'un des deux avec la saisie (quelques centaines sur un million de
+# plaques), vérifiés un par un. Un BK-tree demandait ~200 ms par recherche à ce volume.
+#
+# Chargé à la demande (refresh), puis complété par les véhicules ajoutés depuis
+# (id_vehicule croissant). Les plaques modifiées ou supprimées sont vérifiées en base
+# avant d'être proposées ; reload() reconstruit l'index complet.
+
+MAX_WEIGHTED_DISTANCE = 1.5  # Distance pondérée maximale des suggestions, strictement inférieure à 2
+SEGMENT = 3
+MAX_SUGGESTIONS = 5
+CONFUSABLE_COST = 0.25
+CONFUSABLE_GROUPS = ('0OQ', '1IL', '8B', '5S', '2Z', '6G')
+
+_CANONICAL = {c: group[0] for group in CONFUSABLE_GROUPS for c in group}
+
+
+def normalize_plate(plate):
+    # Majuscules, lettres et chiffres seulement : "ab-123 cd" -> "AB123CD"
+    return ''.join(c for c in (plate or '').upper() if c.isalnum())
+
+
+def canonical_plate(plate):
+    return ''.join(_CANONICAL.get(c, c) for c in normalize_plate(plate))
+
+
+def pattern(key):
+    # Pré-calcul de edit_distance_to() pour une clé comparée à beaucoup d'autres
+    masks = {}
+    for i, c in enumerate(key):
+        masks[c] = masks.get(c, 0) | (1 << i)
+    return masks, len(key)
+
+
+def edit_distance_to(compiled, text):
+    # Distance de Levenshtein avec inversion de deux caractères voisins ("optimal string
+    # alignment"), algorithme bit-parallèle de Myers étendu par Hyyrö (un entier par colonne
+    # au lieu d'une ligne de la matrice) : quelques opérations par caractère de text
+    masks, length = compiled
+    if length == 0:
+        return len(text)
+    all_bits = (1 << length) - 1
+    last_bit = 1 << (length - 1)
+    positive, negative, score = all_bits, 0, length
+    diagonal = previous_eq = 0
+    for c in text:
+        eq = masks.get(c, 0)
+        transposed = (((~diagonal) & eq) << 1) & previous_eq
+        diagonal = (((eq & positive) + positive) ^ positive) | eq | negative | transposed
+        horizontal_positive = negative | ~(diagonal | positive)
+        horizontal_negative = positive & diagonal
+        if horizontal_positive & last_bit:
+            score += 1
+        elif horizontal_negative & last_bit:
+            score -= 1
+        horizontal_positive = (horizontal_positive << 1) | 1
+        horizontal_negative <<= 1
+        positive = (horizontal_negative | ~(diagonal | horizontal_positive)) & all_bits
+        negative = horizontal_positive & diagonal & all_bits
+        previous_eq = eq
+    return score
+
+
+def substitution_cost(a, b):
+    if a == b:
+        return 0
+    if _CANONICAL.get(a, a) == _CANONICAL.get(b, b):
+        return CONFUSABLE_COST
+    return 1
+
+
+def weighted_distance(a, b):
+    # Distance d'édition entre plaques normalisées, substitutions confondues moins chères,
+    # inversion de deux caractères voisins comptée comme une modification
+    before, previous = None, [float(j) for j in range(len(b) + 1)]
+    for i, ca in enumerate(a, 1):
+        current = [float(i)]
+        for j, cb in enumerate(b, 1):
+            cost = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + substitution_cost(ca, cb))
+            if i > 1 and j > 1 and ca == b[j - 2] and a[i - 2] == cb:
+                cost = min(cost, before[j - 2] + 1)
+            current.append(cost)
+        before, previous = previous, current
+    return previous[-1]
+
+
+class EditIndex:
+    # Clés (formes canoniques) à au plus une modification près d'une clé donnée
+    def __init__(self):
+        self.size = 0
+        self._values = {}    # clé -> valeurs (plaques ayant cette forme canonique)
+        self._prefixes = {}  # SEGMENT premiers caractères -> clés
+        self._suffixes = {}  # SEGMENT derniers caractères -> clés
+        self._short = []     # clés trop courtes pour le découpage, parcourues en entier
+
+    def add(self, key, value):
+        self.size += 1
+        values = self._values.get(key)
+        if values is not None:
+            values.append(value)
+            return
+        self._values[key] = [value]
+        if len(key) >= SEGMENT:
+            self._prefixes.setdefault(key[:SEGMENT], []).append(key)
+            self._suffixes.setdefault(key[-SEGMENT:], []).append(key)
+        if len(key) <= 2 * SEGMENT:
+            self._short.append(key)
+
+    def search(self, key):
+        # Valeurs des clés à au plus une modification de key
+        if len(key) >= 2 * SEGMENT:
+            keys = set(self._prefixes.get(key[:SEGMENT], ()))
+            keys.update(self._suffixes.get(key[-SEGMENT:], ()))
+            if len(key) == 2 * SEGMENT:
+                # Inversion des deux caractères du milieu : ni début ni fin intacts
+                swapped = key[:SEGMENT - 1] + key[SEGMENT] + key[SEGMENT - 1] + key[SEGMENT + 1:]
+                if swapped in self._values:
+                    keys.add(swapped)
+        else:
+            # Une clé à distance 1 d'une clé courte est elle-même courte
+            keys = self._short
+        compiled = pattern(key)
+        return [
+            value
+            for candidate in keys if edit_distance_to(compiled, candidate) <= 1
+            for value in self._values[candidate]
+        ]
+
+
+class PlateMatcher:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._index = EditIndex()
+        self._last_id = 0
+
+    @property
+    def size(self):
+        return self._index.size
+
+    def add(self, vehicle_id, plate):
+        with self._lock:
+            self._index.add(canonical_plate(plate), (vehicle_id, plate))
+            self._last_id = max(self._last_id, vehicle_id)
+
+    def refresh(self, conn, wait=True):
+        # Ajoute les véhicules créés depuis le dernier appel (tous au premier appel).
+        # wait=False : retourne False sans attendre si un chargement est en cours.
+        if not self._lock.acquire(blocking=wait):
+            return False
+        try:
+            cursor = conn.execute(
+                "SELECT id_vehicule, immatriculation FROM vehicule WHERE id_vehicule > ? ORDER BY id_vehicule",
+                (self._last_id,)
+            )
+            for vehicle_id, plate in cursor:
+                self._index.add(canonical_plate(plate), (vehicle_id, plate))
+                self._last_id = vehicle_id
+            return True
+        finally:
+            self._lock.release()
+
+    def reload(self, conn):
+        with self._lock:
+            self._index = EditIndex()
+            self._last_id = 0
+        self.refresh(conn)
+
+    def suggest(self, conn, query, max_weighted_distance=MAX_WEIGHTED_DISTANCE, limit=MAX_SUGGESTIONS):
+        # [(id_vehicule, immatriculation, distance)] les plus proches d'abord ;
+        # aucune suggestion tant que le chargement initial n'est pas terminé
+        if max_weighted_distance >= 2:
+            raise ValueError("Suggestions limitées à une modification hors confusions (distance pondérée < 2)")
+        if not self.refresh(conn, wait=False):
+            return []
+        target = normalize_plate(query)
+        if not target:
+            return []
+        with self._lock:
+            candidates = self._index.search(canonical_plate(target))
+        scored = sorted(
+            (distance, plate, vehicle_id)
+            for vehicle_id, plate in candidates
+            for distance in (weighted_distance(target, normalize_plate(plate)),)
+            if distance <= max_weighted_distance
+        )[:limit * 2]
+        if not scored:
+            return []
+
+        # Plaque toujours présente et inchangée en base
+        ids = [vehicle_id for _, _, vehicle_id in scored]
+        current = dict(conn.execute(
+            f"SELECT id_vehicule, immatriculation FROM vehicule WHERE id_vehicule IN ({', '.join('?' for _ in ids)})",
+            ids
+        ).fetchall())
+        return [
+            (vehicle_id, plate, distance)
+            for distance, plate, vehicle_id in scored
+            if current.get(vehicle_id) == plate
+        ][:limit]
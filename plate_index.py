@@ -0,0 +1,52 @@
+# Index trigrammes des immatriculations : table FTS5 (tokenizer "trigram") miroir de
+# vehicule, synchronisée par triggers. Un fragment saisi au milieu d'une plaque ("123-C")
+# est cherché dans l'index au lieu d'un LIKE '%123-C%' qui lit toute la table.
+# Les fragments de moins de 3 caractères n'ont pas de trigramme : recherche par préfixe.
+
+# Longueur minimale d'un fragment cherché dans l'index trigrammes
+TRIGRAM_MIN_LENGTH = 3
+
+
+def create_plate_index(conn):
+    # Table, triggers ; remplie avec les véhicules existants si elle vient d'être créée
+    already_exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'vehicule_plates_fts'"
+    ).fetchone() is not None
+
+    conn.execute('''
+        CREATE VIRTUAL TABLE IF NOT EXISTS vehicule_plates_fts USING fts5(
+            immatriculation,
+            content='vehicule',
+            content_rowid='id_vehicule',
+            tokenize='trigram'
+        )
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS vehicule_plates_fts_ai AFTER INSERT ON vehicule BEGIN
+            INSERT INTO vehicule_plates_fts(rowid, immatriculation) VALUES (new.id_vehicule, new.immatriculation);
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS vehicule_plates_fts_ad AFTER DELETE ON vehicule BEGIN
+            INSERT INTO vehicule_plates_fts(vehicule_plates_fts, rowid, immatriculation)
+            VALUES ('delete', old.id_vehicule, old.immatriculation);
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS vehicule_plates_fts_au AFTER UPDATE OF id_vehicule, immatriculation ON vehicule BEGIN
+            INSERT INTO vehicule_plates_fts(vehicule_plates_fts, rowid, immatriculation)
+            VALUES ('delete', old.id_vehicule, old.immatriculation);
+            INSERT INTO vehicule_plates_fts(rowid, immatriculation) VALUES (new.id_vehicule, new.immatriculation);
+        END
+    ''')
+    if not already_exists:
+        conn.execute("INSERT INTO vehicule_plates_fts(vehicule_plates_fts) VALUES ('rebuild')")
+
+
+def plate_match_expression(query):
+    # Fragment entre guillemets (chaîne exacte pour FTS5, sans syntaxe interprétée),
+    # ou None s'il est trop court pour l'index trigrammes
+    fragment = (query or '').strip()
+    if len(fragment) < TRIGRAM_MIN_LENGTH:
+        return None
+    return '"' + fragment.replace('"', '""') + '"'
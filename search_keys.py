@@ -0,0 +1,108 @@
+# Clés de recherche : copie de colonnes texte sans accents et en majuscules
+# ("Hélène" -> "HELENE"), dans des colonnes <colonne>_cle indexées. Une recherche par
+# préfixe devient un parcours d'intervalle de l'index (cle >= 'HEL' AND cle < 'HEM')
+# au lieu d'un UPPER(colonne) LIKE '%...%' qui lit toute la table.
+#
+# Les clés sont recalculées par triggers à chaque écriture, en SQL pur (key_updates) :
+# n'importe quelle connexion peut écrire dans ces tables (sqlite3 en ligne de commande,
+# outils externes), sans fonction à enregistrer. Côté Oracle : search_keys_oracle.sql.
+
+# Accents du français retirés (même table que le TRANSLATE de search_keys_oracle.sql),
+# puis majuscules ASCII (upper() de SQLite) : fold_text() et key_updates() donnent la même clé
+ACCENTED = 'ÀÂÄÁÃÅÇÈÉÊËÌÍÎÏÑÒÓÔÖÕÙÚÛÜÝŸàâäáãåçèéêëìíîïñòóôöõùúûüýÿ'
+UNACCENTED = 'AAAAAACEEEEIIIINOOOOOUUUUYYAAAAAACEEEEIIIINOOOOOUUUUYY'
+FOLD_TABLE = str.maketrans(ACCENTED + 'abcdefghijklmnopqrstuvwxyz', UNACCENTED + 'ABCDEFGHIJKLMNOPQRSTUVWXYZ')
+# replace() par instruction : au-delà d'une trentaine d'appels imbriqués, la pile de
+# l'analyseur SQLite déborde ("parser stack overflow")
+FOLD_STEP_SIZE = 18
+
+SEARCH_KEY_COLUMNS = {
+    'proprietaire': ('nom', 'prenom', 'raison_sociale'),
+    'vehicule': ('marque', 'modele'),
+}
+PRIMARY_KEYS = {'proprietaire': 'id_proprietaire', 'vehicule': 'id_vehicule'}
+
+
+def fold_text(value):
+    # Forme de comparaison ("Hélène" -> "HELENE") d'une saisie ou d'une valeur à insérer
+    if value is None:
+        return None
+    return str(value).translate(FOLD_TABLE)
+
+
+def fold_steps(source, target):
+    # Expressions SQL successives équivalentes à fold_text(source) : la première lit source,
+    # les suivantes la valeur intermédiaire déjà écrite dans target, la dernière met en majuscules
+    pairs = list(zip(ACCENTED, UNACCENTED))
+    steps = []
+    for start in range(0, len(pairs), FOLD_STEP_SIZE):
+        expression = target if steps else source
+        for accented, unaccented in pairs[start:start + FOLD_STEP_SIZE]:
+            expression = f"replace({expression}, '{accented}', '{unaccented}')"
+        steps.append(expression)
+    steps[-1] = f"upper({steps[-1]})"
+    return steps
+
+
+def key_updates(table, columns, source_prefix='', where=''):
+    # UPDATE successifs qui calculent les clés des colonnes depuis source_prefix + colonne
+    # ("new." dans un trigger), restreints par where
+    steps = [fold_steps(f"{source_prefix}{column}", key_column(column)) for column in columns]
+    return [
+        f"UPDATE {table} SET {', '.join(f'{key_column(column)} = {column_steps[i]}' for column, column_steps in zip(columns, steps))}{where}"
+        for i in range(len(steps[0]))
+    ]
+
+
+def key_column(column):
+    return f"{column}_cle"
+
+
+def prefix_range(query):
+    # Bornes (incluse, exclue) des clés commençant par la saisie, ou None si elle est vide
+    key = fold_text((query or '').strip())
+    if not key:
+        return None
+    return key, key[:-1] + chr(ord(key[-1]) + 1)
+
+
+def create_search_keys(conn, table):
+    # Colonnes, triggers et index des clés de table ; les clés d'une colonne
+    # ajoutée sont calculées pour les lignes existantes. Rejouable.
+    columns = SEARCH_KEY_COLUMNS[table]
+    primary_key = PRIMARY_KEYS[table]
+    existing = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+
+    for column in columns:
+        if key_column(column) not in existing:
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN {key_column(column)} TEXT")
+            for update in key_updates(table, (column,)):
+                conn.execute(update)
+        conn.execute(
+            f"CREATE INDEX IF NOT EXISTS idx_{table}_{key_column(column)} ON {table}({key_column(column)})"
+        )
+
+    updates = ''.join(
+        f"{update};\n" for update in key_updates(table, columns, 'new.', f" WHERE {primary_key} = new.{primary_key}")
+    )
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS {table}_search_keys_ai AFTER INSERT ON {table} BEGIN
+            {updates}
+        END
+    ''')
+    # Limité aux colonnes sources : la mise à jour des clés ne redéclenche pas le trigger
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS {table}_search_keys_au AFTER UPDATE OF {', '.join(columns)} ON {table} BEGIN
+            {updates}
+        END
+    ''')
+
+
+def replace_search_key_triggers(conn, table):
+    # Triggers d'une version précédente, qui appelaient fold_text() (fonction enregistrée
+    # connexion par connexion) : recréés en SQL pur, et clés recalculées sous la même forme
+    conn.execute(f"DROP TRIGGER IF EXISTS {table}_search_keys_ai")
+    conn.execute(f"DROP TRIGGER IF EXISTS {table}_search_keys_au")
+    create_search_keys(conn, table)
+    for update in key_updates(table, SEARCH_KEY_COLUMNS[table]):
+        conn.execute(update)
@@ -0,0 +1,34 @@
+-- Clés de recherche sans accents ni casse (équivalent Oracle de search_keys.py).
+-- Colonnes virtuelles : calculées par Oracle à chaque écriture, rien à synchroniser.
+-- Indexées, elles permettent à fetch_search_results (main.py) une recherche par préfixe
+-- en parcours d'intervalle : cle >= :low AND cle < :high.
+-- TRANSLATE retire les accents du français ; même résultat que search_keys.fold_text()
+-- pour ces caractères.
+
+ALTER TABLE proprietaire ADD (
+    nom_cle AS (UPPER(TRANSLATE(nom,
+        'ÀÂÄÁÃÅÇÈÉÊËÌÍÎÏÑÒÓÔÖÕÙÚÛÜÝŸàâäáãåçèéêëìíîïñòóôöõùúûüýÿ',
+        'AAAAAACEEEEIIIINOOOOOUUUUYYAAAAAACEEEEIIIINOOOOOUUUUYY'))) VIRTUAL,
+    prenom_cle AS (UPPER(TRANSLATE(prenom,
+        'ÀÂÄÁÃÅÇÈÉÊËÌÍÎÏÑÒÓÔÖÕÙÚÛÜÝŸàâäáãåçèéêëìíîïñòóôöõùúûüýÿ',
+        'AAAAAACEEEEIIIINOOOOOUUUUYYAAAAAACEEEEIIIINOOOOOUUUUYY'))) VIRTUAL,
+    raison_sociale_cle AS (UPPER(TRANSLATE(raison_sociale,
+        'ÀÂÄÁÃÅÇÈÉÊËÌÍÎÏÑÒÓÔÖÕÙÚÛÜÝŸàâäáãåçèéêëìíîïñòóôöõùúûüýÿ',
+        'AAAAAACEEEEIIIINOOOOOUUUUYYAAAAAACEEEEIIIINOOOOOUUUUYY'))) VIRTUAL
+);
+
+ALTER TABLE vehicule ADD (
+    marque_cle AS (UPPER(TRANSLATE(marque,
+        'ÀÂÄÁÃÅÇÈÉÊËÌÍÎÏÑÒÓÔÖÕÙÚÛÜÝŸàâäáãåçèéêëìíîïñòóôöõùúûüýÿ',
+        'AAAAAACEEEEIIIINOOOOOUUUUYYAAAAAACEEEEIIIINOOOOOUUUUYY'))) VIRTUAL,
+    modele_cle AS (UPPER(TRANSLATE(modele,
+        'ÀÂÄÁÃÅÇÈÉÊËÌÍÎÏÑÒÓÔÖÕÙÚÛÜÝŸàâäáãåçèéêëìíîïñòóôöõùúûüýÿ',
+        'AAAAAACEEEEIIIINOOOOOUUUUYYAAAAAACEEEEIIIINOOOOOUUUUYY'))) VIRTUAL
+);
+
+CREATE INDEX idx_proprietaire_nom_cle ON proprietaire(nom_cle);
+CREATE INDEX idx_proprietaire_prenom_cle ON proprietaire(prenom_cle);
+CREATE INDEX idx_proprietaire_raison_sociale_cle ON proprietaire(raison_sociale_cle);
+CREATE INDEX idx_vehicule_marque_cle ON vehicule(marque_cle);
+CREATE INDEX idx_vehicule_modele_cle ON vehicule(modele_cle);
+CREATE INDEX idx_vehicule_immatriculation_upper ON vehicule(UPPER(immatriculation));
@@ -1,9 +1,57 @@
 import sqlite3
 import os
 
+from migrations import format_versions, migrate
+
 # --- Configuration de la base de données ---
 DB_FILE = 'dossiers.db' # Assurez-vous que c'est le même fichier que votre app Flet
 
+def create_tables(cursor):
+    # Vehicle / owner / ownership history tables (dossiers.db layout)
+    # Table vehicule
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS vehicule (
+            id_vehicule INTEGER PRIMARY KEY,
+            immatriculation TEXT UNIQUE NOT NULL,
+            marque TEXT NOT NULL,
+            modele TEXT NOT NULL,
+            annee_fabrication INTEGER,
+            couleur TEXT
+        )
+    ''')
+    print("Table 'vehicule' checked/created.")
+
+    # Table proprietaire
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS proprietaire (
+            id_proprietaire INTEGER PRIMARY KEY,
+            type_proprietaire TEXT NOT NULL CHECK (type_proprietaire IN ('PHYSIQUE', 'MORALE')),
+            adresse TEXT,
+            telephone TEXT,
+            email TEXT,
+            nom TEXT,
+            prenom TEXT,
+            date_naissance TEXT,
+            raison_sociale TEXT,
+            siret TEXT,
+            representant_legal TEXT
+        )
+    ''')
+    print("Table 'proprietaire' checked/created.")
+
+    # Table HistoriqueProprietaires
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS historique_proprietaires (
+            id_historique INTEGER PRIMARY KEY,
+            id_vehicule INTEGER REFERENCES vehicule(id_vehicule),
+            id_proprietaire INTEGER REFERENCES proprietaire(id_proprietaire),
+            date_debut TEXT NOT NULL,
+            date_fin TEXT,
+            CONSTRAINT check_dates CHECK (date_fin IS NULL OR date_fin > date_debut)
+        )
+    ''')
+    print("Table 'historique_proprietaires' checked/created.")
+
 def insert_example_data():
     conn = None
     try:
@@ -13,49 +61,10 @@ def insert_example_data():
         print(f"Connected to database: {DB_FILE}")
 
         # 1. Create tables if they don't exist
-        # Table vehicule
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS vehicule (
-                id_vehicule INTEGER PRIMARY KEY,
-                immatriculation TEXT UNIQUE NOT NULL,
-                marque TEXT NOT NULL,
-                modele TEXT NOT NULL,
-                annee_fabrication INTEGER,
-                couleur TEXT
-            )
-        ''')
-        print("Table 'vehicule' checked/created.")
-
-        # Table proprietaire
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS proprietaire (
-                id_proprietaire INTEGER PRIMARY KEY,
-                type_proprietaire TEXT NOT NULL CHECK (type_proprietaire IN ('PHYSIQUE', 'MORALE')),
-                adresse TEXT,
-                telephone TEXT,
-                email TEXT,
-                nom TEXT,
-                prenom TEXT,
-                date_naissance TEXT,
-                raison_sociale TEXT,
-                siret TEXT,
-                representant_legal TEXT
-            )
-        ''')
-        print("Table 'proprietaire' checked/created.")
-
-        # Table HistoriqueProprietaires
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS historique_proprietaires (
-                id_historique INTEGER PRIMARY KEY,
-                id_vehicule INTEGER REFERENCES vehicule(id_vehicule),
-                id_proprietaire INTEGER REFERENCES proprietaire(id_proprietaire),
-                date_debut TEXT NOT NULL,
-                date_fin TEXT,
-                CONSTRAINT check_dates CHECK (date_fin IS NULL OR date_fin > date_debut)
-            )
-        ''')
-        print("Table 'historique_proprietaires' checked/created.")
+        create_tables(cursor)
+
+        # Secondary indexes (see migrations.py)
+        print(f"Schema versions: {format_versions(migrate(conn))}")
 
         # 2. Insert sample data if tables are empty
         # This prevents inserting duplicates if you run the script multiple times
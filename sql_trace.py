@@ -0,0 +1,420 @@
+import atexit
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from functools import lru_cache
+
+# Traçage des requêtes SQL : durée (exécution + lecture des lignes), lignes retournées
+# et gestionnaire à l'origine de la requête (search, detail, save, archive...).
+# Désactivé par défaut ; FLETAPP_SQL_TRACE=1 pour l'activer.
+#
+# - connexions SQLite de db_pool : classe de connexion TracedConnection (factory de
+#   sqlite3.connect)
+# - curseurs Oracle (main.py) : enveloppe trace_cursor()
+# - gestionnaire : db_worker.submit(..., handler="search"), ou "with handler(...)"
+#
+# Requêtes plus lentes que FLETAPP_SLOW_QUERY_MS (et erreurs) : une ligne dans
+# FLETAPP_SLOW_QUERY_LOG, sous la forme normalisée de statement_label(), sans les
+# valeurs des paramètres (plaques, noms, adresses : données personnelles). Pour un
+# diagnostic ponctuel, FLETAPP_SLOW_QUERY_PARAMS=1 journalise le texte exécuté avec
+# ses paramètres (SQLite seulement, relevé par set_trace_callback). Histogrammes par (gestionnaire, requête) écrits toutes les
+# EXPORT_INTERVAL secondes dans FLETAPP_SQL_METRICS : format texte Prometheus (lu par
+# le "textfile collector" de node_exporter), ou JSON si le nom finit par .json.
+
+ENABLED = os.environ.get("FLETAPP_SQL_TRACE", "0") not in ("", "0")
+SLOW_QUERY_MS = float(os.environ.get("FLETAPP_SLOW_QUERY_MS", "100"))
+SLOW_QUERY_LOG = os.environ.get("FLETAPP_SLOW_QUERY_LOG", "slow_queries.log")
+# Débogage uniquement : paramètres des requêtes lentes dans le journal
+SLOW_QUERY_PARAMS = os.environ.get("FLETAPP_SLOW_QUERY_PARAMS", "0") not in ("", "0")
+METRICS_FILE = os.environ.get("FLETAPP_SQL_METRICS", "sql_metrics.prom")
+EXPORT_INTERVAL = 15  # Secondes entre deux écritures du fichier de métriques
+
+# Bornes des histogrammes de durée (ms), comme les "le" d'un histogramme Prometheus
+BUCKETS_MS = (1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+# Gestionnaire des requêtes lancées hors d'un gestionnaire tagué (pragmas, migrations...)
+DEFAULT_HANDLER = "autre"
+
+_local = threading.local()
+_lock = threading.Lock()
+_stats = {}  # (gestionnaire, requête) -> StatementStats
+_exporter = None
+
+
+class StatementStats:
+    def __init__(self):
+        self.buckets = [0] * (len(BUCKETS_MS) + 1)  # Dernier : au-delà de la plus grande borne
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.rows = 0
+        self.errors = 0
+        self.cancelled = 0
+
+    def add(self, elapsed_ms, rows):
+        index = next((i for i, bound in enumerate(BUCKETS_MS) if elapsed_ms <= bound), len(BUCKETS_MS))
+        self.buckets[index] += 1
+        self.count += 1
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        self.rows += rows
+
+
+# --- Gestionnaire courant (par thread) ---
+
+def current_handler():
+    return getattr(_local, "handler", None) or DEFAULT_HANDLER
+
+
+@contextmanager
+def handler(name):
+    # Les requêtes exécutées dans le bloc sont attribuées au gestionnaire name
+    previous = getattr(_local, "handler", None)
+    _local.handler = name
+    try:
+        yield
+    finally:
+        _local.handler = previous
+
+
+def tagged(name, work):
+    # work() exécuté sous le gestionnaire name (travail soumis au pool db_worker)
+    def run(*args, **kwargs):
+        with handler(name):
+            return work(*args, **kwargs)
+    return run
+
+
+# --- Enregistrement ---
+
+@lru_cache(maxsize=1024)
+def statement_label(sql):
+    # Forme normalisée d'une requête : espaces réduits, listes "IN (?, ?, ...)" repliées
+    label = ' '.join(sql.split())
+    return re.sub(r'\?(?:\s*,\s*\?)+', '?, ...', label)
+
+
+def record(sql, elapsed, rows, error=None, executed_sql=None):
+    # Durée en secondes ; executed_sql : texte exécuté avec ses paramètres, journalisé
+    # à la place de la requête normalisée si SLOW_QUERY_PARAMS
+    elapsed_ms = elapsed * 1000
+    name = current_handler()
+    label = statement_label(sql)
+    cancelled = isinstance(error, sqlite3.OperationalError) and str(error) == "interrupted"
+    with _lock:
+        stats = _stats.get((name, label))
+        if stats is None:
+            stats = _stats[(name, label)] = StatementStats()
+        if cancelled:
+            # Recherche remplacée par une plus récente (db_worker.cancel_when_stale)
+            stats.cancelled += 1
+        elif error is not None:
+            stats.errors += 1
+        else:
+            stats.add(elapsed_ms, rows)
+    if (error is not None and not cancelled) or elapsed_ms >= SLOW_QUERY_MS:
+        log_slow_query(name, executed_sql if SLOW_QUERY_PARAMS and executed_sql else label, elapsed_ms, rows, error)
+    _start_exporter()
+
+
+def log_slow_query(name, sql, elapsed_ms, rows, error=None):
+    status = f"ERREUR {error}" if error is not None else f"{rows} lignes"
+    line = f"{datetime.now():%Y-%m-%d %H:%M:%S} [{name}] {elapsed_ms:.1f} ms, {status} : {' '.join(sql.split())}\n"
+    with _lock:
+        with open(SLOW_QUERY_LOG, "a", encoding="utf-8") as f:
+            f.write(line)
+
+
+def reset():
+    with _lock:
+        _stats.clear()
+
+
+# --- Connexions SQLite ---
+
+class TracedCursor(sqlite3.Cursor):
+    # Une requête est enregistrée quand ses lignes ont été lues (fetchall, fetchone,
+    # fin d'itération), au prochain execute, à la fermeture du curseur, ou tout de
+    # suite si elle ne retourne pas de lignes (INSERT, UPDATE...)
+    _pending = None
+
+    def execute(self, sql, parameters=()):
+        return self._traced(super().execute, sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self._traced(super().executemany, sql, seq_of_parameters)
+
+    def _traced(self, method, sql, parameters):
+        self._finish()
+        start = time.perf_counter()
+        try:
+            method(sql, parameters)
+        except sqlite3.Error as e:
+            record(sql, time.perf_counter() - start, 0, e, self.connection.last_statement)
+            raise
+        elapsed = time.perf_counter() - start
+        if self.description is None:
+            record(sql, elapsed, max(self.rowcount, 0), executed_sql=self.connection.last_statement)
+        else:
+            # [requête, durée cumulée, lignes lues, texte exécuté]
+            self._pending = [sql, elapsed, 0, self.connection.last_statement]
+        return self
+
+    def _fetched(self, start, rows, done):
+        pending = self._pending
+        if pending is None:
+            return
+        pending[1] += time.perf_counter() - start
+        pending[2] += rows
+        if done:
+            self._finish()
+
+    def _finish(self):
+        pending, self._pending = self._pending, None
+        if pending is not None:
+            sql, elapsed, rows, executed_sql = pending
+            record(sql, elapsed, rows, executed_sql=executed_sql)
+
+    def fetchone(self):
+        start = time.perf_counter()
+        row = super().fetchone()
+        self._fetched(start, row is not None, True)
+        return row
+
+    def fetchmany(self, size=None):
+        start = time.perf_counter()
+        size = self.arraysize if size is None else size
+        rows = super().fetchmany(size)
+        self._fetched(start, len(rows), len(rows) < size)
+        return rows
+
+    def fetchall(self):
+        start = time.perf_counter()
+        rows = super().fetchall()
+        self._fetched(start, len(rows), True)
+        return rows
+
+    def __next__(self):
+        start = time.perf_counter()
+        try:
+            row = super().__next__()
+        except StopIteration:
+            self._fetched(start, 0, True)
+            raise
+        self._fetched(start, 1, False)
+        return row
+
+    def close(self):
+        self._finish()
+        super().close()
+
+    def __del__(self):
+        self._finish()
+
+
+class TracedConnection(sqlite3.Connection):
+    # Connection.execute() de sqlite3 n'appelle pas Cursor.execute : redirigé ici
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.last_statement = None
+        if SLOW_QUERY_PARAMS:
+            self.set_trace_callback(self._on_statement)
+
+    def _on_statement(self, statement):
+        # Instructions lancées par les triggers : préfixées par "--", non retenues
+        if not statement.startswith("--"):
+            self.last_statement = statement
+
+    def cursor(self, factory=TracedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+
+def connection_factory():
+    # Classe à passer à sqlite3.connect(factory=...)
+    return TracedConnection if ENABLED else sqlite3.Connection
+
+
+# --- Curseurs DB-API (oracledb) ---
+
+class TracedDbCursor:
+    # Enveloppe d'un curseur quelconque : execute + lectures chronométrés
+    def __init__(self, cursor):
+        self._cursor = cursor
+        self._pending = None
+
+    def execute(self, sql, parameters=None, **kwargs):
+        self._finish()
+        start = time.perf_counter()
+        args = () if parameters is None else (parameters,)
+        try:
+            self._cursor.execute(sql, *args, **kwargs)
+        except Exception as e:
+            record(sql, time.perf_counter() - start, 0, e)
+            raise
+        elapsed = time.perf_counter() - start
+        if self._cursor.description is None:
+            record(sql, elapsed, max(getattr(self._cursor, "rowcount", 0) or 0, 0))
+        else:
+            self._pending = [sql, elapsed, 0]
+        return self
+
+    def _fetched(self, start, rows, done):
+        if self._pending is None:
+            return
+        self._pending[1] += time.perf_counter() - start
+        self._pending[2] += rows
+        if done:
+            self._finish()
+
+    def _finish(self):
+        pending, self._pending = self._pending, None
+        if pending is not None:
+            record(*pending)
+
+    def fetchone(self):
+        start = time.perf_counter()
+        row = self._cursor.fetchone()
+        self._fetched(start, row is not None, True)
+        return row
+
+    def fetchmany(self, size=100):
+        start = time.perf_counter()
+        rows = self._cursor.fetchmany(size)
+        self._fetched(start, len(rows), len(rows) < size)
+        return rows
+
+    def fetchall(self):
+        start = time.perf_counter()
+        rows = self._cursor.fetchall()
+        self._fetched(start, len(rows), True)
+        return rows
+
+    def __iter__(self):
+        start = time.perf_counter()
+        for row in self._cursor:
+            self._fetched(start, 1, False)
+            yield row
+            start = time.perf_counter()
+        self._fetched(start, 0, True)
+
+    def close(self):
+        self._finish()
+        self._cursor.close()
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+def trace_cursor(cursor):
+    return TracedDbCursor(cursor) if ENABLED else cursor
+
+
+# --- Export des histogrammes ---
+
+def snapshot():
+    # [(gestionnaire, requête, StatementStats copiée)] triés par temps total décroissant
+    with _lock:
+        items = [(name, label, _copy(stats)) for (name, label), stats in _stats.items()]
+    return sorted(items, key=lambda item: item[2].total_ms, reverse=True)
+
+
+def _copy(stats):
+    copy = StatementStats()
+    copy.__dict__.update(stats.__dict__, buckets=list(stats.buckets))
+    return copy
+
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def prometheus_text(items):
+    lines = [
+        "# HELP fletapp_sql_duration_seconds Durée des requêtes SQL (exécution et lecture des lignes)",
+        "# TYPE fletapp_sql_duration_seconds histogram",
+    ]
+    for name, label, stats in items:
+        labels = f'handler="{_escape(name)}",statement="{_escape(label)}"'
+        cumulative = 0
+        for bound, count in zip(BUCKETS_MS, stats.buckets):
+            cumulative += count
+            lines.append(f'fletapp_sql_duration_seconds_bucket{{{labels},le="{bound / 1000:g}"}} {cumulative}')
+        lines.append(f'fletapp_sql_duration_seconds_bucket{{{labels},le="+Inf"}} {stats.count}')
+        lines.append(f'fletapp_sql_duration_seconds_sum{{{labels}}} {stats.total_ms / 1000:.6f}')
+        lines.append(f'fletapp_sql_duration_seconds_count{{{labels}}} {stats.count}')
+    for metric, attribute, description in (
+        ("fletapp_sql_rows_total", "rows", "Lignes retournées ou modifiées"),
+        ("fletapp_sql_errors_total", "errors", "Requêtes en erreur"),
+        ("fletapp_sql_cancelled_total", "cancelled", "Requêtes interrompues par une plus récente"),
+    ):
+        lines.append(f"# HELP {metric} {description}")
+        lines.append(f"# TYPE {metric} counter")
+        for name, label, stats in items:
+            lines.append(f'{metric}{{handler="{_escape(name)}",statement="{_escape(label)}"}} {getattr(stats, attribute)}')
+    return '\n'.join(lines) + '\n'
+
+
+def json_report(items):
+    return {
+        "generated_at": datetime.now().isoformat(timespec="seconds"),
+        "buckets_ms": list(BUCKETS_MS),
+        "statements": [
+            {
+                "handler": name,
+                "statement": label,
+                "count": stats.count,
+                "total_ms": round(stats.total_ms, 3),
+                "mean_ms": round(stats.total_ms / stats.count, 3) if stats.count else None,
+                "max_ms": round(stats.max_ms, 3),
+                "rows": stats.rows,
+                "errors": stats.errors,
+                "cancelled": stats.cancelled,
+                "buckets": stats.buckets,
+            }
+            for name, label, stats in items
+        ],
+    }
+
+
+def write_metrics(path=None):
+    # Écriture atomique (fichier temporaire puis renommage) : le collecteur ne lit
+    # jamais un fichier à moitié écrit
+    path = path or METRICS_FILE
+    items = snapshot()
+    temporary = f"{path}.tmp"
+    with open(temporary, "w", encoding="utf-8") as f:
+        if path.endswith(".json"):
+            json.dump(json_report(items), f, ensure_ascii=False, indent=2)
+        else:
+            f.write(prometheus_text(items))
+    os.replace(temporary, path)
+
+
+def _export_loop():
+    while True:
+        time.sleep(EXPORT_INTERVAL)
+        try:
+            write_metrics()
+        except OSError as e:
+            print("Erreur d'écriture des métriques SQL:", e)
+
+
+def _start_exporter():
+    global _exporter
+    if _exporter is not None:
+        return
+    with _lock:
+        if _exporter is None:
+            _exporter = threading.Thread(target=_export_loop, name="sql-metrics", daemon=True)
+            _exporter.start()
+            atexit.register(write_metrics)
@@ -0,0 +1,57 @@
+import os
+import sys
+
+import pytest
+
+# Les modules de l'application sont des scripts à la racine du dépôt
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database
+import setup_initial_tables
+from current_owner import create_current_owner_table
+from db_pool import close_all, writer
+from migrations import migrate
+
+
+@pytest.fixture(autouse=True)
+def close_connections():
+    # Chaque test travaille sur ses propres fichiers : connexions du pool fermées après lui
+    yield
+    close_all()
+
+
+@pytest.fixture
+def dossiers_db(tmp_path, monkeypatch):
+    # Base dossiers vide (schéma complet : FTS5, compteur, index, migrations),
+    # utilisée aussi par les fonctions qui lisent database.DATABASE_NAME
+    path = str(tmp_path / 'dossiers.db')
+    monkeypatch.setattr(database, 'DATABASE_NAME', path)
+    with writer(path) as conn:
+        database.create_schema(conn)
+    return path
+
+
+@pytest.fixture
+def cars_db(tmp_path):
+    # Base véhicules vide (tables, propriétaire actuel matérialisé, migrations : clés de
+    # recherche, index trigrammes des plaques), comme à l'ouverture de list_cars
+    path = str(tmp_path / 'cars.db')
+    with writer(path) as conn:
+        setup_initial_tables.create_tables(conn.cursor())
+        create_current_owner_table(conn)
+        migrate(conn)
+    return path
+
+
+def insert_dossiers(db_file, rows):
+    # rows : dicts (numero, personne, objet obligatoires) ; retourne les identifiants créés
+    ids = []
+    with writer(db_file) as conn:
+        for row in rows:
+            values = {'date': '2024-01-01', **row}
+            columns = ', '.join(values)
+            cursor = conn.execute(
+                f"INSERT INTO dossiers ({columns}) VALUES ({', '.join('?' for _ in values)})", tuple(values.values())
+            )
+            ids.append(cursor.lastrowid)
+    return ids
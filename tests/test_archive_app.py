@@ -0,0 +1,97 @@
+import pytest
+
+import archive_app
+from db_pool import get_reader, writer
+
+
+@pytest.fixture
+def db_file(tmp_path, monkeypatch):
+    # Base d'exemple d'archive_app (véhicules 1 et 2, propriétaires 101 et 102,
+    # historiques 1001 à 1003) et main_archive construite une première fois
+    path = str(tmp_path / 'dossiers.db')
+    monkeypatch.setattr(archive_app, 'DB_FILE', path)
+    archive_app.setup_initial_tables()
+    archive_app.refresh_main_archive()
+    return path
+
+
+def archive_rows(db_file):
+    return get_reader(db_file).execute("SELECT * FROM main_archive ORDER BY id_historique").fetchall()
+
+
+def assert_refresh_matches_full_rebuild(db_file):
+    archive_app.refresh_main_archive()
+    refreshed = archive_rows(db_file)
+    archive_app.build_main_archive()
+    assert refreshed == archive_rows(db_file)
+    return refreshed
+
+
+def test_refresh_applies_vehicle_owner_and_history_changes(db_file):
+    with writer(db_file) as conn:
+        conn.execute("UPDATE vehicule SET couleur = 'Rouge' WHERE id_vehicule = 1")
+        conn.execute("UPDATE proprietaire SET adresse = '3 Place du Marché' WHERE id_proprietaire = 102")
+        conn.execute("INSERT INTO proprietaire (id_proprietaire, type_proprietaire, nom, prenom) VALUES (103, 'PHYSIQUE', 'Martin', 'Luc')")
+        conn.execute("UPDATE historique_proprietaires SET date_fin = '2024-06-30' WHERE id_historique = 1003")
+        conn.execute("INSERT INTO historique_proprietaires (id_historique, id_vehicule, id_proprietaire, date_debut) VALUES (1004, 2, 103, '2024-07-01')")
+        conn.execute("DELETE FROM historique_proprietaires WHERE id_historique = 1001")
+
+    rows = assert_refresh_matches_full_rebuild(db_file)
+    assert [row['id_historique'] for row in rows] == [1002, 1003, 1004]
+    assert {row['couleur_veh'] for row in rows if row['id_vehicule_orig'] == 1} == {'Rouge'}
+    assert rows[0]['adresse_prop'] == '3 Place du Marché'
+    assert rows[1]['date_fin'] == '2024-06-30'
+
+
+def test_refresh_drops_history_of_deleted_vehicles_and_owners(db_file):
+    with writer(db_file) as conn:
+        conn.execute("DELETE FROM vehicule WHERE id_vehicule = 2")
+        conn.execute("DELETE FROM proprietaire WHERE id_proprietaire = 102")
+
+    rows = assert_refresh_matches_full_rebuild(db_file)
+    assert [row['id_historique'] for row in rows] == [1001]
+
+
+def test_refresh_only_reprocesses_captured_rows(db_file):
+    assert archive_app.refresh_main_archive() == 0
+    with writer(db_file) as conn:
+        conn.execute("UPDATE proprietaire SET telephone = '0102030405' WHERE id_proprietaire = 101")
+    # Le propriétaire 101 apparaît dans les historiques 1001 et 1003
+    assert archive_app.refresh_main_archive() == 2
+
+
+class Interruption(Exception):
+    pass
+
+
+def test_interrupted_rebuild_resumes_from_its_checkpoint(db_file, monkeypatch):
+    monkeypatch.setattr(archive_app, 'ARCHIVE_CHUNK_SIZE', 1)
+    expected = archive_rows(db_file)
+
+    def interrupt(done, total, rate):
+        raise Interruption
+    with pytest.raises(Interruption):
+        archive_app.build_main_archive(interrupt)
+    # Première tranche validée avec son point de reprise
+    assert [row['id_historique'] for row in archive_rows(db_file)] == [1001]
+    assert archive_app.rebuild_pending()
+
+    # La mise à jour incrémentale reprend la reconstruction à la tranche suivante
+    progress = []
+    assert archive_app.refresh_main_archive(lambda done, total, rate: progress.append((done, total))) == 3
+    assert progress == [(2, 3), (3, 3)]
+    assert archive_rows(db_file) == expected
+    assert not archive_app.rebuild_pending()
+
+
+def test_second_archive_job_is_refused_while_one_runs(db_file):
+    refused = []
+
+    def start_another(done, total, rate):
+        with pytest.raises(RuntimeError):
+            archive_app.run_exclusive(archive_app.refresh_main_archive)
+        refused.append(done)
+    archive_app.run_exclusive(archive_app.build_main_archive, start_another)
+    assert refused == [3]
+    # Tâche terminée : le verrou est rendu
+    assert archive_app.run_exclusive(archive_app.refresh_main_archive) == 0
@@ -0,0 +1,50 @@
+import pytest
+
+import cars_queries
+from db_pool import get_reader, writer
+
+VEHICULES = [
+    (1, 'AB-123-CD', 'Renault', 'Clio'),
+    (2, 'EF-456-GH', 'Peugeot', '308'),
+    (3, 'XY-123-ZZ', 'Citroën', 'C3'),
+    (4, 'AB-789-KL', 'Dacia', 'Sandero'),
+]
+
+
+@pytest.fixture
+def vehicles_db(cars_db):
+    with writer(cars_db) as conn:
+        conn.executemany(
+            "INSERT INTO vehicule (id_vehicule, immatriculation, marque, modele) VALUES (?, ?, ?, ?)", VEHICULES
+        )
+    return cars_db
+
+
+def plates(db_file, query):
+    return [libelle for kind, _, libelle in cars_queries.search_vehicles_and_owners(get_reader(db_file), query)
+            if kind == 'VEHICULE']
+
+
+def test_fragment_in_the_middle_of_a_plate_is_found(vehicles_db):
+    assert plates(vehicles_db, '123') == ['AB-123-CD', 'XY-123-ZZ']
+    assert plates(vehicles_db, '23-c') == ['AB-123-CD']
+    assert plates(vehicles_db, '-ZZ') == ['XY-123-ZZ']
+
+
+def test_short_fragment_is_a_plate_prefix(vehicles_db):
+    # Moins de 3 caractères : pas de trigramme, début de plaque (ou de marque / modèle)
+    assert plates(vehicles_db, 'ab') == ['AB-123-CD', 'AB-789-KL']
+    assert plates(vehicles_db, '12') == []
+
+
+def test_quotes_in_the_fragment_are_searched_literally(vehicles_db):
+    assert plates(vehicles_db, 'AB"-1') == []
+    assert plates(vehicles_db, '" OR "') == []
+
+
+def test_plate_index_follows_updates_and_deletes(vehicles_db):
+    with writer(vehicles_db) as conn:
+        conn.execute("UPDATE vehicule SET immatriculation = 'MN-555-OP' WHERE id_vehicule = 1")
+        conn.execute("DELETE FROM vehicule WHERE id_vehicule = 3")
+    assert plates(vehicles_db, '123') == []
+    assert plates(vehicles_db, '555') == ['MN-555-OP']
@@ -0,0 +1,77 @@
+import contextlib
+import io
+
+import pytest
+
+import archive_app
+from cold_archive import ColdArchive, export_cold_archive, partition_path, purge_partition
+from db_pool import get_reader, writer
+
+
+@pytest.fixture
+def db_file(tmp_path, monkeypatch):
+    # Base d'exemple d'archive_app (historiques 1001 : 2020, 1002 : 2023, 1003 : 2019),
+    # plus un véhicule XY-999-ZZ possédé en 2020 (1004), et main_archive complète
+    path = str(tmp_path / 'dossiers.db')
+    monkeypatch.setattr(archive_app, 'DB_FILE', path)
+    with contextlib.redirect_stdout(io.StringIO()):
+        archive_app.setup_initial_tables()
+        with writer(path) as conn:
+            conn.execute("INSERT INTO vehicule (id_vehicule, immatriculation, marque, modele, annee_fabrication, couleur) VALUES (3, 'XY-999-ZZ', 'Citroën', 'C3', 2019, 'Blanc')")
+            conn.execute("INSERT INTO historique_proprietaires (id_historique, id_vehicule, id_proprietaire, date_debut, date_fin) VALUES (1004, 3, 102, '2020-08-01', NULL)")
+        archive_app.build_main_archive()
+    return path
+
+
+def refresh():
+    with contextlib.redirect_stdout(io.StringIO()):
+        return archive_app.refresh_main_archive()
+
+
+def archived_ids(db_file):
+    return sorted(row[0] for row in get_reader(db_file).execute("SELECT id_historique FROM main_archive"))
+
+
+def cold_rows(directory, columns=('id_historique', 'couleur_veh')):
+    archive = ColdArchive(directory)
+    try:
+        return sorted(tuple(row[name] for name in columns) for row in archive.scan(columns))
+    finally:
+        archive.close()
+
+
+def test_export_refresh_reexport_keeps_archived_rows(db_file, tmp_path):
+    directory = str(tmp_path / 'cold')
+    assert export_cold_archive(db_file, directory, before_year=2021, purge=True) == {2019: 1, 2020: 2}
+    assert archived_ids(db_file) == [1002]
+
+    # Modification du véhicule 1 : sa ligne 2020 (purgée) revient dans main_archive
+    with writer(db_file) as conn:
+        conn.execute("UPDATE vehicule SET couleur = 'Rouge' WHERE id_vehicule = 1")
+    assert refresh() == 2
+    assert archived_ids(db_file) == [1001, 1002]
+
+    # Le nouvel export fusionne : la version de la base remplace celle du fichier, sans
+    # doublon, et les lignes 2020 déjà purgées (XY-999-ZZ) restent dans la partition
+    assert export_cold_archive(db_file, directory, before_year=2021, purge=True) == {2020: 2}
+    assert cold_rows(directory) == [(1001, 'Rouge'), (1003, 'Gris'), (1004, 'Blanc')]
+    assert archived_ids(db_file) == [1002]
+
+    archive = ColdArchive(directory)
+    try:
+        history = archive.ownership_history('XY-999-ZZ')
+    finally:
+        archive.close()
+    assert [row['date_debut'] for row in history] == ['2020-08-01']
+
+
+def test_purge_keeps_rows_changed_after_export(db_file, tmp_path):
+    directory = str(tmp_path / 'cold')
+    export_cold_archive(db_file, directory, before_year=2021)
+    with writer(db_file) as conn:
+        conn.execute("UPDATE main_archive SET couleur_veh = 'Vert' WHERE id_historique = 1003")
+
+    # Seule la ligne identique à celle du fichier est supprimée
+    assert purge_partition(db_file, partition_path(directory, 2019)) == 0
+    assert purge_partition(db_file, partition_path(directory, 2020)) == 2
+    assert archived_ids(db_file) == [1002, 1003]
@@ -0,0 +1,113 @@
+import database
+from conftest import insert_dossiers
+from db_pool import get_reader, writer
+
+
+def search_ids(db_file, query):
+    rows = database.fetch_dossiers_page(get_reader(db_file), database.fts_match_expression(query), "first", page_size=50)
+    return [row['id'] for row in rows]
+
+
+def test_search_ranks_by_relevance_and_ignores_accents_and_case(dossiers_db):
+    faible, fort, autre = insert_dossiers(dossiers_db, [
+        {'numero': 'D1', 'personne': 'Marie Curie', 'objet': 'Courrier',
+         'observation': "Transmis par le cabinet Hélène Dupont, à relancer après la réunion du mois prochain."},
+        {'numero': 'D2', 'personne': 'HÉLÈNE DUPONT', 'objet': 'Dossier Dupont'},
+        {'numero': 'D3', 'personne': 'Pierre Dubois', 'objet': 'Suivi de commande'},
+    ])
+    assert search_ids(dossiers_db, 'helene dupont') == [fort, faible]
+    assert search_ids(dossiers_db, 'dup') == [fort, faible]  # Préfixe
+    assert search_ids(dossiers_db, 'dubois') == [autre]
+
+    results, total = database.search_dossiers('dupont')
+    assert [row['id'] for row in results] == [fort, faible] and total == 2
+
+
+def test_search_syntax_typed_by_the_user_is_neutralised(dossiers_db):
+    insert_dossiers(dossiers_db, [{'numero': 'D1', 'personne': 'Jean Dupont', 'objet': 'NEAR OR AND'}])
+    assert database.fts_match_expression('"dupont" OR (') == '"dupont"* "OR"*'
+    assert len(search_ids(dossiers_db, 'dupont OR')) == 1
+    assert database.fts_match_expression('  ?! ') is None
+
+
+def test_full_text_index_follows_updates_and_deletes(dossiers_db):
+    dossier_id, = insert_dossiers(dossiers_db, [{'numero': 'D1', 'personne': 'Jean Dupont', 'objet': 'Devis'}])
+    with writer(dossiers_db) as conn:
+        conn.execute("UPDATE dossiers SET personne = 'Jean Martin' WHERE id = ?", (dossier_id,))
+    assert search_ids(dossiers_db, 'dupont') == []
+    assert search_ids(dossiers_db, 'martin') == [dossier_id]
+
+    with writer(dossiers_db) as conn:
+        conn.execute("DELETE FROM dossiers WHERE id = ?", (dossier_id,))
+    assert search_ids(dossiers_db, 'martin') == []
+    with writer(dossiers_db) as conn:
+        # L'index externe (content='dossiers') reste cohérent avec la table
+        conn.execute("INSERT INTO dossiers_fts(dossiers_fts) VALUES ('integrity-check')")
+
+
+def walk_pages(conn, match, page_size):
+    # Toutes les pages de "first" à la fin en suivant "next", puis retour par "previous"
+    pages = [database.fetch_dossiers_page(conn, match, "first", page_size=page_size)]
+    while True:
+        page = database.fetch_dossiers_page(conn, match, "next", database.page_key(pages[-1][-1]), page_size)
+        if not page:
+            break
+        pages.append(page)
+    backwards = [pages[-1]]
+    while True:
+        page = database.fetch_dossiers_page(conn, match, "previous", database.page_key(backwards[-1][0]), page_size)
+        if not page:
+            break
+        backwards.append(page)
+    ids = lambda pages: [[row['id'] for row in page] for page in pages]
+    return ids(pages), ids(reversed(backwards))
+
+
+def test_keyset_pages_cross_created_at_ties_without_gaps_or_duplicates(dossiers_db):
+    # 13 dossiers créés dans la même seconde, encadrés par un plus ancien et un plus récent
+    ancien, = insert_dossiers(dossiers_db, [{'numero': 'A', 'personne': 'P', 'objet': 'O', 'created_at': '2024-01-01 09:00:00'}])
+    ex_aequo = insert_dossiers(dossiers_db, [
+        {'numero': f'T{i}', 'personne': 'P', 'objet': 'O', 'created_at': '2024-01-01 10:00:00'} for i in range(13)
+    ])
+    recent, = insert_dossiers(dossiers_db, [{'numero': 'R', 'personne': 'P', 'objet': 'O', 'created_at': '2024-01-01 11:00:00'}])
+    expected = [recent] + sorted(ex_aequo, reverse=True) + [ancien]
+
+    forward, backward = walk_pages(get_reader(dossiers_db), None, 4)
+    assert sum(forward, []) == expected
+    assert [len(page) for page in forward] == [4, 4, 4, 3]
+    assert backward == forward
+
+    conn = get_reader(dossiers_db)
+    last = database.fetch_dossiers_page(conn, None, "last", page_size=4, last_page_size=3)
+    assert [row['id'] for row in last] == expected[-3:]
+    # "current" repart de la première ligne de la page affichée (rafraîchissement)
+    first = database.fetch_dossiers_page(conn, None, "first", page_size=4)
+    second = database.fetch_dossiers_page(conn, None, "next", database.page_key(first[-1]), 4)
+    current = database.fetch_dossiers_page(conn, None, "current", database.page_key(second[0]), 4)
+    assert [row['id'] for row in current] == forward[1]
+
+
+def test_keyset_pages_of_a_search_cross_equal_relevance(dossiers_db):
+    # Dossiers identiques : même score bm25, départagés par l'identifiant
+    ids = insert_dossiers(dossiers_db, [{'numero': f'D{i}', 'personne': 'Jean Dupont', 'objet': 'Devis'} for i in range(7)])
+    forward, backward = walk_pages(get_reader(dossiers_db), database.fts_match_expression('dupont'), 3)
+    assert sum(forward, []) == sorted(ids)
+    assert backward == forward
+
+
+def test_search_count_stops_just_above_the_cap(dossiers_db):
+    insert_dossiers(dossiers_db, [{'numero': f'C{i}', 'personne': 'Durand', 'objet': 'O'} for i in range(12)])
+    conn = get_reader(dossiers_db)
+    match = database.fts_match_expression('durand')
+    # cap + 1 signifie "plus de cap résultats" ; en dessous du plafond, le compte est exact
+    assert database.count_matches(conn, match, cap=5) == 6
+    assert database.count_matches(conn, match, cap=12) == 12
+    assert database.count_matches(conn, match, cap=11) == 12
+
+
+def test_row_counter_follows_inserts_and_deletes(dossiers_db):
+    ids = insert_dossiers(dossiers_db, [{'numero': f'N{i}', 'personne': 'P', 'objet': 'O'} for i in range(4)])
+    assert database.count_dossiers(get_reader(dossiers_db)) == 4
+    with writer(dossiers_db) as conn:
+        conn.execute("DELETE FROM dossiers WHERE id IN (?, ?)", ids[:2])
+    assert database.count_dossiers(get_reader(dossiers_db)) == 2
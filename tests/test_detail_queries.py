@@ -0,0 +1,100 @@
+import io
+from datetime import datetime
+
+import pytest
+
+import cars_queries
+import main
+from db_pool import get_reader, writer
+from detail_queries import (HISTORY_FIELDS, OWNED_VEHICLE_FIELDS, OWNER_COLUMNS, VEHICLE_COLUMNS, column_values,
+                            decode_history, json_array_sql)
+
+
+@pytest.fixture
+def history_db(cars_db):
+    # Clio : trois propriétaires successifs (historique inséré dans le désordre) ; 308 sans historique
+    with writer(cars_db) as conn:
+        conn.executemany(
+            "INSERT INTO vehicule (id_vehicule, immatriculation, marque, modele, annee_fabrication, couleur) VALUES (?, ?, ?, ?, ?, ?)",
+            [(1, 'AB-123-CD', 'Renault', 'Clio', 2015, 'Rouge'), (2, 'EF-456-GH', 'Peugeot', '308', 2020, 'Gris')],
+        )
+        conn.executemany(
+            "INSERT INTO proprietaire (id_proprietaire, type_proprietaire, nom, prenom, raison_sociale) VALUES (?, ?, ?, ?, ?)",
+            [(1, 'PHYSIQUE', 'Martin', 'Julie', None), (2, 'MORALE', None, None, 'Transports Durand'),
+             (3, 'PHYSIQUE', 'Bernard', 'Luc', None)],
+        )
+        conn.executemany(
+            "INSERT INTO historique_proprietaires (id_vehicule, id_proprietaire, date_debut, date_fin) VALUES (?, ?, ?, ?)",
+            [(1, 2, '2018-03-01', '2021-06-15'), (1, 3, '2021-06-15', None), (1, 1, '2015-01-10', '2018-03-01')],
+        )
+    return cars_db
+
+
+@pytest.fixture
+def sqlite_dialect(monkeypatch):
+    # main.py sur le remplaçant SQLite local, quel que soit le backend configuré
+    monkeypatch.setattr(main, 'SQL_DIALECT', 'sqlite')
+
+
+def test_vehicle_details_in_one_row_with_history_newest_first(history_db):
+    row, history = cars_queries.fetch_vehicle_details(get_reader(history_db), 1)
+    assert (row['immatriculation'], row['proprietaire_actuel'], row['date_debut']) == ('AB-123-CD', 'Bernard Luc', '2021-06-15')
+    assert [(item['nom_proprietaire'], item['type_proprietaire'], item['date_debut'], item['date_fin']) for item in history] == [
+        ('Bernard Luc', 'PHYSIQUE', '2021-06-15', None),
+        ('Transports Durand', 'MORALE', '2018-03-01', '2021-06-15'),
+        ('Martin Julie', 'PHYSIQUE', '2015-01-10', '2018-03-01'),
+    ]
+
+
+def test_vehicle_without_history_and_unknown_vehicle(history_db):
+    row, history = cars_queries.fetch_vehicle_details(get_reader(history_db), 2)
+    assert row['immatriculation'] == 'EF-456-GH'
+    assert row['proprietaire_actuel'] is None
+    assert history == []
+    assert cars_queries.fetch_vehicle_details(get_reader(history_db), 99) == (None, [])
+
+
+def test_owner_details_list_owned_vehicles(history_db):
+    row, vehicles = cars_queries.fetch_owner_details(get_reader(history_db), 2)
+    assert row['raison_sociale'] == 'Transports Durand'
+    assert vehicles == [{'immatriculation': 'AB-123-CD', 'marque': 'Renault', 'modele': 'Clio',
+                         'date_debut': '2018-03-01', 'date_fin': '2021-06-15'}]
+    assert cars_queries.fetch_owner_details(get_reader(history_db), 99) == (None, [])
+
+
+def test_main_vehicle_details_as_tuples_with_dates(history_db, sqlite_dialect):
+    # Colonnes lues par nom (v.* contient aussi les clés de recherche), dates en datetime
+    vehicle, history = main.fetch_vehicle_details(get_reader(history_db).cursor(), 1)
+    assert vehicle == (1, 'AB-123-CD', 'Renault', 'Clio', 2015, 'Rouge', 'Bernard Luc', '2021-06-15')
+    assert history[0] == ('Bernard Luc', 'PHYSIQUE', datetime(2021, 6, 15), None)
+    assert history[-1] == ('Martin Julie', 'PHYSIQUE', datetime(2015, 1, 10), datetime(2018, 3, 1))
+    assert main.fetch_vehicle_details(get_reader(history_db).cursor(), 99) == (None, [])
+
+
+def test_main_owner_details_as_tuples_with_dates(history_db, sqlite_dialect):
+    owner, vehicles = main.fetch_owner_details(get_reader(history_db).cursor(), 3)
+    assert len(owner) == len(OWNER_COLUMNS)
+    assert owner[:2] == (3, 'PHYSIQUE') and owner[5:7] == ('Bernard', 'Luc')
+    assert vehicles == [('AB-123-CD', 'Renault', 'Clio', datetime(2021, 6, 15), None)]
+
+
+def test_decode_history_reads_lob_like_values():
+    # CLOB non converti par le pilote : objet à relire par read()
+    lob = io.StringIO('[{"date_debut": "2019-01-01T00:00:00"}, {"date_debut": "2022-05-10T00:00:00"}]')
+    assert [item['date_debut'] for item in decode_history(lob)] == ['2022-05-10T00:00:00', '2019-01-01T00:00:00']
+    assert decode_history(None) == []
+
+
+def test_column_values_by_name_ignoring_case_and_missing_column():
+    description = [('ID_VEHICULE',), ('ANNEE_FABRICATION',), ('HISTORIQUE',)]
+    assert column_values(description, (7, 2015, '[]'), ('id_vehicule', ('annee', 'annee_fabrication'))) == (7, 2015)
+    with pytest.raises(KeyError):
+        column_values(description, (7, 2015, '[]'), VEHICLE_COLUMNS)
+
+
+def test_oracle_aggregate_is_sorted_and_returned_as_clob():
+    sql = json_array_sql('oracle', HISTORY_FIELDS)
+    assert sql.startswith('JSON_ARRAYAGG(JSON_OBJECT(')
+    assert "'nom_proprietaire' VALUE" in sql
+    assert sql.endswith('ORDER BY hp.date_debut DESC RETURNING CLOB)')
+    assert json_array_sql('sqlite', OWNED_VEHICLE_FIELDS).startswith("json_group_array(json_object('immatriculation', v.immatriculation")
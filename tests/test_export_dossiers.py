@@ -0,0 +1,77 @@
+import csv
+import gzip
+import json
+
+import pytest
+
+import database
+from conftest import insert_dossiers
+from db_pool import get_reader
+from export_dossiers import export_dossiers
+from import_dossiers import import_file
+
+# Valeurs piégeuses pour CSV/JSON : accents, virgule, guillemets, retour à la ligne, NULL
+DOSSIERS = [
+    {'numero': 'E1', 'personne': 'Éloïse Müller', 'objet': 'Vente, "urgent"', 'observation': 'ligne 1\nligne 2',
+     'created_at': '2024-03-01 10:00:00'},
+    {'numero': 'E2', 'personne': 'Jean Dupont', 'objet': 'Devis', 'numero_reference': 'REF-2',
+     'date_debut': '2024-01-01', 'date_fin': '2024-12-31', 'created_at': '2024-03-02 10:00:00'},
+    {'numero': 'E3', 'personne': 'Marie Dupont', 'objet': 'Contrat', 'created_at': '2024-03-03 10:00:00'},
+]
+
+
+def database_rows(db_file):
+    # Dossiers de la base, dans l'ordre de l'écran (plus récents d'abord)
+    rows = get_reader(db_file).execute(
+        f"SELECT {', '.join(database.DOSSIER_COLUMNS)} FROM dossiers ORDER BY created_at DESC, id DESC"
+    ).fetchall()
+    return [dict(zip(database.DOSSIER_COLUMNS, row)) for row in rows]
+
+
+def read_export(path):
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rt', encoding='utf-8', newline='') as f:
+        if '.csv' in path:
+            return list(csv.DictReader(f))
+        return [json.loads(line) for line in f]
+
+
+@pytest.mark.parametrize('name', ['dossiers.jsonl', 'dossiers.jsonl.gz'])
+def test_jsonl_export_reads_back_as_the_database_rows(dossiers_db, tmp_path, name):
+    insert_dossiers(dossiers_db, DOSSIERS)
+    path = str(tmp_path / name)
+    count, _ = export_dossiers(path, db_file=dossiers_db, chunk_size=2)
+    assert count == 3
+    assert read_export(path) == database_rows(dossiers_db)
+
+
+@pytest.mark.parametrize('name', ['dossiers.csv', 'dossiers.csv.gz'])
+def test_csv_export_reads_back_as_the_database_rows(dossiers_db, tmp_path, name):
+    insert_dossiers(dossiers_db, DOSSIERS)
+    path = str(tmp_path / name)
+    export_dossiers(path, db_file=dossiers_db, chunk_size=2)
+    # CSV : tout en texte, NULL écrit comme une cellule vide
+    expected = [
+        {col: '' if value is None else str(value) for col, value in row.items()}
+        for row in database_rows(dossiers_db)
+    ]
+    assert read_export(path) == expected
+
+
+def test_search_export_keeps_only_the_matches(dossiers_db, tmp_path):
+    ids = insert_dossiers(dossiers_db, DOSSIERS)
+    path = str(tmp_path / 'dupont.jsonl')
+    count, _ = export_dossiers(path, 'dupont', db_file=dossiers_db)
+    assert count == 2
+    assert sorted(row['id'] for row in read_export(path)) == ids[1:]
+
+
+def test_export_can_be_imported_again(dossiers_db, tmp_path):
+    insert_dossiers(dossiers_db, DOSSIERS)
+    path = str(tmp_path / 'dossiers.jsonl')
+    export_dossiers(path, db_file=dossiers_db)
+
+    copy = str(tmp_path / 'copie.db')
+    import_file(path, copy, progress=None)
+    without_id = lambda rows: sorted(tuple(row[col] for col in database.DOSSIER_COLUMNS[1:]) for row in rows)
+    assert without_id(database_rows(copy)) == without_id(database_rows(dossiers_db))
@@ -0,0 +1,51 @@
+from datetime import date
+from math import gcd
+
+import pytest
+
+import generate_data
+from db_pool import get_reader
+
+TABLES = ('dossiers', 'proprietaire', 'vehicule', 'historique_proprietaires')
+
+
+def generate(db_file, seed=42, today=generate_data.REFERENCE_DATE):
+    generator = generate_data.Generator(seed, today)
+    generate_data.generate_dossiers(db_file, generator, 300)
+    generate_data.generate_vehicles(db_file, generator, 500, 300)
+
+
+def rows(db_file, table):
+    return get_reader(db_file).execute(f"SELECT * FROM {table} ORDER BY rowid").fetchall()
+
+
+def test_plate_numbering_never_repeats_below_the_plate_space():
+    # Pas premier avec l'espace : permutation complète, sans cycle plus court
+    assert gcd(generate_data.SIV_STRIDE, generate_data.SIV_SPACE) == 1
+    assert gcd(generate_data.FNI_STRIDE, generate_data.FNI_SPACE) == 1
+    ids = range(1, 200001)
+    assert len({generate_data.fni_plate(i) for i in ids}) == len(ids)
+    assert len({generate_data.siv_plate(i) for i in ids}) == len(ids)
+
+
+def test_same_seed_and_reference_date_give_the_same_data(tmp_path):
+    first, second = str(tmp_path / 'a.db'), str(tmp_path / 'b.db')
+    generate(first)
+    generate(second)
+    for table in TABLES:
+        assert [tuple(row) for row in rows(first, table)] == [tuple(row) for row in rows(second, table)]
+    # Aucun véhicule écarté par INSERT OR IGNORE
+    assert len(rows(first, 'vehicule')) == 500
+
+
+def test_reference_date_bounds_the_generated_dates(tmp_path):
+    db_file = str(tmp_path / 'dossiers.db')
+    generate(db_file, today=date(2020, 6, 30))
+    latest = get_reader(db_file).execute("SELECT MAX(date_debut) FROM historique_proprietaires").fetchone()[0]
+    assert latest <= '2020-06-30'
+
+
+def test_vehicle_ids_beyond_the_plate_space_are_refused(tmp_path, monkeypatch):
+    monkeypatch.setattr(generate_data, 'PLATE_SPACE', 100)
+    with pytest.raises(ValueError):
+        generate_data.generate_vehicles(str(tmp_path / 'cars.db'), generate_data.Generator(1), 100, 50)
@@ -0,0 +1,80 @@
+import csv
+import json
+
+import pytest
+
+import database
+from db_pool import get_reader
+from import_dossiers import import_file
+
+
+def write_csv(path, records):
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        out = csv.DictWriter(f, fieldnames=('numero', 'date', 'personne', 'objet'))
+        out.writeheader()
+        out.writerows(records)
+
+
+def records(count):
+    # Une ligne sur dix sans objet : rejetée
+    return [
+        {'numero': f'I{i:03}', 'date': '2024-02-01', 'personne': f'Personne {i}', 'objet': '' if i % 10 == 9 else 'Import'}
+        for i in range(count)
+    ]
+
+
+def imported_numeros(db_file):
+    return [row[0] for row in get_reader(db_file).execute("SELECT numero FROM dossiers ORDER BY numero")]
+
+
+class Interruption(Exception):
+    pass
+
+
+def interrupt_after(batches):
+    calls = []
+    def progress(imported, rejected, elapsed):
+        calls.append(imported)
+        if len(calls) == batches:
+            raise Interruption
+    return progress
+
+
+def test_interrupted_import_resumes_after_the_last_committed_batch(dossiers_db, tmp_path):
+    path = str(tmp_path / 'dossiers.csv')
+    write_csv(path, records(35))
+
+    with pytest.raises(Interruption):
+        import_file(path, dossiers_db, batch_size=10, progress=interrupt_after(2))
+    # Deux lots validés (18 lignes valides), puis triggers et compteurs rétablis
+    conn = get_reader(dossiers_db)
+    assert len(imported_numeros(dossiers_db)) == 18
+    assert not database.bulk_load_in_progress(conn)
+    assert database.count_dossiers(conn) == 18
+
+    imported, rejected, _ = import_file(path, dossiers_db, batch_size=10, progress=None)
+    assert (imported, rejected) == (14, 1)
+    expected = [record['numero'] for record in records(35) if record['objet']]
+    assert imported_numeros(dossiers_db) == expected
+    assert database.count_dossiers(get_reader(dossiers_db)) == 32
+    # Import terminé : plus de position enregistrée pour ce fichier
+    assert get_reader(dossiers_db).execute("SELECT COUNT(*) FROM import_progress").fetchone()[0] == 0
+
+
+def test_restart_ignores_the_interrupted_position(dossiers_db, tmp_path):
+    path = str(tmp_path / 'dossiers.jsonl')
+    with open(path, 'w', encoding='utf-8') as f:
+        f.writelines(json.dumps(record) + '\n' for record in records(20))
+
+    with pytest.raises(Interruption):
+        import_file(path, dossiers_db, batch_size=10, progress=interrupt_after(1))
+    imported, rejected, _ = import_file(path, dossiers_db, batch_size=10, restart=True, progress=None)
+    assert (imported, rejected) == (18, 2)
+
+
+def test_imported_dossiers_are_searchable(dossiers_db, tmp_path):
+    path = str(tmp_path / 'dossiers.csv')
+    write_csv(path, records(5))
+    import_file(path, dossiers_db, progress=None)
+    rows = database.fetch_dossiers_page(get_reader(dossiers_db), database.fts_match_expression('personne 3'), "first")
+    assert [row['numero'] for row in rows][0] == 'I003'
@@ -0,0 +1,28 @@
+import database
+import setup_initial_tables
+from db_pool import writer
+from migrations import LATEST_VERSIONS, migrate, schema_version
+
+
+def test_each_database_reaches_latest_version_of_its_schemas(tmp_path):
+    # dossiers.db n'a pas les tables véhicules, cars.db pas la table dossiers
+    dossiers_db, cars_db = str(tmp_path / 'dossiers.db'), str(tmp_path / 'cars.db')
+    with writer(dossiers_db) as conn:
+        database.create_schema(conn)
+        assert schema_version(conn) == {'dossiers': LATEST_VERSIONS['dossiers']}
+    with writer(cars_db) as conn:
+        setup_initial_tables.create_tables(conn.cursor())
+        assert migrate(conn) == {'vehicules': LATEST_VERSIONS['vehicules']}
+
+
+def test_tables_created_later_are_migrated(tmp_path):
+    # Tables véhicules ajoutées à une base dossiers déjà à jour (archive_app)
+    db_file = str(tmp_path / 'dossiers.db')
+    with writer(db_file) as conn:
+        database.create_schema(conn)
+    with writer(db_file) as conn:
+        setup_initial_tables.create_tables(conn.cursor())
+        versions = migrate(conn)
+        indexes = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    assert versions == {'dossiers': LATEST_VERSIONS['dossiers'], 'vehicules': LATEST_VERSIONS['vehicules']}
+    assert 'idx_vehicule_immatriculation_upper' in indexes
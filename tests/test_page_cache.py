@@ -0,0 +1,44 @@
+import sqlite3
+
+from conftest import insert_dossiers
+from page_cache import PageCache
+
+
+def test_write_from_another_connection_empties_the_cache(dossiers_db):
+    cache = PageCache(dossiers_db)
+    cache.put(('', 1, 10), ['page 1'], cache.generation)
+    assert cache.get(('', 1, 10)) == ['page 1']
+
+    # Écriture par une connexion qui n'est pas celle du cache (autre processus)
+    insert_dossiers(dossiers_db, [{'numero': 'N1', 'personne': 'P', 'objet': 'O'}])
+    assert cache.get(('', 1, 10)) is None
+
+
+def test_read_with_an_unchanged_database_is_served_from_cache(dossiers_db):
+    cache = PageCache(dossiers_db)
+    cache.put(('', 1, 10), ['page 1'], cache.generation)
+    # Une simple lecture ne change pas data_version
+    sqlite3.connect(dossiers_db).execute("SELECT COUNT(*) FROM dossiers").fetchone()
+    assert cache.get(('', 1, 10)) == ['page 1']
+
+
+def test_page_read_before_an_invalidation_is_not_stored(dossiers_db):
+    cache = PageCache(dossiers_db)
+    generation = cache.generation
+    cache.invalidate()  # Écriture pendant la lecture de la page
+    cache.put(('', 1, 10), ['page périmée'], generation)
+    assert cache.get(('', 1, 10)) is None
+
+    cache.put(('', 1, 10), ['page 1'], cache.generation)
+    assert ('', 1, 10) in cache
+
+
+def test_least_recently_used_page_is_evicted(dossiers_db):
+    cache = PageCache(dossiers_db, max_entries=2)
+    for page in (1, 2):
+        cache.put(('', page, 10), [page], cache.generation)
+    cache.get(('', 1, 10))
+    cache.put(('', 3, 10), [3], cache.generation)
+    assert ('', 1, 10) in cache
+    assert ('', 2, 10) not in cache
+    assert ('', 3, 10) in cache
@@ -0,0 +1,61 @@
+import random
+
+import pytest
+
+from db_pool import get_reader, writer
+from plate_fuzzy import PlateMatcher, edit_distance_to, pattern, weighted_distance
+
+PLAQUES = ['AB-123-CD', 'AB-128-CD', 'EF-456-GH', 'XY-999-ZZ', 'ABC-DEF']
+
+
+@pytest.fixture
+def plates_db(cars_db):
+    with writer(cars_db) as conn:
+        conn.executemany(
+            "INSERT INTO vehicule (id_vehicule, immatriculation, marque, modele) VALUES (?, ?, 'Renault', 'Clio')",
+            list(enumerate(PLAQUES, 1))
+        )
+    return cars_db
+
+
+def suggestions(db_file, query, matcher=None):
+    return [(plate, distance) for _, plate, distance in (matcher or PlateMatcher()).suggest(get_reader(db_file), query)]
+
+
+def test_misread_characters_rank_before_other_substitutions(plates_db):
+    # I lu pour 1 : confusion ; 8 pour 3 : substitution ordinaire (et 3 / 8 non confondus)
+    assert suggestions(plates_db, 'ab-i23-cd') == [('AB-123-CD', 0.25), ('AB-128-CD', 1.25)]
+    assert suggestions(plates_db, 'AB-124-CD') == [('AB-123-CD', 1.0), ('AB-128-CD', 1.0)]
+
+
+def test_swapped_neighbours_count_as_one_edit(plates_db):
+    assert suggestions(plates_db, 'AB-213-CD') == [('AB-123-CD', 1.0)]
+    # Inversion au milieu d'une plaque de 6 caractères : ni début ni fin intacts
+    assert suggestions(plates_db, 'ABD-CEF') == [('ABC-DEF', 1.0)]
+
+
+def test_two_edits_are_not_suggested(plates_db):
+    assert suggestions(plates_db, 'AB-214-CE') == []
+    with pytest.raises(ValueError):
+        PlateMatcher().suggest(get_reader(plates_db), 'AB-214-CE', max_weighted_distance=2)
+
+
+def test_new_changed_and_deleted_vehicles(plates_db):
+    matcher = PlateMatcher()
+    assert suggestions(plates_db, 'EF-456-GN', matcher) == [('EF-456-GH', 1.0)]
+    with writer(plates_db) as conn:
+        conn.execute("INSERT INTO vehicule (id_vehicule, immatriculation, marque, modele) VALUES (10, 'JK-321-LM', 'Dacia', 'Logan')")
+        conn.execute("UPDATE vehicule SET immatriculation = 'QR-000-ST' WHERE immatriculation = 'EF-456-GH'")
+        conn.execute("DELETE FROM vehicule WHERE immatriculation = 'XY-999-ZZ'")
+    # Ajout pris en compte au fil de l'eau ; plaque modifiée ou supprimée vérifiée en base
+    assert suggestions(plates_db, 'JK-312-LM', matcher) == [('JK-321-LM', 1.0)]
+    assert suggestions(plates_db, 'EF-456-GN', matcher) == []
+    assert suggestions(plates_db, 'XY-999-Z2', matcher) == []
+
+
+def test_bit_parallel_distance_matches_the_matrix():
+    # Sans caractère confondu, la distance pondérée est la distance d'édition ordinaire
+    r = random.Random(20)
+    for _ in range(2000):
+        a, b = (''.join(r.choice('ACDEH') for _ in range(r.randint(0, 8))) for _ in range(2))
+        assert edit_distance_to(pattern(a), b) == weighted_distance(a, b)
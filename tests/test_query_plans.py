@@ -0,0 +1,22 @@
+import pytest
+
+from check_query_plans import check_query, create_full_schema, query_names
+from db_pool import get_writer
+
+
+@pytest.fixture(scope='module')
+def db_file(tmp_path_factory):
+    # Schéma complet (dossiers + véhicules, migrations comprises), créé une fois pour le module
+    db_file = str(tmp_path_factory.mktemp('plans') / 'plans.db')
+    create_full_schema(db_file)
+    return db_file
+
+
+@pytest.mark.parametrize('name', query_names())
+def test_query_uses_an_index(db_file, name):
+    # Une requête de production ne parcourt aucune table en entier (sauf KNOWN_SCANS).
+    # Connexion d'écriture : le passage quotidien des propriétaires actuels écrit aussi.
+    results = check_query(get_writer(db_file), name)
+    assert results, "aucune instruction envoyée à SQLite"
+    failures = [(status, plan) for status, scans, plan in results if scans]
+    assert not failures, '\n'.join(f"{status}\n    " + '\n    '.join(plan) for status, plan in failures)
@@ -0,0 +1,51 @@
+import sqlite3
+
+import pytest
+
+from db_pool import writer
+from migrations import migrate
+from search_keys import SEARCH_KEY_COLUMNS, fold_text, key_column, prefix_range
+
+
+@pytest.mark.parametrize('value', ['Hélène', 'ÉLOÏSE', "d'Alençon", 'Çà et là ÿ', 'Noël Œuvre', 'straße', None])
+def test_keys_written_by_triggers_match_python_folding(cars_db, value):
+    # Même clé côté base (écriture) et côté application (saisie, prefix_range)
+    conn = sqlite3.connect(cars_db)
+    conn.execute("INSERT INTO proprietaire (id_proprietaire, type_proprietaire, nom) VALUES (1, 'PHYSIQUE', ?)", (value,))
+    assert conn.execute("SELECT nom_cle FROM proprietaire").fetchone()[0] == fold_text(value)
+
+
+def test_plain_connection_writes_and_gets_folded_keys(cars_db):
+    # Connexion sans rien d'enregistré (sqlite3 en ligne de commande, outil externe)
+    conn = sqlite3.connect(cars_db)
+    conn.execute("INSERT INTO proprietaire (id_proprietaire, type_proprietaire, nom, prenom) VALUES (1, 'PHYSIQUE', 'Lefèvre', 'Hélène')")
+    conn.execute("INSERT INTO vehicule (id_vehicule, immatriculation, marque, modele) VALUES (1, 'AB-123-CD', 'Citroën', 'Xsara Picasso')")
+    conn.execute("UPDATE proprietaire SET prenom = 'Agnès' WHERE id_proprietaire = 1")
+    conn.commit()
+    assert conn.execute("SELECT nom_cle, prenom_cle FROM proprietaire").fetchone() == ('LEFEVRE', 'AGNES')
+    assert conn.execute("SELECT marque_cle, modele_cle FROM vehicule").fetchone() == ('CITROEN', 'XSARA PICASSO')
+
+    low, high = prefix_range('lefe')
+    assert conn.execute("SELECT id_proprietaire FROM proprietaire WHERE nom_cle >= ? AND nom_cle < ?", (low, high)).fetchall() == [(1,)]
+
+
+def test_migration_replaces_triggers_calling_an_application_function(cars_db):
+    # Base d'une version précédente : triggers appelant fold_text(), clés calculées par NFKD
+    with writer(cars_db) as conn:
+        for table, columns in SEARCH_KEY_COLUMNS.items():
+            conn.execute(f"DROP TRIGGER {table}_search_keys_ai")
+            conn.execute(f'''
+                CREATE TRIGGER {table}_search_keys_ai AFTER INSERT ON {table} BEGIN
+                    UPDATE {table} SET {key_column(columns[0])} = fold_text(new.{columns[0]});
+                END
+            ''')
+        conn.execute("DELETE FROM schema_versions")
+    with pytest.raises(sqlite3.OperationalError, match='fold_text'):
+        with sqlite3.connect(cars_db) as conn:
+            conn.execute("INSERT INTO proprietaire (id_proprietaire, type_proprietaire, nom) VALUES (2, 'PHYSIQUE', 'Zoé')")
+
+    with writer(cars_db) as conn:
+        migrate(conn)
+    with sqlite3.connect(cars_db) as conn:
+        conn.execute("INSERT INTO proprietaire (id_proprietaire, type_proprietaire, nom) VALUES (2, 'PHYSIQUE', 'Zoé')")
+        assert conn.execute("SELECT nom_cle FROM proprietaire WHERE id_proprietaire = 2").fetchone() == ('ZOE',)
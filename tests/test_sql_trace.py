@@ -0,0 +1,40 @@
+import sqlite3
+
+import pytest
+
+import sql_trace
+
+
+@pytest.fixture
+def slow_log(tmp_path, monkeypatch):
+    # Toutes les requêtes journalisées, dans un fichier propre au test
+    path = tmp_path / 'slow_queries.log'
+    monkeypatch.setattr(sql_trace, 'SLOW_QUERY_LOG', str(path))
+    monkeypatch.setattr(sql_trace, 'SLOW_QUERY_MS', 0)
+    # Pas de thread d'export des métriques (ni d'écriture à la sortie du processus)
+    monkeypatch.setattr(sql_trace, '_start_exporter', lambda: None)
+    yield path
+    sql_trace.reset()
+
+
+def run_query(tmp_path):
+    conn = sqlite3.connect(str(tmp_path / 'trace.db'), factory=sql_trace.TracedConnection)
+    conn.execute("CREATE TABLE proprietaire (nom TEXT)")
+    conn.execute("INSERT INTO proprietaire (nom) VALUES (?)", ('Lefèvre',))
+    conn.execute("SELECT nom FROM proprietaire WHERE nom = ?", ('Lefèvre',)).fetchall()
+    conn.close()
+
+
+def test_slow_query_log_leaves_out_parameters(tmp_path, slow_log):
+    # Valeurs des paramètres : données personnelles, absentes du journal par défaut
+    run_query(tmp_path)
+    log = slow_log.read_text(encoding='utf-8')
+    assert 'SELECT nom FROM proprietaire WHERE nom = ?' in log
+    assert 'Lefèvre' not in log
+
+
+def test_slow_query_log_includes_parameters_when_enabled(tmp_path, slow_log, monkeypatch):
+    # FLETAPP_SLOW_QUERY_PARAMS=1 : texte exécuté, paramètres compris (diagnostic)
+    monkeypatch.setattr(sql_trace, 'SLOW_QUERY_PARAMS', True)
+    run_query(tmp_path)
+    assert "SELECT nom FROM proprietaire WHERE nom = 'Lefèvre'" in slow_log.read_text(encoding='utf-8')
@@ -0,0 +1,269 @@
+import json
+import os
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+
+import flet as ft
+
+try:
+    from flet.core.protocol import CommandEncoder
+except ImportError:  # Autre version de Flet : durées mesurées, taille des envois inconnue
+    CommandEncoder = None
+
+# Profilage du rendu : pour chaque gestionnaire, temps passé en Python à construire les
+# contrôles, temps de page.update(), nombre de contrôles et octets envoyés au client.
+# Désactivé par défaut ; FLETAPP_UI_PROFILE=1 pour l'activer.
+#
+# - section(nom) : bloc mesuré (construction + mises à jour). db_worker.submit ouvre
+#   une section par résultat appliqué, nommée d'après son handler (search, detail...)
+# - page.update() / page.add() hors section : mesurés seuls, au nom de la fonction appelante
+# - octets : commandes envoyées au client sérialisées comme par Flet (JSON), hors temps mesuré
+#
+# Chaque mesure est ajoutée au journal FLETAPP_UI_PROFILE_LOG (une ligne JSON) ; Ctrl+Maj+P
+# affiche un panneau récapitulatif par gestionnaire par-dessus l'application.
+
+ENABLED = os.environ.get("FLETAPP_UI_PROFILE", "0") not in ("", "0")
+LOG_FILE = os.environ.get("FLETAPP_UI_PROFILE_LOG", "ui_profile.log")
+PANEL_ROWS = 10
+PANEL_REFRESH_INTERVAL = 1.0  # Secondes minimum entre deux rafraîchissements du panneau
+
+_local = threading.local()
+_lock = threading.Lock()
+_bytes_measured = CommandEncoder is not None  # False dès qu'un envoi ne peut plus être mesuré
+_stats = {}  # (écran, gestionnaire) -> HandlerStats
+_panels = []
+
+
+class HandlerStats:
+    def __init__(self):
+        self.count = 0
+        self.build_ms = 0.0
+        self.update_ms = 0.0
+        self.max_ms = 0.0
+        self.updates = 0
+        self.controls = 0
+        self.bytes = 0
+
+    def add(self, entry):
+        self.count += 1
+        self.build_ms += entry["build_ms"]
+        self.update_ms += entry["update_ms"]
+        self.max_ms = max(self.max_ms, entry["build_ms"] + entry["update_ms"])
+        self.updates += entry["updates"]
+        self.controls += entry["controls"]
+        self.bytes += entry["bytes"] or 0
+
+
+def _new_measure(name):
+    return {"name": name, "update_s": 0.0, "updates": 0, "controls": 0, "bytes": 0}
+
+
+@contextmanager
+def section(name, page=None):
+    # Mesure le bloc ; les sections imbriquées sont comptées dans la section englobante
+    sections = getattr(_local, "sections", None)
+    if not ENABLED or sections:
+        yield
+        return
+    current = _new_measure(name)
+    _local.sections = [current]
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _local.sections = None
+        total = time.perf_counter() - start
+        _record(page, current, build_s=total - current["update_s"])
+
+
+def _caller_name():
+    # Première fonction appelante hors de Flet et de ce module
+    frame = sys._getframe(2)
+    while frame is not None:
+        module = frame.f_globals.get("__name__", "")
+        if module != __name__ and not module.startswith("flet"):
+            return frame.f_code.co_name
+        frame = frame.f_back
+    return "?"
+
+
+def count_controls(commands):
+    # Contrôles envoyés : un par sous-commande d'un "add" (arbre aplati), un par "set"
+    return sum(len(command.commands) if command.name == "add" else 1
+               for command in commands if command.name in ("add", "set"))
+
+
+def _stop_measuring_bytes(reason):
+    # Repli : seules les durées de page.update() / page.add() restent mesurées (un seul avertissement)
+    global _bytes_measured
+    if _bytes_measured:
+        _bytes_measured = False
+        print(f"Profilage du rendu : taille des envois non mesurée ({reason}), durées seules")
+
+
+def _hook_connection(page):
+    # Mesure des commandes envoyées par la connexion de la page. Attribut privé de Flet
+    # (page._Page__conn, vérifié avec Flet 0.27) : absent d'une autre version, repli sur
+    # la mesure des durées seules.
+    if not _bytes_measured:
+        return
+    conn = getattr(page, "_Page__conn", None)
+    if getattr(conn, "ui_profiled", False):
+        return
+    send_commands = getattr(conn, "send_commands", None)
+    if send_commands is None:
+        _stop_measuring_bytes("connexion de la page introuvable dans cette version de Flet")
+        return
+
+    def profiled_send_commands(session_id, commands):
+        measure = getattr(_local, "update", None)
+        if measure is not None and _bytes_measured:
+            start = time.perf_counter()
+            try:
+                measure["bytes"] += len(json.dumps(commands, cls=CommandEncoder, separators=(",", ":")).encode("utf-8"))
+                measure["controls"] += count_controls(commands)
+            except Exception as e:  # Format des commandes différent : l'envoi lui-même n'est pas touché
+                _stop_measuring_bytes(f"commandes illisibles : {e}")
+            measure["serialize_s"] += time.perf_counter() - start
+        return send_commands(session_id, commands)
+
+    conn.send_commands = profiled_send_commands
+    conn.ui_profiled = True
+
+
+def _profiled(page, method):
+    # page.update / page.add mesurés ; le rafraîchissement du panneau ne l'est pas
+    def profiled(*controls):
+        if getattr(_local, "refreshing", False) or getattr(_local, "update", None) is not None:
+            return method(*controls)
+        _hook_connection(page)
+        measure = _local.update = {"controls": 0, "bytes": 0, "serialize_s": 0.0}
+        start = time.perf_counter()
+        try:
+            return method(*controls)
+        finally:
+            _local.update = None
+            elapsed = time.perf_counter() - start - measure["serialize_s"]
+            sections = getattr(_local, "sections", None)
+            current = sections[0] if sections else _new_measure(_caller_name())
+            current["update_s"] += elapsed
+            current["updates"] += 1
+            current["controls"] += measure["controls"]
+            current["bytes"] += measure["bytes"]
+            if not sections:
+                _record(page, current, build_s=0.0)
+    return profiled
+
+
+def _record(page, measure, build_s):
+    entry = {
+        "time": datetime.now().isoformat(timespec="milliseconds"),
+        "screen": getattr(page, "title", None) or "",
+        "handler": measure["name"],
+        "build_ms": round(build_s * 1000, 3),
+        "update_ms": round(measure["update_s"] * 1000, 3),
+        "updates": measure["updates"],
+        "controls": measure["controls"],
+        "bytes": measure["bytes"] if _bytes_measured else None,
+    }
+    with _lock:
+        stats = _stats.get((entry["screen"], entry["handler"]))
+        if stats is None:
+            stats = _stats[(entry["screen"], entry["handler"])] = HandlerStats()
+        stats.add(entry)
+        with open(LOG_FILE, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+    _refresh_panels()
+
+
+def summary_lines(limit=PANEL_ROWS):
+    # Gestionnaires les plus coûteux (temps total), moyennes par appel
+    with _lock:
+        items = sorted(_stats.items(), key=lambda item: item[1].build_ms + item[1].update_ms, reverse=True)[:limit]
+        lines = [f"{'gestionnaire':24} {'n':>5} {'python':>8} {'update':>8} {'max':>8} {'ctrl':>6} {'Ko':>7}"]
+        for (_, name), s in items:
+            size = f"{s.bytes / s.count / 1024:7.1f}" if _bytes_measured else f"{'-':>7}"
+            lines.append(
+                f"{name[:24]:24} {s.count:5} {s.build_ms / s.count:7.1f}ms {s.update_ms / s.count:7.1f}ms "
+                f"{s.max_ms:7.1f}ms {s.controls / s.count:6.0f} {size}"
+            )
+    return lines
+
+
+# --- Panneau développeur (overlay) ---
+
+class _Panel:
+    def __init__(self, page):
+        self.page = page
+        self.refreshed_at = 0.0
+        self.text = ft.Text("", font_family="monospace", size=11, color=ft.Colors.WHITE)
+        self.control = ft.Container(
+            content=ft.Column([
+                ft.Text("Profil du rendu (moyennes par appel) — Ctrl+Maj+P", size=12,
+                        weight=ft.FontWeight.BOLD, color=ft.Colors.WHITE),
+                self.text,
+            ], tight=True, spacing=4),
+            bgcolor=ft.Colors.with_opacity(0.85, ft.Colors.BLACK),
+            padding=10,
+            border_radius=8,
+            right=10,
+            bottom=10,
+            visible=False,
+        )
+
+    def refresh(self, force=False):
+        if not self.control.visible or (not force and time.perf_counter() - self.refreshed_at < PANEL_REFRESH_INTERVAL):
+            return
+        self.refreshed_at = time.perf_counter()
+        self.text.value = "\n".join(summary_lines())
+        _local.refreshing = True
+        try:
+            self.control.update()
+        finally:
+            _local.refreshing = False
+
+    def toggle(self):
+        self.control.visible = not self.control.visible
+        _local.refreshing = True
+        try:
+            self.control.update()
+        finally:
+            _local.refreshing = False
+        self.refresh(force=True)
+
+
+def _refresh_panels():
+    for panel in list(_panels):
+        try:
+            panel.refresh()
+        except Exception as e:  # Page fermée : le panneau n'est plus affiché
+            print("Panneau de profilage indisponible:", e)
+            _panels.remove(panel)
+
+
+def attach(page):
+    # À appeler au début de main(page) : mesure les mises à jour de la page et
+    # ajoute le panneau (sans effet si FLETAPP_UI_PROFILE n'est pas activé)
+    if not ENABLED:
+        return
+    if CommandEncoder is None:
+        _stop_measuring_bytes("flet.core.protocol.CommandEncoder introuvable")
+    page.update = _profiled(page, page.update)
+    page.add = _profiled(page, page.add)
+    panel = _Panel(page)
+    page.overlay.append(panel.control)
+    _panels.append(panel)
+
+    previous = page.on_keyboard_event
+
+    def on_keyboard(e):
+        if e.ctrl and e.shift and e.key.upper() == "P":
+            panel.toggle()
+        elif previous:
+            previous(e)
+
+    page.on_keyboard_event = on_keyboard